@@ -1,9 +1,28 @@
 import json
 import html as html_lib
-from typing import Dict, Any, Optional, List
+import time
+from typing import Dict, Any, Optional, List, Tuple
 
 import streamlit as st
-from openai import OpenAI
+
+from subtext.client import is_configured, prewarm
+from subtext.demos import DEMO_EMAIL_MANAGER, DEMO_FORUM_TOXIC, DEMO_SMS_RUPTURE, DEMO_TWEET_POLITIQUE
+from subtext.deferred import DEFERRED_POLL_S, deferred_sections, merge_section
+from subtext.engine import OPENAI_MAIN_MODEL, generate_replies
+from subtext.heuristics import prescore
+from subtext.history import HISTORY_PAGE_SIZE, scan_history
+from subtext.ingest import FetchError, ingest_url
+from subtext.jobs import FAILED, ScanJob, scan_jobs
+from subtext.neardup import near_duplicates
+from subtext.profiles import missing_sections, profile_for_persona
+from subtext.resilience import breaker
+from subtext.routing import routing_log
+from subtext.schema import schema_stats
+from subtext.singleflight import inflight
+from subtext.threads import THREAD_MAX_POSTS, PostResult, analyze_thread, rollup, split_posts
+from subtext.telemetry import telemetry
+from subtext.usage import usage_ledger
+from subtext.views import get_score_color, get_view, render_metric_card, render_tag, tag_level
 
 # ───────────────── CONFIG GLOBALE ─────────────────
 st.set_page_config(
@@ -13,8 +32,9 @@ st.set_page_config(
     initial_sidebar_state="collapsed",
 )
 
-client = OpenAI()
-OPENAI_MAIN_MODEL = "gpt-4.1"
+# Client OpenAI créé à la demande ; la connexion TLS s'ouvre en arrière-plan
+# (une fois par processus) pour que le premier scan ne la paie pas.
+prewarm(OPENAI_MAIN_MODEL)
 
 # ───────────────── STYLES GLOBAUX (Dark / Mobile-first) ─────────────────
 st.markdown(
@@ -180,6 +200,30 @@ st.markdown(
         font-weight: 700;
     }
 
+    .annotated-text {
+        max-height: 28rem;
+        overflow-y: auto;
+        padding: 0.9rem 1rem;
+        border-radius: 12px;
+        background: #0f172a;
+        border: 1px solid #334155;
+        font-size: 0.92rem;
+        line-height: 1.55;
+        color: #cbd5e1;
+    }
+    .hl-mark {
+        background: rgba(251, 191, 36, 0.25);
+        color: #fef3c7;
+        border-bottom: 2px solid #fbbf24;
+        border-radius: 3px;
+        padding: 0 0.1rem;
+    }
+    .hl-mark.approx {
+        background: rgba(148, 163, 184, 0.2);
+        border-bottom: 2px dashed #94a3b8;
+    }
+    .hl-mark sup { font-size: 0.65rem; font-weight: 700; margin-left: 0.1rem; color: #fbbf24; }
+
     .reply-block { margin-top: 0.6rem; }
     .reply-box {
         width: 100%;
@@ -246,215 +290,7 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# ───────────────── DEMO TEXTES ─────────────────
-DEMO_EMAIL_MANAGER = (
-    "Bonjour,\n\n"
-    "Pour la troisième fois je dois te rappeler cette tâche pourtant simple. "
-    "Je ne vais pas repasser derrière toi indéfiniment : à un moment il va falloir "
-    "te mettre au niveau du reste de l'équipe.\n\n"
-    "Bien à toi."
-)
-DEMO_SMS_RUPTURE = (
-    "écoute, je t'avais prévenu. Si tu faisais un effort on n'en serait pas là. "
-    "Je ne peux pas continuer à être le seul à essayer dans cette relation. "
-    "Tu t'étonnes que je sois froid, mais tu récoltes juste ce que tu as semé."
-)
-DEMO_TWEET_POLITIQUE = (
-    "Sérieux les golems qui croient encore au CDI en 2025... "
-    "Continuez à enrichir votre patron pendant que je fais x10 en dropshipping depuis Bali. "
-    "La sélection est naturelle les shills. 🤡"
-)
-DEMO_FORUM_TOXIC = (
-    "Face à la crise, le gouvernement prend ses responsabilités. "
-    "Il est temps de demander des efforts à ceux qui profitent du système au détriment des travailleurs honnêtes. "
-    "Cette réforme est la seule voie possible pour sauver notre modèle social, n'en déplaise aux agitateurs professionnels."
-)
-
-# ───────────────── LLM : ANALYSE (VERSION BOOSTÉE / ÉDUCATIVE + SYSTÉMIQUE) ─────────────────
-def analyze_text_with_llm(text: str) -> Optional[Dict[str, Any]]:
-    """
-    Appelle le modèle OpenAI pour analyser un texte et renvoie un JSON
-    conforme au schéma attendu par tout le reste de l'app. Si le texte
-    est vide, retourne None.
-    """
-    if not text.strip():
-        return None
-    system_prompt = """
-Tu es SUBTEXT-ENGINE, moteur d'analyse de communication, de rhétorique, de manipulation et de dynamique systémique, en français.
-
-🎯 OBJECTIF GÉNÉRAL
-Aider un utilisateur non spécialiste à :
-1) Comprendre l'effet psychologique du texte (micro : individu).
-2) Comprendre la logique de pouvoir et les intérêts en jeu (méso / macro).
-3) Voir comment ce texte s'inscrit dans des récits plus larges (idéologie, politique, culture, management...).
-4) Savoir si sa réaction est compréhensible.
-5) Décider comment réagir (ou ne pas réagir).
-6) Apprendre à repérer les techniques de rhétorique/manipulation dans d'autres textes.
-7) Comprendre, de manière simple, comment ce message s'insère dans une chaîne de valeur plus large (qui gagne quoi, qui perd quoi, qui est invisibilisé).
-
-⚠️ STYLE
-- Langage simple, concret, sans jargon universitaire.
-- Tu expliques comme à un·e ami·e curieux·se, pas comme un prof sec.
-- Tu peux utiliser des métaphores très simples ("comme si...", "on dirait que...").
-- Tu restes sobre, nuancé, pédagogique. Pas de catastrophisme.
-- Tu expliques, tu ne juges pas l'utilisateur.
-
-──────────────── SCHEMA JSON ATTENDU ────────────────
-
-TU DOIS RENVOYER STRICTEMENT UN OBJET json AVEC CE SCHÉMA :
-
-{
-  "content_type": "interaction" | "article" | "discours" | "forum" | "réseau_social" | "autre",
-
-  "global_score": 0-100,
-  "global_label": "Toxique" | "Tendu" | "Ambigu" | "Neutre" | "Positif",
-
-  "main_effect": "1 phrase très concrète (max 22 mots) expliquant ce que ce texte fait ressentir à un lecteur moyen",
-  "secondary_effects": [
-    "autre effet possible (ex: culpabilité, honte, colère, confusion, mobilisation, résignation)",
-    "..."
-  ],
-
-  "tags": [
-    "passif-agressif",
-    "culpabilisation",
-    "intimidation",
-    "chantage affectif",
-    "sarcasme",
-    "ton sec",
-    "mobilisation politique",
-    "bouc émissaire",
-    "propagande",
-    "idéologie de mérite individuel",
-    "management autoritaire",
-    "neutre",
-    "bienveillant"
-  ],
-
-  "hostility": { "score": 0-100, "label": "très faible"|"faible"|"moyenne"|"élevée"|"très élevée" },
-  "manipulation": { "score": 0-100, "label": "très faible"|"faible"|"moyenne"|"élevée"|"très élevée" },
-  "pressure": { "score": 0-100, "label": "très faible"|"faible"|"moyenne"|"élevée"|"très élevée" },
-
-  "profile": {
-    "relation_type": "ex: manager → employé, partenaire amoureux, inconnu sur réseau social, élu → citoyens, média → grand public",
-    "channel": "mail / sms / réunion / tweet / article / discours / forum / autre",
-    "power_asymmetry": "faible / moyenne / forte, avec 1 phrase d'explication courte",
-    "target_audience": "public visé principal, en quelques mots"
-  },
-
-  "systemic_view": {
-    "scale": "micro"|"méso"|"macro"|"micro→macro",
-
-    "power_dynamics": "UN PARAGRAPHE DÉTAILLÉ (6–9 phrases) en langage simple : qui a la main, qui subit, quels intérêts sont en jeu, comment le message installe ou renforce ce rapport de force. Tu ajoutes 1–2 phrases très pédagogiques du type « Comment repérer ça ailleurs ? » avec une astuce simple pour l'utilisateur.",
-
-    "narrative_frame": "UN PARAGRAPHE DÉTAILLÉ (5–8 phrases) expliquant : quel récit général le texte raconte (mérite, peur, crise, responsabilité individuelle vs collective, etc.), quels mots/expressions renforcent ce récit, et 1–2 petites métaphores ou images concrètes (ex : « on te présente ça comme un match entre… »).",
-
-    "macro_implications": [
-      "3 à 5 puces. Chaque puce = 2–3 phrases qui relient ce message à un contexte plus large (travail, politique, réseaux sociaux, climat social…). Tu restes général : tu ne cites pas d'événement précis si tu n'es pas certain, mais tu montres comment ce type de discours peut, à long terme, abîmer ou renforcer la confiance, la discussion ou la coopération.",
-      "Tu peux t'appuyer sur des parallèles historiques ou des logiques économiques/culturelles connues, mais sans donner de dates exactes si tu n'es pas sûr."
-    ]
-  },
-
-  "highlights": [
-    {
-      "quote": "extrait exact du texte original",
-
-      "tag": "étiquette courte (ex: intimidation, mépris, chantage affectif, bouc émissaire, appel à la peur)",
-
-      "technique_name": "nom de la technique de rhétorique ou de manipulation, en français simple (ex : appel à la peur, homme de paille, culpabilisation, inversion de culpabilité, généralisation abusive)",
-
-      "simple_definition": "définition ULTRA simple de cette technique (2–3 phrases max), comme si tu l'expliquais à quelqu'un qui découvre le sujet.",
-
-      "everyday_example": "exemple très concret dans la vie quotidienne (travail, famille, réseaux sociaux) qui utilise la même technique, pour que la personne puisse la reconnaître ailleurs.",
-
-      "explanation": "UN PARAGRAPHE PÉDAGOGIQUE (4–7 phrases) qui combine : 1) ce que la phrase fait psychologiquement, 2) pourquoi c'est efficace comme stratégie de pouvoir ou de manipulation, 3) comment on pourrait reformuler ça de façon plus saine/équilibrée."
-    }
-  ],
-
-  "fact_checks": [
-    {
-      "claim": "affirmation factuelle précise du texte",
-      "verdict": "vrai" | "faux" | "partiellement vrai" | "incertain",
-      "explanation": "explication courte et nuancée du verdict",
-      "sources": [
-        "https://... (source institutionnelle ou média reconnu si tu en as une en mémoire)",
-        "https://..."
-      ]
-    }
-  ],
-
-  "recommended_actions": [
-    {
-      "label": "Ne pas répondre à chaud",
-      "detail": "explication courte adaptée au contexte du texte",
-      "priority": 1
-    }
-  ],
-
-  "plain_translation": "Traduction en langage courant : ce que la personne est en train de faire / dire au niveau relationnel, en 2–4 phrases simples. Tu peux utiliser des images très concrètes (ex : 'en gros, il/elle est en train de te dire que...').",
-
-  "reaction_validation": "2–5 phrases expliquant si la réaction de la personne qui reçoit le message est compréhensible, logique, ou si le texte est plutôt neutre. Tu normalises les émotions sans juger.",
-
-  "viral_punchline": "Une phrase très courte (max 12 mots), ultra cash et moqueuse, manière khey, qui illustre le message. Elle peut être humiliante pour le comportement décrit, mais sans propos haineux envers un groupe protégé et sans appel à la violence."
-}
-
-──────────────── RÈGLES D'INTERPRÉTATION ────────────────
-
-1) content_type
-- interaction : mails, DM, SMS, messages privés, échanges personnels.
-- article : presse, blog, analyse.
-- discours : meeting politique, prise de parole officielle, allocution.
-- forum : JVC, Reddit, etc.
-- réseau_social : tweet, post Insta, etc. (hors forum).
-- autre : si tu hésites.
-
-2) Scores :
-- 0–20  : très faible / neutre
-- 21–40 : faible / légèrement tendu
-- 41–60 : moyen / ambigu / potentiellement problématique
-- 61–80 : élevé / clairement problématique
-- 81–100: très élevé / fortement toxique ou manipulateur
-
-3) Fact-check :
-- Tu utilises tes connaissances internes.
-- Tu ne remplis "fact_checks" que si tu as une base raisonnable.
-- Si tu n'es pas sûr : verdict = "incertain" et "sources": [].
-
-4) Systemic view (pédagogique) :
-- Tu expliques pour un public non spécialiste, avec un vocabulaire simple.
-- Tu relies le micro au macro : quels récits, quels rapports de force, quelle vision du monde ?
-- Tu ajoutes des exemples concrets (vie au travail, réseaux sociaux, débats publics).
-- Tu peux faire des analogies simples : « c’est comme si… ».
-- Tu restes sobre, analytique, pas militant.
-
-5) Highlights (pédagogiques) :
-- Tu choisis 2 à 6 extraits vraiment significatifs.
-- Pour chacun : tu NOMMES la technique, tu la DÉFINIS simplement, tu donnes un EXEMPLE de la vie courante.
-- Le but est que la personne se dise : « OK, maintenant je sais repérer ça ailleurs. »
-
-Format de sortie :
-- UNIQUEMENT un objet json valide conforme au schéma.
-- PAS de texte avant/après, pas de markdown.
-"""
-    user_prompt = f"Texte à analyser (en français) :\n\n{text}"
-    try:
-        completion = client.chat.completions.create(
-            model=OPENAI_MAIN_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.2,
-        )
-        content = completion.choices[0].message.content
-        data = json.loads(content)
-        return data
-    except Exception as e:
-        st.error(f"Erreur lors de l'appel à l'IA (analyse) : {e}")
-        return None
-
-# ───────────────── LLM : RÉPONSES (MODE CALME vs ROAST) ─────────────────
+# ───────────────── LLM : RÉPONSES (voir subtext/engine.py) ─────────────────
 def generate_replies_with_llm(
     original_text: str,
     analysis: Dict[str, Any],
@@ -462,149 +298,20 @@ def generate_replies_with_llm(
     emoji_allowed: bool,
     persona_mode: str,
 ) -> Dict[str, str]:
-    """
-    Génère deux réponses (calme et assertive) à partir du texte original et
-    de l'analyse. Le style de réponse dépend à la fois des
-    préférences de l'utilisateur et du mode sélectionné (Calme vs Roast).
-
-    - En mode « Roast », la réponse utilise toujours un système prompt de type
-      "Khey" et force un style sarcastique / moqueur inspiré de forums 18-25.
-    - En mode « Calme », le comportement reste similaire à l'application
-      originale : le système choisit entre un prompt empathique ou sarcastique
-      selon le ton demandé par l'utilisateur.
-
-    L'argument `emoji_allowed` est conservé mais n'est pas utilisé pour
-    l'instant.
-    """
-    if not analysis or not original_text:
-        return {"calm": "", "assertive": ""}
-
-    use_sarcastic = False
-    if persona_mode.lower() == "roast":
-        use_sarcastic = True
-    else:
-        lower_tone = tone_pref.lower() if tone_pref else ""
-        if "sarcastique" in lower_tone or "moqueur" in lower_tone:
-            use_sarcastic = True
-
-    if use_sarcastic:
-        system_prompt = """
-Tu es un "Khey" légendaire d'un forum 18-25 anonyme.
-Important (technique) : tu dois renvoyer un unique objet json valide. Le mot « json » est volontairement en minuscules.
-
-Rôle :
-- Tu écris AU NOM DE LA PERSONNE QUI REÇOIT le message.
-- Tu balances des réponses courtes, humiliantes, ironiques et très cash.
-- Objectif : ridiculiser le comportement ou le discours de l'auteur du message par le sarcasme, la honte sociale et le mépris, façon meme internet.
-
-Contraintes :
-- Pas de propos haineux visant un groupe protégé.
-- Pas d'appel à la violence ni de menaces explicites.
-- Tu peux avoir de l'humour noir mais sans franchir les lignes rouges ci-dessus.
-- Vocabulaire possible : "malaise", "ratio", "cheh", "golem", "brisé", "touriste", "NPC", "clown", etc.
-- Style : agressif, moqueur, khey, mais légal.
-
-Format JSON STRICT :
-{
-  "calm": "réponse courte, style khey mais un peu 'soft'",
-  "assertive": "réponse courte, style khey très cash"
-}
-"""
-    else:
-        system_prompt = """
-Tu es SUBTEXT-REPLY, spécialisé dans les réponses calmes et assertives.
-Important (technique) : tu dois renvoyer un unique objet json valide. Le mot « json » est volontairement en minuscules.
-
-Point de vue :
-- Tu écris AU NOM DE LA PERSONNE QUI REÇOIT le message.
-Mission :
-- À partir du TEXTE ORIGINAL + d'un RÉSUMÉ D'ANALYSE fourni,
-- Générer 2 réponses possibles :
- 1) "calm" : posée, factuelle, sans attaque.
- 2) "assertive" : posée mais ferme, pose des limites claires, sans insulte ni mépris.
-
-Contraintes :
-- 1–4 phrases max par réponse (environ 300 caractères). Sauf si le texte analysé est plus long, alors s'adapter à sa longueur.
-- Tu n'expliques pas ta réponse, tu ne renvoies que le JSON ci-dessous.
-
-Format JSON STRICT :
-{
-  "calm": "réponse courte, posée",
-  "assertive": "réponse courte, posée mais ferme"
-}
-"""
-
-    summary_for_reply = {
-        "global_score": analysis.get("global_score"),
-        "global_label": analysis.get("global_label"),
-        "main_effect": analysis.get("main_effect"),
-        "tags": analysis.get("tags", []),
-        "hostility": analysis.get("hostility", {}),
-        "manipulation": analysis.get("manipulation", {}),
-        "pressure": analysis.get("pressure", {}),
-        "profile": analysis.get("profile", {}),
-        "plain_translation": analysis.get("plain_translation", ""),
-    }
-
-    user_prompt = f"""
-Texte original reçu :
-{original_text}
-
-Résumé d'analyse (ne PAS renvoyer) :
-{json.dumps(summary_for_reply, ensure_ascii=False)}
-
-Préférences utilisateur :
-- Ton souhaité : {tone_pref}
-- Emojis autorisés : {'oui' if emoji_allowed else 'non'}
-
-Génère UNIQUEMENT un objet json avec deux champs : "calm" et "assertive".
-"""
+    """Version UI de `engine.generate_replies` : les erreurs sont affichées."""
     try:
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {
-                "role": "system",
-                "content": (
-                    f"RÈGLE PRIORITAIRE : le ton demandé par l'utilisateur est « {tone_pref} ». "
-                    "Respecte ce ton dans la forme, le vocabulaire et le niveau de directivité."
-                ),
-            },
-            {"role": "user", "content": user_prompt},
-        ]
-        completion = client.chat.completions.create(
-            model=OPENAI_MAIN_MODEL,
-            messages=messages,
-            response_format={"type": "json_object"},
-            temperature=0.5 if not use_sarcastic else 0.95,
+        return generate_replies(
+            original_text=original_text,
+            analysis=analysis,
+            tone_pref=tone_pref,
+            emoji_allowed=emoji_allowed,
+            persona_mode=persona_mode,
         )
-        content = completion.choices[0].message.content
-        data = json.loads(content)
-        return {
-            "calm": (data.get("calm") or "").strip(),
-            "assertive": (data.get("assertive") or "").strip(),
-        }
     except Exception as e:
         st.error(f"Erreur lors de la génération de réponse : {e}")
         return {"calm": "", "assertive": ""}
 
 # ───────────────── HELPERS UI ─────────────────
-def render_tag(text: str, level: str = "info") -> str:
-    level_class = level if level in {"danger", "warn", "info", "safe"} else "info"
-    return f"<span class='tag-pill {level_class}'>{text}</span>"
-
-def get_score_color(score: int) -> str:
-    try:
-        s = int(score)
-    except Exception:
-        return "#f1f5f9"
-    if s >= 75:
-        return "#f87171"
-    if s >= 50:
-        return "#fbbf24"
-    if s >= 25:
-        return "#34d399"
-    return "#6ee7b7"
-
 def reset_app() -> None:
     keys_to_clear = [
         "input_text",
@@ -613,10 +320,234 @@ def reset_app() -> None:
         "tone_pref",
         "emoji_allowed",
         "scroll_to_results",
+        "input_url",
+        "url_error",
+        "url_info",
+        "thread_results",
+        "analyzed_text",
+        "scan_job",
+        "attached_job",
+        "scan_error",
+        "open_history",
     ]
     for k in keys_to_clear:
         if k in st.session_state:
             del st.session_state[k]
+    if "job" in st.query_params:
+        del st.query_params["job"]
+
+def load_url() -> None:
+    """Callback du bouton « Récupérer » : remplace le texte par le contenu principal de la page."""
+    url = st.session_state.get("input_url", "").strip()
+    st.session_state["url_error"] = None
+    st.session_state["url_info"] = None
+    if not url:
+        st.session_state["url_error"] = "Colle d'abord l'adresse d'un article ou d'un fil."
+        return
+    try:
+        article = ingest_url(url)
+    except FetchError as e:
+        st.session_state["url_error"] = str(e)
+        return
+    st.session_state["input_text"] = article.text
+    st.session_state["analysis"] = None
+    st.session_state["replies"] = {"calm": "", "assertive": ""}
+    source = f"« {article.title} »" if article.title else article.url
+    st.session_state["url_info"] = (
+        f"{source} : {len(article.text)} caractères gardés sur {article.bytes // 1024 or 1} Ko de page"
+        + (" (déjà en cache)" if article.from_cache else "")
+        + ". Relis le texte puis lance le scan."
+    )
+
+# Intervalle de rafraîchissement de la progression d'un scan en cours.
+SCAN_POLL_S = 0.5
+
+def current_scan_job() -> Optional[ScanJob]:
+    """Scan de la session, retrouvé au besoin par l'URL après un rafraîchissement."""
+    job_id = st.session_state.get("scan_job") or st.query_params.get("job")
+    job = scan_jobs.get(job_id)
+    if job is None:
+        # Tâche expirée ou serveur redémarré : on oublie l'identifiant.
+        st.session_state.pop("scan_job", None)
+        if job_id and st.query_params.get("job") == job_id:
+            del st.query_params["job"]
+        return None
+    st.session_state["scan_job"] = job.id
+    return job
+
+def start_full_scan(persona_mode: str) -> None:
+    """
+    Relance le texte en analyse IA complète (modèle principal forcé : ni
+    pré-filtre, ni quasi-doublon, ni réanalyse partielle), en tâche de fond
+    comme un scan ordinaire.
+    """
+    job_id = scan_jobs.submit(
+        st.session_state.get("input_text", ""),
+        persona_mode=persona_mode,
+        tone_pref=st.session_state.get("tone_pref", "calme"),
+        profile=profile_for_persona(persona_mode).name,
+        model=OPENAI_MAIN_MODEL,
+    )
+    st.session_state["scan_job"] = job_id
+    st.query_params["job"] = job_id
+
+def attach_scan_job(job: ScanJob) -> None:
+    """Reporte une seule fois dans la session le résultat d'un scan terminé."""
+    if st.session_state.get("attached_job") == job.id:
+        return
+    st.session_state["attached_job"] = job.id
+    if job.status == FAILED:
+        st.session_state["scan_error"] = f"Erreur lors de l'appel à l'IA (analyse) : {job.error}"
+        return
+    if not st.session_state.get("input_text"):
+        st.session_state["input_text"] = job.text
+    st.session_state["analysis"] = job.analysis
+    st.session_state["analyzed_text"] = job.text
+    st.session_state["replies"] = job.replies
+    if job.reply_error:
+        st.session_state["scan_error"] = f"Erreur lors de la génération de réponse : {job.reply_error}"
+    if job.analysis:
+        st.session_state["tone_pref"] = job.tone_pref
+        st.session_state["emoji_allowed"] = True
+        st.session_state["scroll_to_results"] = True
+        st.toast("Analyse terminée ✅", icon="✅")
+
+def watch_scan_job(job_id: str, persona_mode: str) -> None:
+    """
+    Fragment relancé périodiquement pendant un scan : jauges du pré-score
+    local, remplacées champ par champ par celles du modèle. Relance la page
+    une fois le scan terminé.
+    """
+    job = scan_jobs.get(job_id)
+    if job is None or job.done:
+        st.rerun()
+    fields = {**prescore(job.text).as_fields(), **job.fields}
+    estimated = not all(axis in job.fields for axis in ("hostility", "manipulation", "pressure"))
+    st.markdown(render_live_preview(fields, persona_mode, estimated=estimated), unsafe_allow_html=True)
+    st.caption("⏳ Analyse du message en cours… (ça peut prendre quelques secondes, je ne suis pas planté 😌) Le scan continue même si tu rafraîchis la page.")
+
+# Libellés des sections différées (voir subtext/deferred.py).
+DEFERRED_SECTION_LABELS = {
+    "reaction_validation": "ta réaction",
+    "highlight_details": "explications des passages",
+    "systemic_view": "décryptage",
+    "fact_checks": "fact-check",
+}
+
+def sync_deferred_sections(
+    analysis: Dict[str, Any], persona_mode: str
+) -> Tuple[Dict[str, Any], List[str], Dict[str, str]]:
+    """
+    Fusionne dans l'analyse de la session les sections différées terminées
+    et lance en arrière-plan celles que l'affichage réclame encore.
+    Renvoie (analyse, sections en cours, sections en échec).
+    """
+    sections = missing_sections(analysis, persona_mode)
+    if not sections:
+        return analysis, [], {}
+    text = st.session_state.get("analyzed_text") or st.session_state.get("input_text", "")
+    deferred_sections.request(text, analysis, sections)
+    ready, pending, errors = deferred_sections.collect(text, analysis, sections)
+    for section, fields in ready.items():
+        analysis = merge_section(analysis, section, fields)
+    if ready:
+        st.session_state["analysis"] = analysis
+        scan_history.update_analysis(text, analysis)
+    return analysis, pending, errors
+
+def watch_deferred_sections(pending: List[str]) -> None:
+    """Fragment relancé périodiquement tant que des sections sont en cours."""
+    analysis = st.session_state.get("analysis")
+    if not analysis:
+        return
+    _, still_pending, _ = sync_deferred_sections(analysis, st.session_state.get("persona_mode", "Calme"))
+    if set(still_pending) != set(pending):
+        st.rerun()
+    labels = ", ".join(DEFERRED_SECTION_LABELS.get(s, s) for s in pending)
+    st.caption(f"⏳ En cours de rédaction : {labels}…")
+
+# ───────────────── HISTORIQUE (voir subtext/history.py) ─────────────────
+def open_history_entry(entry_id: int) -> None:
+    """Demande l'ouverture d'un scan de l'historique ; appliquée au rerun, avant les widgets."""
+    st.session_state["open_history"] = entry_id
+
+def load_history_entry(entry_id: int) -> None:
+    """Remplace le texte et les résultats de la session par ceux d'un scan enregistré."""
+    entry = scan_history.get(entry_id)
+    if entry is None:
+        st.session_state["scan_error"] = "Ce scan n'est plus dans l'historique."
+        return
+    st.session_state["input_text"] = entry["text"]
+    st.session_state["analysis"] = entry["analysis"]
+    st.session_state["analyzed_text"] = entry["text"]
+    st.session_state["replies"] = entry["replies"]
+    st.session_state["thread_results"] = None
+    st.session_state["scroll_to_results"] = True
+    # Le scan ouvert remplace celui de l'URL.
+    st.session_state.pop("scan_job", None)
+    if "job" in st.query_params:
+        del st.query_params["job"]
+
+def set_history_page(page: int) -> None:
+    st.session_state["history_page"] = page
+
+def format_history_date(timestamp: float) -> str:
+    return time.strftime("%d/%m/%Y %H:%M", time.localtime(timestamp))
+
+def render_history_panel() -> None:
+    """Fragment : recherche et pagination de l'historique sans relancer la page."""
+    query = st.text_input(
+        label="Rechercher",
+        key="history_query",
+        placeholder="Un mot du texte, un tag, un effet…",
+        label_visibility="collapsed",
+    )
+    if query != st.session_state.get("history_last_query", ""):
+        st.session_state["history_last_query"] = query
+        st.session_state["history_page"] = 0
+    page = st.session_state.get("history_page", 0)
+    entries, total = scan_history.page(page, query)
+    if not entries and page > 0:
+        # Dernière page vidée par une suppression : on revient à la précédente.
+        page = st.session_state["history_page"] = max(0, -(-total // HISTORY_PAGE_SIZE) - 1)
+        entries, total = scan_history.page(page, query)
+    if not total:
+        st.caption("Aucun scan ne correspond." if query.strip() else "Aucun scan enregistré pour l'instant.")
+        return
+    for entry in entries:
+        repeat = f" · scanné {entry.scan_count}×" if entry.scan_count > 1 else ""
+        st.markdown(
+            f"**{entry.global_score}% · {entry.global_label}** — {format_history_date(entry.updated_at)}{repeat}"
+        )
+        st.caption(entry.snippet or entry.preview)
+        col_open, col_delete = st.columns([3, 1], gap="small")
+        with col_open:
+            if st.button("Ouvrir", key=f"history_open_{entry.id}", use_container_width=True):
+                open_history_entry(entry.id)
+                st.rerun()
+        with col_delete:
+            st.button(
+                "🗑️",
+                key=f"history_delete_{entry.id}",
+                help="Supprimer de l'historique",
+                use_container_width=True,
+                on_click=scan_history.delete,
+                args=(entry.id,),
+            )
+    pages = -(-total // HISTORY_PAGE_SIZE)
+    col_prev, col_page, col_next = st.columns([1, 2, 1], gap="small")
+    with col_prev:
+        st.button(
+            "◀", key="history_prev", disabled=page == 0, use_container_width=True,
+            on_click=set_history_page, args=(page - 1,),
+        )
+    with col_page:
+        st.caption(f"Page {page + 1}/{pages} · {total} scan(s)")
+    with col_next:
+        st.button(
+            "▶", key="history_next", disabled=page + 1 >= pages, use_container_width=True,
+            on_click=set_history_page, args=(page + 1,),
+        )
 
 def render_reply_block(title: str, text: str) -> None:
     """Bloc de réponse + bouton copier."""
@@ -637,20 +568,115 @@ def render_reply_block(title: str, text: str) -> None:
         unsafe_allow_html=True,
     )
 
-def render_metric_card(label: str, score: int, sublabel: str) -> str:
-    color = get_score_color(score)
-    width = max(0, min(100, score))
+def render_live_preview(fields: Dict[str, Any], persona_mode: str, estimated: bool = False) -> str:
+    """
+    Carte provisoire affichée pendant le streaming de l'analyse : score,
+    label et effet principal d'abord, puis les jauges dès qu'elles arrivent.
+    `estimated` signale que les jauges viennent encore du pré-score local.
+    """
+    title = "Vue d'ensemble" if persona_mode == "Calme" else "Scan du malaise"
+    status = "estimation locale, analyse IA en cours…" if estimated else "analyse en cours…"
+    parts = [
+        "<div class='hero-card'>",
+        f"<div class='small-label'>{title} — {status}</div>",
+    ]
+    if "global_score" in fields:
+        score = int(fields.get("global_score") or 0)
+        color = get_score_color(score)
+        label = html_lib.escape(str(fields.get("global_label") or "…"))
+        parts.append(
+            f"<div style='font-size:2.3rem;font-weight:800;color:{color};margin-top:0.3rem;'>{score}%</div>"
+            f"<div style='font-size:0.95rem;color:#e2e8f0;font-weight:500;'>{label}</div>"
+        )
+    main_effect = str(fields.get("main_effect") or "").strip()
+    if main_effect:
+        parts.append(
+            f"<div style='margin-top:0.45rem;font-size:0.9rem;color:#cbd5e1;'>{html_lib.escape(main_effect)}</div>"
+        )
+    cards = []
+    for key, label in (
+        ("hostility", "Hostilité"),
+        ("manipulation", "Manipulation / pression"),
+        ("pressure", "Pression sociale"),
+    ):
+        axis = fields.get(key)
+        if isinstance(axis, dict):
+            cards.append(render_metric_card(label, int(axis.get("score", 0) or 0), axis.get("label", "—")))
+    if cards:
+        parts.append(f"<div class='metric-grid'>{''.join(cards)}</div>")
+    parts.append(
+        "<div class='metric-sub' style='margin-top:0.6rem;'>⏳ Décryptage, passages repérés et fact-check en cours…</div>"
+    )
+    parts.append("</div>")
+    return "".join(parts)
+
+# Synthèse du fil recalculée tous les N messages reçus pendant le scan.
+THREAD_ROLLUP_EVERY = 10
+
+def render_post_line(result: PostResult) -> str:
+    """Ligne compacte d'un message du fil : auteur, score, tags, extrait."""
+    post = result.post
+    author = html_lib.escape(post.author)
+    when = f" · {html_lib.escape(post.timestamp)}" if post.timestamp else ""
+    excerpt = html_lib.escape(post.body[:160] + ("…" if len(post.body) > 160 else ""))
+    if result.analysis is None:
+        verdict = "<span style='color:#f87171;'>erreur</span>"
+        tags = ""
+    else:
+        color = get_score_color(result.score)
+        verdict = f"<span style='color:{color};font-weight:700;'>{result.score}%</span>"
+        tags = " ".join(render_tag(html_lib.escape(t), tag_level(t)) for t in (result.analysis.get("tags") or [])[:3])
     return (
-        f"<div class='metric-card'>"
-        f"<div class='metric-label'>{label}</div>"
-        f"<div class='metric-value' style='color:{color};'>{score}%</div>"
-        f"<div class='metric-sub'>{sublabel}</div>"
-        f"<div class='metric-bar-bg'>"
-        f"<div class='metric-bar-fill' style='width:{width}%;background:{color};'></div>"
-        f"</div>"
-        f"</div>"
+        "<div style='padding:0.35rem 0;border-bottom:1px solid #1e293b;font-size:0.88rem;'>"
+        f"<div><b>#{post.index + 1} {author}</b><span style='color:#94a3b8;'>{when}</span> — {verdict} {tags}</div>"
+        f"<div style='color:#cbd5e1;'>{excerpt}</div>"
+        "</div>"
     )
 
+def render_thread_rollup(summary: Dict[str, Any], persona_mode: str, running: bool = False) -> str:
+    """Carte de synthèse du fil : scores, distribution, messages hostiles, récidivistes."""
+    title = "Vue d'ensemble du fil" if persona_mode == "Calme" else "Scan du fil"
+    status = " — analyse en cours…" if running else ""
+    parts = [
+        "<div class='hero-card'>",
+        f"<div class='small-label'>{title}{status}</div>",
+        f"<div class='metric-sub'>{summary['analyzed']} messages analysés sur {summary['posts']} reçus, "
+        f"{summary['authors']} auteurs"
+        + (f", {summary['failed']} en erreur" if summary["failed"] else "")
+        + "</div>",
+        "<div class='metric-grid'>",
+        render_metric_card("Score moyen", summary["mean_score"], f"médiane {summary['median_score']}%"),
+        render_metric_card("Pic", summary["max_score"], "message le plus chargé"),
+        "</div>",
+    ]
+    levels = " ".join(
+        render_tag(f"{level} : {count}", "danger" if level in ("élevée", "très élevée") else "info")
+        for level, count in summary["distribution"].items()
+        if count
+    )
+    if levels:
+        parts.append(f"<div style='margin-top:0.5rem;'>{levels}</div>")
+    if summary["most_hostile"]:
+        parts.append("<div class='small-label' style='margin-top:0.7rem;'>Messages les plus hostiles</div>")
+        for item in summary["most_hostile"]:
+            parts.append(
+                f"<div style='font-size:0.88rem;margin-top:0.25rem;'><b>#{item['index'] + 1} {html_lib.escape(item['author'])}</b> "
+                f"<span style='color:{get_score_color(item['hostility'])};'>hostilité {item['hostility']}%</span>"
+                f"<div style='color:#cbd5e1;'>{html_lib.escape(item['excerpt'])}</div></div>"
+            )
+    if summary["recurring_by_author"]:
+        parts.append("<div class='small-label' style='margin-top:0.7rem;'>Techniques récurrentes par auteur</div>")
+        for item in summary["recurring_by_author"]:
+            techniques = " ".join(
+                render_tag(f"{html_lib.escape(name)} ×{count}", tag_level(name)) for name, count in item["techniques"]
+            )
+            parts.append(
+                f"<div style='font-size:0.88rem;margin-top:0.25rem;'><b>{html_lib.escape(item['author'])}</b> "
+                f"<span style='color:#94a3b8;'>({item['posts']} messages)</span> {techniques}</div>"
+            )
+    parts.append("</div>")
+    return "".join(parts)
+
 # ───────────────── INITIALISATION SESSION ─────────────────
 if "analysis" not in st.session_state:
     st.session_state["analysis"] = None
@@ -662,12 +688,88 @@ if "emoji_allowed" not in st.session_state:
     st.session_state["emoji_allowed"] = True
 if "input_text" not in st.session_state:
     st.session_state["input_text"] = ""
-if "is_scanning" not in st.session_state:
-    st.session_state["is_scanning"] = False
 if "scroll_to_results" not in st.session_state:
     st.session_state["scroll_to_results"] = False
 if "persona_mode" not in st.session_state:
     st.session_state["persona_mode"] = "Calme"
+if "thread_results" not in st.session_state:
+    st.session_state["thread_results"] = None
+
+# Scan en arrière-plan de la session (retrouvé par l'URL après un
+# rafraîchissement) : son résultat est reporté avant le rendu des widgets.
+scan_job = current_scan_job()
+if scan_job is not None and scan_job.done:
+    attach_scan_job(scan_job)
+
+# Scan rouvert depuis l'historique : chargé avant le rendu de la zone de texte.
+if st.session_state.get("open_history") is not None:
+    load_history_entry(st.session_state.pop("open_history"))
+    scan_job = current_scan_job()
+
+# ───────────────── SIDEBAR : CONSOMMATION ─────────────────
+with st.sidebar:
+    if scan_history.enabled:
+        with st.expander("📚 Historique des scans", expanded=False):
+            st.fragment(render_history_panel)()
+
+    with st.expander("📈 Tokens & cache de prompts", expanded=False):
+        usage_stats = usage_ledger.stats()
+        if not usage_stats:
+            st.caption("Aucun appel IA depuis le démarrage du serveur.")
+        for call_type, totals in usage_stats.items():
+            st.markdown(
+                f"**{call_type}** — {totals['calls']} appel(s) · "
+                f"entrée {totals['prompt_tokens']} tokens dont {totals['cached_tokens']} en cache "
+                f"({totals['cached_ratio']:.0%}) · sortie {totals['completion_tokens']}"
+            )
+        st.caption("Compteurs du processus serveur, toutes sessions confondues.")
+
+    with st.expander("⏱️ Latence & coût des appels IA", expanded=False):
+        call_stats = telemetry.summary()
+        if not call_stats:
+            st.caption("Aucun appel IA depuis le démarrage du serveur.")
+        for call_type, stats in call_stats.items():
+            wall = stats["wall_s"]
+            line = (
+                f"**{call_type}** — {stats['calls']} appel(s), {stats['errors']} échec(s) · "
+                f"p50 {wall['p50'] or 0:.2f}s · p95 {wall['p95'] or 0:.2f}s · p99 {wall['p99'] or 0:.2f}s"
+            )
+            if stats["ttft_s"]["p50"] is not None:
+                line += f" · 1er token p50 {stats['ttft_s']['p50']:.2f}s"
+            st.markdown(line + f" · ≈ {stats['cost_usd']:.4f} $")
+        breaker_stats = breaker.stats()
+        st.caption(
+            f"Disjoncteur : {breaker_stats['state']} · {breaker_stats['trips']} ouverture(s) · "
+            f"{breaker_stats['rejected']} appel(s) refusé(s)"
+        )
+        flight_stats = inflight.stats()
+        st.caption(
+            f"Appels mutualisés : {flight_stats['coalesced']} · en vol : {flight_stats['in_flight']} "
+            f"({flight_stats['waiting']} session(s) en attente)"
+        )
+        routing_stats = routing_log.stats()
+        st.caption(
+            f"Routage : {routing_stats['decisions']} décision(s) · {routing_stats['escalated']} escaladée(s) "
+            f"({routing_stats['escalation_rate']:.0%}) · temps gagné estimé {routing_stats['total_saving_s']:+.1f}s"
+        )
+        neardup_stats = near_duplicates.stats()
+        st.caption(
+            f"Quasi-doublons : {neardup_stats['identical']} analyse(s) reprise(s) · "
+            f"{neardup_stats['similar']} servi(s) de base à une réanalyse partielle, sur {neardup_stats['lookups']} recherche(s) · "
+            f"{neardup_stats['entries']} texte(s) indexé(s)"
+        )
+        job_stats = scan_jobs.stats()
+        st.caption(
+            f"Scans en tâche de fond : {job_stats['running']} en cours · {job_stats['queued']} en file · "
+            f"{job_stats['done']} terminé(s) · {job_stats['failed']} en échec"
+        )
+        for schema_name, counts in schema_stats.stats().items():
+            st.caption(
+                f"JSON {schema_name} : {counts['clean']}/{counts['responses']} conformes · "
+                f"{counts['repaired_json']} réparé(s) · {counts['refetched']} complété(s) · "
+                f"{counts['coerced']} converti(s)"
+            )
+        st.caption("`python -m subtext.telemetry summary` pour l'historique complet.")
 
 # ───────────────── EN-TÊTE + TOGGLE DE MODE ─────────────────
 with st.container():
@@ -763,6 +865,29 @@ with st.container():
                 st.session_state["analysis"] = None
                 st.session_state["replies"] = {"calm": "", "assertive": ""}
 
+    input_mode = st.radio(
+        label="Source",
+        options=["📝 Texte", "🔗 Lien"],
+        key="input_mode",
+        horizontal=True,
+        label_visibility="collapsed",
+    )
+    if input_mode == "🔗 Lien":
+        col_url, col_fetch = st.columns([3, 1], gap="small")
+        with col_url:
+            st.text_input(
+                label="Adresse",
+                key="input_url",
+                placeholder="https://… (article, fil de forum, post de blog)",
+                label_visibility="collapsed",
+            )
+        with col_fetch:
+            st.button("📥 Récupérer", use_container_width=True, on_click=load_url)
+        if st.session_state.get("url_error"):
+            st.error(st.session_state["url_error"])
+        elif st.session_state.get("url_info"):
+            st.caption(f"✅ {st.session_state['url_info']}")
+
     if persona_mode == "Calme":
         st.markdown("**Ou colle ton texte ici :**")
     else:
@@ -777,10 +902,31 @@ with st.container():
             else "Colle le pavé toxique ou le message éclaté ici…"
         ),
     )
-    if persona_mode == "Calme":
+    if scan_history.enabled:
+        st.caption("ℹ️ Historique local activé : tes scans sont gardés sur ce serveur (📚 dans le menu latéral pour les revoir ou les supprimer).")
+    elif persona_mode == "Calme":
         st.caption("ℹ️ Tes messages ne sont ni stockés ni partagés. Ils servent uniquement le temps de l'analyse.")
     else:
         st.caption("ℹ️ Scan local pour mesurer le malaise. Rien n’est gardé après la session.")
+    current_text = st.session_state.get("input_text", "")
+    if scan_history.enabled and current_text != st.session_state.get("analyzed_text"):
+        known_scan = scan_history.find(current_text)
+        if known_scan is not None:
+            col_known, col_reopen = st.columns([3, 1], gap="small")
+            with col_known:
+                st.caption(
+                    f"📚 Déjà analysé le {format_history_date(known_scan.updated_at)} "
+                    f"({known_scan.global_score}% · {known_scan.global_label})."
+                )
+            with col_reopen:
+                st.button("Revoir", use_container_width=True, on_click=open_history_entry, args=(known_scan.id,))
+    st.checkbox(
+        "🧵 Fil de discussion : analyser message par message",
+        key="thread_mode",
+        help="Découpe le texte en messages (auteur, date) et les analyse en parallèle, avec une synthèse du fil.",
+    )
+    if not is_configured():
+        st.warning("⚠️ Aucune clé OPENAI_API_KEY configurée : l'analyse IA restera indisponible tant qu'elle n'est pas définie.")
 
     col_scan, col_reset = st.columns([3, 1], gap="small")
     with col_scan:
@@ -788,7 +934,7 @@ with st.container():
         scan_clicked = st.button(
             scan_label,
             use_container_width=True,
-            disabled=st.session_state.get("is_scanning", False),
+            disabled=scan_job is not None and not scan_job.done,
         )
     with col_reset:
         st.button("🧹 Réinitialiser", use_container_width=True, on_click=reset_app)
@@ -800,39 +946,188 @@ with st.container():
                 st.warning("Colle d'abord un texte à analyser.")
             else:
                 st.warning("Faut d’abord coller un message pour le défoncer (gentiment).")
+        elif st.session_state.get("thread_mode"):
+            posts = split_posts(input_text)
+            total = min(len(posts), THREAD_MAX_POSTS)
+            st.session_state["analysis"] = None
+            st.session_state["replies"] = {"calm": "", "assertive": ""}
+            if len(posts) > THREAD_MAX_POSTS:
+                st.caption(f"Fil tronqué aux {THREAD_MAX_POSTS} premiers messages sur {len(posts)}.")
+            # Chaque message s'affiche dès que son analyse arrive ; la synthèse
+            # suit par paliers, pour ne pas la recalculer à chaque message.
+            progress = st.progress(0.0, text=f"0/{total} messages analysés")
+            live_rollup = st.empty()
+            live_posts = st.empty()
+            live_posts_box = live_posts.container()
+            received: List[PostResult] = []
+
+            def _on_post(result: PostResult) -> None:
+                received.append(result)
+                progress.progress(len(received) / total, text=f"{len(received)}/{total} messages analysés")
+                with live_posts_box:
+                    st.markdown(render_post_line(result), unsafe_allow_html=True)
+                if len(received) % THREAD_ROLLUP_EVERY == 0 or len(received) == total:
+                    live_rollup.markdown(
+                        render_thread_rollup(rollup(received), persona_mode, running=len(received) < total),
+                        unsafe_allow_html=True,
+                    )
+
+            st.session_state["thread_results"] = analyze_thread(posts, on_result=_on_post)
+            progress.empty()
+            live_rollup.empty()
+            live_posts.empty()
+            st.toast(f"Fil analysé : {total} messages ✅", icon="✅")
+        elif scan_job is None or scan_job.done:
+            st.session_state["thread_results"] = None
+            default_tone = (
+                "sarcastique / moqueur (déconseillé)" if persona_mode == "Roast" else "calme"
+            )
+            # Le scan tourne hors du script (voir subtext/jobs.py) : ce rerun
+            # rend la main tout de suite, la progression est suivie ci-dessous.
+            job_id = scan_jobs.submit(
+                input_text,
+                persona_mode=persona_mode,
+                tone_pref=default_tone,
+                profile=profile_for_persona(persona_mode).name,
+                previous_text=st.session_state.get("analyzed_text"),
+                previous_analysis=st.session_state.get("analysis"),
+            )
+            st.session_state["scan_job"] = job_id
+            st.query_params["job"] = job_id
+            scan_job = scan_jobs.get(job_id)
+
+    if scan_job is not None and not scan_job.done:
+        st.fragment(watch_scan_job, run_every=SCAN_POLL_S)(scan_job.id, persona_mode)
+    scan_error = st.session_state.pop("scan_error", None)
+    if scan_error:
+        st.error(scan_error)
+
+# ───────────────── FRAGMENTS (RERUNS LOCAUX) ─────────────────
+# Les widgets de ces sections ne relancent que leur fragment, pas tout le
+# script : changer de ton ou générer une réponse ne reconstruit ni les
+# onglets ni la carte de partage, quelle que soit la taille de l'analyse.
+@st.fragment
+def render_reply_section(analysis: Dict[str, Any], persona_mode_current: str) -> None:
+    if persona_mode_current == "Calme":
+        st.markdown("#### Construire ta réponse")
+    else:
+        st.markdown("#### Préparer ton retour de flamme (propre)")
+
+    col_tone, col_emoji = st.columns(2, gap="small")
+    with col_tone:
+        tone_options = [
+            "calme",
+            "professionnel",
+            "empathique",
+            "direct mais respectueux",
+            "sarcastique / moqueur (déconseillé)",
+        ]
+        default_index = 4 if persona_mode_current == "Roast" else 0
+        current_tone = st.session_state.get("tone_pref", tone_options[default_index])
+        if current_tone in tone_options:
+            default_index = tone_options.index(current_tone)
+        st.session_state["tone_pref"] = st.selectbox(
+            "Style de réponse",
+            tone_options,
+            index=default_index,
+            key="tone_select",
+        )
+    with col_emoji:
+        st.session_state["emoji_allowed"] = st.checkbox(
+            "Autoriser les emojis",
+            value=st.session_state.get("emoji_allowed", True),
+            key="emoji_checkbox",
+        )
+
+    tone_pref = st.session_state["tone_pref"]
+    emoji_allowed = st.session_state["emoji_allowed"]
+    original_for_reply = st.session_state.get("input_text", "")
+
+    if persona_mode_current == "Calme":
+        st.caption("SUBTEXT te suggère 2 versions : une calme et une plus ferme.")
+    else:
+        st.caption("Tu obtiens 2 versions : une pique « soft » et une plus brutale.")
+
+    button_label = (
+        "🛡️ Générer / mettre à jour la réponse suggérée"
+        if persona_mode_current == "Calme"
+        else "💬 Générer / mettre à jour ton punchline pack"
+    )
+    if st.button(button_label, use_container_width=True):
+        with st.spinner("Génération de la réponse…"):
+            replies = generate_replies_with_llm(
+                original_text=original_for_reply,
+                analysis=analysis,
+                tone_pref=tone_pref,
+                emoji_allowed=emoji_allowed,
+                persona_mode=persona_mode_current,
+            )
+        st.session_state["replies"] = replies
+        st.toast("Réponse générée ✅", icon="✅")
+
+    replies = st.session_state["replies"]
+    if replies.get("calm") or replies.get("assertive"):
+        if persona_mode_current == "Calme":
+            tabs_reply = st.tabs(["😌 Version calme", "💬 Version assertive"])
+            with tabs_reply[0]:
+                if replies.get("calm"):
+                    render_reply_block("Réponse calme (posée)", replies["calm"])
+                else:
+                    st.caption("Pas de réponse calme dispo.")
+            with tabs_reply[1]:
+                if replies.get("assertive"):
+                    render_reply_block("Réponse assertive (ferme mais propre)", replies["assertive"])
+                else:
+                    st.caption("Pas de réponse assertive dispo.")
+        else:
+            tabs_reply = st.tabs(["🙂 Pique légère", "🔥 Retour de flamme"])
+            with tabs_reply[0]:
+                if replies.get("calm"):
+                    render_reply_block("Réponse soft", replies["calm"])
+                else:
+                    st.caption("Pas de version soft dispo.")
+            with tabs_reply[1]:
+                if replies.get("assertive"):
+                    render_reply_block("Réponse cash", replies["assertive"])
+                else:
+                    st.caption("Pas de version cash dispo.")
+    else:
+        if persona_mode_current == "Calme":
+            st.caption("Aucune réponse générée pour l'instant.")
         else:
-            st.session_state["is_scanning"] = True
-            with st.spinner(
-                "⏳ Analyse du message en cours… (ça peut prendre quelques secondes, je ne suis pas planté 😌)"
-            ):
-                analysis = analyze_text_with_llm(input_text)
+            st.caption("Aucune punchline générée pour l'instant.")
 
-            st.session_state["analysis"] = analysis
-            st.session_state["replies"] = {"calm": "", "assertive": ""}
-            st.session_state["is_scanning"] = False
 
-            if analysis:
-                default_tone = (
-                    "sarcastique / moqueur (déconseillé)" if persona_mode == "Roast" else "calme"
-                )
-                st.session_state["tone_pref"] = default_tone
-                st.session_state["emoji_allowed"] = True
-
-                try:
-                    with st.spinner("🛡️ Préparation des suggestions de réponse…"):
-                        default_replies = generate_replies_with_llm(
-                            original_text=input_text,
-                            analysis=analysis,
-                            tone_pref=default_tone,
-                            emoji_allowed=True,
-                            persona_mode=persona_mode,
-                        )
-                        st.session_state["replies"] = default_replies
-                except Exception:
-                    pass
+@st.fragment
+def render_bbcode_export(bbcode_summary: str) -> None:
+    if st.button("📋 Copier en version forum (BBCode)"):
+        st.code(bbcode_summary, language="text")
+        st.success("Sélectionne ce bloc et copie-le (Ctrl+C / Cmd+C) pour le coller sur un forum.")
 
-                st.toast("Analyse terminée ✅", icon="✅")
-                st.session_state["scroll_to_results"] = True
+# ───────────────── RÉSULTATS DU FIL ─────────────────
+thread_results = st.session_state.get("thread_results")
+if thread_results:
+    st.markdown("<div id='subtext-results'></div>", unsafe_allow_html=True)
+    st.markdown(
+        render_thread_rollup(rollup(thread_results), st.session_state.get("persona_mode", "Calme")),
+        unsafe_allow_html=True,
+    )
+    st.dataframe(
+        [
+            {
+                "#": r.post.index + 1,
+                "Auteur": r.post.author,
+                "Date": r.post.timestamp or "",
+                "Score": r.score if r.analysis else None,
+                "Hostilité": r.hostility if r.analysis else None,
+                "Tags": ", ".join((r.analysis or {}).get("tags") or []) or (r.error or ""),
+                "Message": r.post.body[:200],
+            }
+            for r in thread_results
+        ],
+        use_container_width=True,
+        hide_index=True,
+    )
 
 # ───────────────── AFFICHAGE DES RÉSULTATS ─────────────────
 analysis = st.session_state.get("analysis")
@@ -855,60 +1150,20 @@ if analysis:
         )
         st.session_state["scroll_to_results"] = False
 
-    content_type = (analysis.get("content_type") or "autre").lower()
-    global_score = int(analysis.get("global_score", 0))
-    global_label = analysis.get("global_label", "Ambigu")
-    main_effect = (analysis.get("main_effect") or "").strip()
-    secondary_effects: List[str] = analysis.get("secondary_effects", []) or []
-    tags = analysis.get("tags", []) or []
-    hostility = analysis.get("hostility", {}) or {}
-    manipulation = analysis.get("manipulation", {}) or {}
-    pressure = analysis.get("pressure", {}) or {}
-    profile = analysis.get("profile", {}) or {}
-    systemic = analysis.get("systemic_view", {}) or {}
-    plain_translation = (analysis.get("plain_translation") or "").strip()
-    reaction_validation = (analysis.get("reaction_validation") or "").strip()
-    viral_punchline = (analysis.get("viral_punchline") or "").strip()
-    highlights = analysis.get("highlights", []) or []
-    fact_checks = analysis.get("fact_checks", []) or []
-    recommended_actions = analysis.get("recommended_actions", []) or []
+    # Sections longues (décryptage, passages, fact-check) rédigées après coup.
+    analysis, deferred_pending, deferred_errors = sync_deferred_sections(analysis, persona_mode_current)
 
-    # ───────── Vue d'ensemble / Scan du malaise ─────────
-    overview_label = "Vue d'ensemble" if persona_mode_current == "Calme" else "Scan du malaise"
-    score_label_title = "Indice de pression" if persona_mode_current == "Calme" else "Indice de malaise"
-    score_color = get_score_color(global_score)
+    # Tout le rendu dérivé de l'analyse (HTML, BBCode, tris) est calculé une
+    # fois par analyse et mis en cache : un rerun ne fait qu'émettre ces chaînes.
+    analyzed_text = st.session_state.get("analyzed_text") or st.session_state.get("input_text", "")
+    view = get_view(analysis, persona_mode_current, analyzed_text)
 
+    # ───────── Vue d'ensemble / Scan du malaise ─────────
     st.markdown("<div class='hero-card'>", unsafe_allow_html=True)
-    st.markdown(f"<div class='small-label'>{overview_label}</div>", unsafe_allow_html=True)
-    st.markdown(
-        f"""
-        <div style="display:flex;align-items:center;justify-content:space-between;margin-top:0.3rem;margin-bottom:0.6rem;gap:0.9rem;flex-wrap:wrap;">
-            <div style="min-width:140px;flex:0 0 auto;">
-                <div style="font-size:0.9rem;color:#94a3b8;">{score_label_title}</div>
-                <div style="font-size:2.3rem;font-weight:800;color:{score_color};margin-top:0.05rem;">
-                    {global_score}%
-                </div>
-                <div style="font-size:0.95rem;color:#e2e8f0;font-weight:500;margin-top:0.05rem;">
-                    {global_label}
-                </div>
-                <div style="font-size:0.8rem;color:#94a3b8;margin-top:0.25rem;">
-                    Type de contenu : {content_type or '—'}
-                </div>
-            </div>
-            <div style="flex:1;min-width:160px;">
-                <div style="height:10px;border-radius:999px;background:#1e293b;overflow:hidden;">
-                    <div style="width:{global_score}%;height:100%;background:{score_color};"></div>
-                </div>
-                <div style="margin-top:0.45rem;font-size:0.9rem;color:#cbd5e1;">
-                    {main_effect or 'Effet émotionnel difficile à formuler, mais le message semble chargé.'}
-                </div>
-            </div>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(view.overview_html, unsafe_allow_html=True)
+    st.markdown(view.hero_html, unsafe_allow_html=True)
 
-    if secondary_effects:
+    if view.effects_html:
         sec_label = (
             "Autres réactions possibles"
             if persona_mode_current == "Calme"
@@ -918,45 +1173,66 @@ if analysis:
             f"<div class='small-label' style='margin-top:0.6rem;'>{sec_label}</div>",
             unsafe_allow_html=True,
         )
-        effects_html = ""
-        for eff in secondary_effects:
-            effects_html += render_tag(eff, "info")
-        st.markdown(effects_html, unsafe_allow_html=True)
+        st.markdown(view.effects_html, unsafe_allow_html=True)
 
-    if tags:
+    if view.tags_html:
         sig_label = "Signaux détectés" if persona_mode_current == "Calme" else "Signaux de toxicité"
         st.markdown(
             f"<div class='small-label' style='margin-top:0.6rem;'>{sig_label}</div>",
             unsafe_allow_html=True,
         )
-        tag_html = ""
-        for t in tags:
-            low = t.lower()
-            lvl = "info"
-            if any(k in low for k in ["insulte", "mépris", "agressif", "hostile", "bouc émissaire"]):
-                lvl = "danger"
-            elif any(k in low for k in ["culpabilisation", "pression", "chantage"]):
-                lvl = "warn"
-            elif any(k in low for k in ["neutre", "apaisant", "bienveillant"]):
-                lvl = "safe"
-            tag_html += render_tag(t, lvl)
-        st.markdown(tag_html, unsafe_allow_html=True)
+        st.markdown(view.tags_html, unsafe_allow_html=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
-    if plain_translation:
+    if analysis.get("degraded"):
+        st.warning("⚠️ Service IA perturbé : résultat de secours (analyse en cache ou estimation locale).")
+    elif analysis.get("analysis_source") == "heuristic":
+        st.info("⚡ Texte jugé neutre par le pré-filtre local : aucune analyse IA n'a été lancée.")
+    elif analysis.get("analysis_source") == "near_duplicate":
+        st.caption(
+            "♻️ Même texte qu'un message déjà analysé, à la ponctuation et aux emojis près : "
+            "l'analyse est reprise telle quelle."
+        )
+    elif analysis.get("analysis_source") == "incremental":
+        incremental = analysis.get("incremental") or {}
+        source = (
+            f"d'un message quasi identique déjà analysé ({analysis['near_duplicate']['similarity']:.0%} de similarité)"
+            if analysis.get("near_duplicate")
+            else "du scan précédent"
+        )
+        st.caption(
+            f"♻️ Réanalyse partielle : {incremental.get('regions', 0)} passage(s) modifié(s) "
+            f"({incremental.get('change_ratio', 0):.0%} du texte) réanalysé(s), le reste est repris {source}."
+        )
+    if deferred_pending:
+        st.fragment(watch_deferred_sections, run_every=DEFERRED_POLL_S)(deferred_pending)
+    if deferred_errors:
+        labels = ", ".join(DEFERRED_SECTION_LABELS.get(s, s) for s in deferred_errors)
+        st.caption(f"⚠️ Section(s) indisponible(s) pour l'instant : {labels}. Nouvel essai automatique dans une minute.")
+    if analysis.get("degraded") or analysis.get("analysis_source") in ("heuristic", "incremental", "near_duplicate"):
+        running = current_scan_job()
+        st.button(
+            "🔍 Lancer quand même l'analyse IA complète",
+            use_container_width=True,
+            disabled=running is not None and not running.done,
+            on_click=start_full_scan,
+            args=(persona_mode_current,),
+        )
+
+    if view.plain_translation:
         st.markdown("")
         st.markdown("<div class='sub-card'>", unsafe_allow_html=True)
         if persona_mode_current == "Calme":
             st.markdown("**🧠 En vrai, ce que la personne est en train de dire :**", unsafe_allow_html=True)
         else:
             st.markdown("**🧠 Traduction en langage « clair » :**", unsafe_allow_html=True)
-        st.markdown(plain_translation)
+        st.markdown(view.plain_translation)
         st.markdown("</div>", unsafe_allow_html=True)
 
     # ───────── Tabs ─────────
     tab_labels: List[str] = []
-    fact_available = content_type in ("article", "discours", "forum", "réseau_social") and bool(fact_checks)
-    response_available = content_type not in ("article", "discours")
+    fact_available = view.fact_available
+    response_available = view.response_available
 
     # Noms d’onglets différents selon le mode
     if persona_mode_current == "Calme":
@@ -990,10 +1266,7 @@ if analysis:
         else:
             st.markdown("**👤 Qui balance quoi sur qui ?**", unsafe_allow_html=True)
 
-        rel_type = profile.get("relation_type", "—")
-        channel = profile.get("channel", "—")
-        power_asym = profile.get("power_asymmetry", "—")
-        target_audience = profile.get("target_audience", "—")
+        rel_type, channel, power_asym, target_audience = view.profile
         col_p1, col_p2 = st.columns(2, gap="small")
         with col_p1:
             st.markdown(f"- **Relation :** {rel_type}")
@@ -1003,43 +1276,14 @@ if analysis:
             st.markdown(f"- **Public visé :** {target_audience}")
         st.markdown("</div>", unsafe_allow_html=True)
 
-        h_score = int(hostility.get("score", 0) or 0)
-        h_label = hostility.get("label", "—")
-        m_score = int(manipulation.get("score", 0) or 0)
-        m_label = manipulation.get("label", "—")
-        p_score = int(pressure.get("score", 0) or 0)
-        p_label = pressure.get("label", "—")
-
         if persona_mode_current == "Calme":
             st.markdown("<div class='small-label'>Niveau de tension du message</div>", unsafe_allow_html=True)
         else:
             st.markdown("<div class='small-label'>Niveau de toxicité ressentie</div>", unsafe_allow_html=True)
 
         st.markdown("<div class='metric-grid'>", unsafe_allow_html=True)
-        st.markdown(
-            render_metric_card(
-                "Hostilité" if persona_mode_current == "Calme" else "Sel / Hostilité",
-                h_score,
-                h_label,
-            ),
-            unsafe_allow_html=True,
-        )
-        st.markdown(
-            render_metric_card(
-                "Manipulation / pression" if persona_mode_current == "Calme" else "Manip / pression",
-                m_score,
-                m_label,
-            ),
-            unsafe_allow_html=True,
-        )
-        st.markdown(
-            render_metric_card(
-                "Pression sociale",
-                p_score,
-                p_label,
-            ),
-            unsafe_allow_html=True,
-        )
+        for metric_card_html in view.metric_cards:
+            st.markdown(metric_card_html, unsafe_allow_html=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
         if persona_mode_current == "Calme":
@@ -1047,55 +1291,70 @@ if analysis:
         else:
             st.caption("Plus c’est haut, plus le message est cringe / agressif sur cet axe.")
 
-        if reaction_validation and persona_mode_current == "Calme":
+        if "reaction_validation" in view.deferred and persona_mode_current == "Calme":
+            st.caption("⏳ « Est-ce que ta réaction est normale ? » arrive dans un instant…")
+        if view.reaction_validation and persona_mode_current == "Calme":
             st.markdown("<div class='sub-card' style='margin-top:0.9rem;'>", unsafe_allow_html=True)
             st.markdown("**🎭 Est-ce que ta réaction est normale ?**", unsafe_allow_html=True)
-            st.markdown(reaction_validation)
+            st.markdown(view.reaction_validation)
             st.markdown("</div>", unsafe_allow_html=True)
 
         # Passages précis repérés — Éducatif uniquement en mode Calme
-        if highlights and persona_mode_current == "Calme":
+        if view.highlights and persona_mode_current == "Calme":
             with st.expander("🔎 Passages précis repérés dans le texte (avec explications de rhétorique)", expanded=False):
                 st.caption("Chaque passage te montre la technique utilisée, une définition simple et un exemple de la vie courante.")
-                for h in highlights:
-                    quote = (h.get("quote") or "").strip()
-                    tag = (h.get("tag") or "").strip()
-                    technique_name = (h.get("technique_name") or "").strip()
-                    simple_definition = (h.get("simple_definition") or "").strip()
-                    everyday_example = (h.get("everyday_example") or "").strip()
-                    explanation = (h.get("explanation") or "").strip()
-
+                if "highlight_details" in view.deferred:
+                    st.caption("⏳ Définitions, exemples et explications en cours de rédaction…")
+                for number, h in enumerate(view.highlights, start=1):
                     st.markdown("<div class='sub-card' style='margin-bottom:0.6rem;'>", unsafe_allow_html=True)
 
-                    if tag:
-                        st.markdown(render_tag(tag, "info"), unsafe_allow_html=True)
+                    if h.tag_html:
+                        st.markdown(h.tag_html, unsafe_allow_html=True)
 
-                    if technique_name:
-                        st.markdown(f"**🧩 Technique utilisée :** {technique_name}")
+                    if h.technique_name:
+                        st.markdown(f"**🧩 Technique utilisée :** {h.technique_name}")
 
-                    if quote:
+                    if h.quote:
                         st.markdown("")
-                        st.markdown("**📌 Passage du texte :**")
-                        st.markdown(f"> {quote}")
-
-                    if simple_definition:
+                        st.markdown(f"**📌 Passage du texte (n° {number}) :**")
+                        st.markdown(f"> {h.quote}")
+                        if h.span is None:
+                            st.caption("Passage introuvable tel quel dans le texte.")
+                        elif not h.span.exact:
+                            st.caption("Citation reformulée par l'analyse : le passage le plus proche est surligné dans le texte.")
+
+                    if h.simple_definition:
                         st.markdown("")
                         st.markdown("**📚 En clair, cette technique c’est quoi ?**")
-                        st.markdown(f"{simple_definition}")
+                        st.markdown(f"{h.simple_definition}")
 
-                    if everyday_example:
+                    if h.everyday_example:
                         st.markdown("")
                         st.markdown("**🧪 Exemple dans la vie de tous les jours :**")
-                        st.markdown(f"> {everyday_example}")
+                        st.markdown(f"> {h.everyday_example}")
 
-                    if explanation:
+                    if h.explanation:
                         st.markdown("")
                         st.markdown("**🔍 Pourquoi ce passage est puissant / problématique :**")
                         st.markdown(
-                            f"<p style='font-size:0.9rem;color:#e2e8f0;margin-top:0.3rem;'>{explanation}</p>",
+                            f"<p style='font-size:0.9rem;color:#e2e8f0;margin-top:0.3rem;'>{h.explanation}</p>",
                             unsafe_allow_html=True,
                         )
                     st.markdown("</div>", unsafe_allow_html=True)
+
+        # Texte d'origine annoté : positions calculées une fois par analyse (voir subtext/locate.py).
+        if view.annotated_html:
+            annotated_label = (
+                "🖍️ Le texte analysé, passages repérés surlignés"
+                if persona_mode_current == "Calme"
+                else "🖍️ Le pavé, avec les passages qui piquent surlignés"
+            )
+            with st.expander(annotated_label, expanded=False):
+                if persona_mode_current == "Calme":
+                    st.caption("Les numéros renvoient aux passages repérés ; en pointillé, une citation retrouvée approximativement.")
+                else:
+                    st.caption("Survole un passage surligné pour voir la technique utilisée.")
+                st.markdown(view.annotated_html, unsafe_allow_html=True)
     idx += 1
 
     # ───────── Actions ─────────
@@ -1105,39 +1364,28 @@ if analysis:
         else:
             st.markdown("#### Que faire : répondre, ignorer, ratio ?")
 
-        if not recommended_actions:
+        if not view.actions:
             if persona_mode_current == "Calme":
                 st.caption("Aucune action recommandée par l'analyse.")
             else:
                 st.caption("Pas de plan d’action spécifique. Fais comme tu le sens, mais proprement.")
         else:
-            actions_sorted = sorted(recommended_actions, key=lambda a: a.get("priority", 3))
             if persona_mode_current == "Calme":
                 st.caption("🔴 Priorité 1 : immédiat · 🟠 2 : important · 🟡 3 : optionnel")
             else:
                 st.caption("🔴 Urgent · 🟠 Important · 🟡 Optionnel / lore")
 
-            for act in actions_sorted:
-                label = (act.get("label") or "").strip()
-                detail = (act.get("detail") or "").strip()
-                priority = act.get("priority", 3)
-                if priority == 1:
-                    prio_icon = "🔴"
-                elif priority == 2:
-                    prio_icon = "🟠"
-                else:
-                    prio_icon = "🟡"
-
+            for act in view.actions:
                 if persona_mode_current == "Roast":
                     # Version compacte, plus khey
-                    st.markdown(f"{prio_icon} **{label}**")
-                    if detail:
-                        st.markdown(f"- {detail}")
+                    st.markdown(f"{act.icon} **{act.label}**")
+                    if act.detail:
+                        st.markdown(f"- {act.detail}")
                 else:
                     st.markdown("<div class='sub-card' style='margin-bottom:0.6rem;'>", unsafe_allow_html=True)
-                    st.markdown(f"{prio_icon} **{label}**")
-                    if detail:
-                        st.markdown(f"- {detail}")
+                    st.markdown(f"{act.icon} **{act.label}**")
+                    if act.detail:
+                        st.markdown(f"- {act.detail}")
                     st.markdown("</div>", unsafe_allow_html=True)
     idx += 1
 
@@ -1145,73 +1393,62 @@ if analysis:
     if persona_mode_current == "Calme":
         with tabs[idx]:
             st.markdown("#### Décryptage de fond — Vision systémique")
-            with st.expander("Voir l'analyse détaillée du contexte, de la chaîne de valeur et des rapports de force", expanded=False):
-                st.markdown("<div class='sub-card' style='margin-bottom:0.8rem;'>", unsafe_allow_html=True)
-                scale = systemic.get("scale", "—")
-                power_dyn = systemic.get("power_dynamics", "—")
-                narrative_frame = systemic.get("narrative_frame", "—")
-                macro_implications = systemic.get("macro_implications", []) or []
-
-                st.markdown("**📏 1. À quelle échelle ça joue ? (micro → macro)**")
-                st.markdown(f"- {scale}")
-                st.markdown("")
-
-                st.markdown("**⚖️ 2. Dynamique de pouvoir et chaîne de valeur**")
-                st.markdown(
-                    "Imagine une petite chaîne de valeur simplifiée : émetteur → message → destinataire → conséquences "
-                    "(et parfois d'autres acteurs en coulisse : managers, institutions, algorithmes, opinion publique…)."
-                )
-                st.markdown(f"➡️ {power_dyn}")
-                st.markdown("")
+            if "systemic_view" in view.deferred:
+                st.caption("⏳ Décryptage en cours de rédaction : il s'affichera ici dans quelques secondes.")
+            else:
+                with st.expander("Voir l'analyse détaillée du contexte, de la chaîne de valeur et des rapports de force", expanded=False):
+                    st.markdown("<div class='sub-card' style='margin-bottom:0.8rem;'>", unsafe_allow_html=True)
+                    scale, power_dyn, narrative_frame, macro_implications = view.systemic
 
-                st.markdown("**🧱 3. Le récit global que le message raconte sur le monde**")
-                st.markdown(
-                    "Ici, l’idée est de comprendre « l’histoire » dans laquelle on te fait entrer : "
-                    "mérite individuel, peur de la crise, culpabilité, compétition permanente, etc."
-                )
-                st.markdown(f"➡️ {narrative_frame}")
-                st.markdown("")
+                    st.markdown("**📏 1. À quelle échelle ça joue ? (micro → macro)**")
+                    st.markdown(f"- {scale}")
+                    st.markdown("")
 
-                if macro_implications:
-                    st.markdown("**🌍 4. Si ce type de message se répète partout…**")
+                    st.markdown("**⚖️ 2. Dynamique de pouvoir et chaîne de valeur**")
                     st.markdown(
-                        "On passe du cas particulier (toi et ce message) à des conséquences plus larges : "
-                        "climat social, confiance, coopération, polarisation, burn-out, etc."
+                        "Imagine une petite chaîne de valeur simplifiée : émetteur → message → destinataire → conséquences "
+                        "(et parfois d'autres acteurs en coulisse : managers, institutions, algorithmes, opinion publique…)."
                     )
-                    for mi in macro_implications:
-                        st.markdown(f"- {mi}")
+                    st.markdown(f"➡️ {power_dyn}")
+                    st.markdown("")
+
+                    st.markdown("**🧱 3. Le récit global que le message raconte sur le monde**")
+                    st.markdown(
+                        "Ici, l’idée est de comprendre « l’histoire » dans laquelle on te fait entrer : "
+                        "mérite individuel, peur de la crise, culpabilité, compétition permanente, etc."
+                    )
+                    st.markdown(f"➡️ {narrative_frame}")
+                    st.markdown("")
+
+                    if macro_implications:
+                        st.markdown("**🌍 4. Si ce type de message se répète partout…**")
+                        st.markdown(
+                            "On passe du cas particulier (toi et ce message) à des conséquences plus larges : "
+                            "climat social, confiance, coopération, polarisation, burn-out, etc."
+                        )
+                        for mi in macro_implications:
+                            st.markdown(f"- {mi}")
 
-                st.markdown("</div>", unsafe_allow_html=True)
+                    st.markdown("</div>", unsafe_allow_html=True)
         idx += 1
 
         # Onglet suivant = Fact-check
         with tabs[idx]:
             st.markdown("#### Analyse factuelle (si applicable)")
-            if fact_available:
-                for fc in fact_checks:
-                    claim = (fc.get("claim") or "").strip()
-                    verdict = (fc.get("verdict") or "").strip()
-                    explanation = (fc.get("explanation") or "").strip()
-                    sources = fc.get("sources", []) or []
+            if fact_available and "fact_checks" in view.deferred:
+                st.caption("⏳ Vérification des affirmations en cours…")
+            elif fact_available:
+                for fc in view.fact_checks:
                     st.markdown("<div class='sub-card' style='margin-bottom:0.6rem;'>", unsafe_allow_html=True)
-                    if claim:
-                        st.markdown(f"**Affirmation :** {claim}")
-                    if verdict:
-                        v_low = verdict.lower()
-                        level = "info"
-                        if "faux" in v_low:
-                            level = "danger"
-                        elif "partiellement" in v_low:
-                            level = "warn"
-                        elif "vrai" in v_low:
-                            level = "safe"
-                        verdict_badge = f"<span class='tag-pill {level}'>{verdict}</span>"
-                        st.markdown(f"**Verdict :** {verdict_badge}", unsafe_allow_html=True)
-                    if explanation:
-                        st.markdown(f"**Pourquoi :** {explanation}")
-                    if sources:
+                    if fc.claim:
+                        st.markdown(f"**Affirmation :** {fc.claim}")
+                    if fc.verdict_html:
+                        st.markdown(f"**Verdict :** {fc.verdict_html}", unsafe_allow_html=True)
+                    if fc.explanation:
+                        st.markdown(f"**Pourquoi :** {fc.explanation}")
+                    if fc.sources:
                         st.markdown("**Sources possibles :**")
-                        for src in sources:
+                        for src in fc.sources:
                             st.markdown(f"- {src}")
                     st.markdown("</div>", unsafe_allow_html=True)
             else:
@@ -1222,31 +1459,20 @@ if analysis:
         # En mode Roast, l'onglet suivant après Actions est déjà le Fact-check
         with tabs[idx]:
             st.markdown("#### Fact-check (si tu veux aller plus loin que le meme)")
-            if fact_available:
-                for fc in fact_checks:
-                    claim = (fc.get("claim") or "").strip()
-                    verdict = (fc.get("verdict") or "").strip()
-                    explanation = (fc.get("explanation") or "").strip()
-                    sources = fc.get("sources", []) or []
+            if fact_available and "fact_checks" in view.deferred:
+                st.caption("⏳ Vérification des affirmations en cours…")
+            elif fact_available:
+                for fc in view.fact_checks:
                     st.markdown("<div class='sub-card' style='margin-bottom:0.6rem;'>", unsafe_allow_html=True)
-                    if claim:
-                        st.markdown(f"**Affirmation :** {claim}")
-                    if verdict:
-                        v_low = verdict.lower()
-                        level = "info"
-                        if "faux" in v_low:
-                            level = "danger"
-                        elif "partiellement" in v_low:
-                            level = "warn"
-                        elif "vrai" in v_low:
-                            level = "safe"
-                        verdict_badge = f"<span class='tag-pill {level}'>{verdict}</span>"
-                        st.markdown(f"**Verdict :** {verdict_badge}", unsafe_allow_html=True)
-                    if explanation:
-                        st.markdown(f"**Pourquoi :** {explanation}")
-                    if sources:
+                    if fc.claim:
+                        st.markdown(f"**Affirmation :** {fc.claim}")
+                    if fc.verdict_html:
+                        st.markdown(f"**Verdict :** {fc.verdict_html}", unsafe_allow_html=True)
+                    if fc.explanation:
+                        st.markdown(f"**Pourquoi :** {fc.explanation}")
+                    if fc.sources:
                         st.markdown("**Sources possibles :**")
-                        for src in sources:
+                        for src in fc.sources:
                             st.markdown(f"- {src}")
                     st.markdown("</div>", unsafe_allow_html=True)
             else:
@@ -1261,94 +1487,7 @@ if analysis:
             else:
                 st.caption("Pas de réponse auto pour ce type de contenu. À garder comme lecture systémique.")
         else:
-            if persona_mode_current == "Calme":
-                st.markdown("#### Construire ta réponse")
-            else:
-                st.markdown("#### Préparer ton retour de flamme (propre)")
-
-            col_tone, col_emoji = st.columns(2, gap="small")
-            with col_tone:
-                tone_options = [
-                    "calme",
-                    "professionnel",
-                    "empathique",
-                    "direct mais respectueux",
-                    "sarcastique / moqueur (déconseillé)",
-                ]
-                default_index = 4 if persona_mode_current == "Roast" else 0
-                current_tone = st.session_state.get("tone_pref", tone_options[default_index])
-                if current_tone in tone_options:
-                    default_index = tone_options.index(current_tone)
-                st.session_state["tone_pref"] = st.selectbox(
-                    "Style de réponse",
-                    tone_options,
-                    index=default_index,
-                    key="tone_select",
-                )
-            with col_emoji:
-                st.session_state["emoji_allowed"] = st.checkbox(
-                    "Autoriser les emojis",
-                    value=st.session_state.get("emoji_allowed", True),
-                    key="emoji_checkbox",
-                )
-
-            tone_pref = st.session_state["tone_pref"]
-            emoji_allowed = st.session_state["emoji_allowed"]
-            original_for_reply = st.session_state.get("input_text", "")
-
-            if persona_mode_current == "Calme":
-                st.caption("SUBTEXT te suggère 2 versions : une calme et une plus ferme.")
-            else:
-                st.caption("Tu obtiens 2 versions : une pique « soft » et une plus brutale.")
-
-            button_label = (
-                "🛡️ Générer / mettre à jour la réponse suggérée"
-                if persona_mode_current == "Calme"
-                else "💬 Générer / mettre à jour ton punchline pack"
-            )
-            if st.button(button_label, use_container_width=True):
-                with st.spinner("Génération de la réponse…"):
-                    replies = generate_replies_with_llm(
-                        original_text=original_for_reply,
-                        analysis=analysis,
-                        tone_pref=tone_pref,
-                        emoji_allowed=emoji_allowed,
-                        persona_mode=persona_mode_current,
-                    )
-                st.session_state["replies"] = replies
-                st.toast("Réponse générée ✅", icon="✅")
-
-            replies = st.session_state["replies"]
-            if replies.get("calm") or replies.get("assertive"):
-                if persona_mode_current == "Calme":
-                    tabs_reply = st.tabs(["😌 Version calme", "💬 Version assertive"])
-                    with tabs_reply[0]:
-                        if replies.get("calm"):
-                            render_reply_block("Réponse calme (posée)", replies["calm"])
-                        else:
-                            st.caption("Pas de réponse calme dispo.")
-                    with tabs_reply[1]:
-                        if replies.get("assertive"):
-                            render_reply_block("Réponse assertive (ferme mais propre)", replies["assertive"])
-                        else:
-                            st.caption("Pas de réponse assertive dispo.")
-                else:
-                    tabs_reply = st.tabs(["🙂 Pique légère", "🔥 Retour de flamme"])
-                    with tabs_reply[0]:
-                        if replies.get("calm"):
-                            render_reply_block("Réponse soft", replies["calm"])
-                        else:
-                            st.caption("Pas de version soft dispo.")
-                    with tabs_reply[1]:
-                        if replies.get("assertive"):
-                            render_reply_block("Réponse cash", replies["assertive"])
-                        else:
-                            st.caption("Pas de version cash dispo.")
-            else:
-                if persona_mode_current == "Calme":
-                    st.caption("Aucune réponse générée pour l'instant.")
-                else:
-                    st.caption("Aucune punchline générée pour l'instant.")
+            render_reply_section(analysis, persona_mode_current)
 
     # ───────────────── RÉSUMÉ PARTAGEABLE ─────────────────
     st.markdown("---")
@@ -1357,93 +1496,14 @@ if analysis:
     else:
         st.subheader("📸 Carte à screen pour le thread")
 
-    score = global_score
-    clean_score_color = get_score_color(score)
-    clean_context = (
-        st.session_state["input_text"][:90].replace('"', '&quot;').replace("\n", " ") + "..."
-    )
-    clean_punchline = plain_translation.replace('"', '&quot;') if plain_translation else ""
-    clean_viral = viral_punchline.replace('"', '&quot;') if viral_punchline else ""
-    clean_tags = (
-        "".join(
-            [
-                f"<span style='background:#334155;padding:2px 6px;border-radius:4px;color:#e2e8f0;margin-right:5px;font-size:0.7rem;'>{t}</span>"
-                for t in tags[:3]
-            ]
-        )
-        or "<span style='font-size:0.7rem;color:#6b7280;'>aucun signal critique</span>"
-    )
-
-    tags_text = ", ".join(tags[:3]) if tags else "aucun signal critique"
-    plain_translation_text = plain_translation or "—"
-
-    bbcode_summary = f"""[quote]
-📊 Rapport SUBTEXT — Détecteur de bullshit
-
-Indice de pression : {score}% ({global_label})
-Signaux principaux : {tags_text}
-
-Traduction relationnelle :
-{plain_translation_text}
-[/quote]
-
-Généré par SUBTEXT — Détecteur de bullshit (MVP)."""
-
-    if persona_mode_current == "Calme":
-        supportive_text = (
-            reaction_validation or "Tu n'exagères pas : ce message est vraiment lourd pour toi."
-        )
-        clean_supportive = supportive_text.replace('"', '&quot;')
-        punchline_block = f"""
-  <div style="background:#172a45;border:1px solid #38bdf8;border-radius:8px;padding:0.8rem;text-align:center;margin-bottom:1rem;">
-    <div style="font-size:0.75rem;color:#38bdf8;text-transform:uppercase;margin-bottom:0.2rem;font-weight:700;">💬 Message pour toi :</div>
-    <div style="font-size:1.05rem;font-weight:700;color:#e2e8f0;">"{clean_supportive}"</div>
-  </div>
-"""
-    else:
-        punchline_block = f"""
-  <div style="background:#172a45;border:1px solid #f97373;border-radius:8px;padding:0.8rem;text-align:center;margin-bottom:1rem;">
-    <div style="font-size:0.75rem;color:#f97373;text-transform:uppercase;margin-bottom:0.2rem;font-weight:700;">🔥 Punchline SUBTEXT :</div>
-    <div style="font-size:1.15rem;font-weight:800;color:#f1f5f9;">"{clean_viral}"</div>
-  </div>
-"""
-
-    html_code = f"""
-<div style="border-radius:20px;padding:1.5rem;background:radial-gradient(circle at top left, #172a45, #0f172a);border:1px solid #334155;box-shadow:0 4px 20px rgba(0,0,0,0.5);color:#f1f5f9;font-family:sans-serif;margin-top:1rem;">
-  <div style="display:flex;justify-content:space-between;align-items:center;border-bottom:1px solid #334155;padding-bottom:0.8rem;margin-bottom:1rem;">
-    <div style="font-size:0.8rem;text-transform:uppercase;letter-spacing:0.15em;color:#94a3b8;font-weight:700;">RAPPORT SUBTEXT</div>
-    <div style="font-size:0.7rem;background:#334155;padding:2px 6px;border-radius:4px;color:#e2e8f0;">SCAN IA</div>
-  </div>
-  <div style="display:flex;align-items:center;justify-content:space-between;margin-bottom:1.2rem;gap:0.8rem;flex-wrap:wrap;">
-    <div style="display:flex;align-items:baseline;">
-      <div style="font-size:2.2rem;font-weight:800;line-height:1;color:{clean_score_color};">{score}%</div>
-      <div style="font-size:0.9rem;margin-left:0.5rem;font-weight:500;color:{clean_score_color};">{global_label}</div>
-    </div>
-    <div>{clean_tags}</div>
-  </div>
-  <div style="font-style:italic;font-size:0.9rem;color:#94a3b8;margin-bottom:1rem;border-left:3px solid #475569;padding-left:0.8rem;background:rgba(255,255,255,0.03);padding:0.5rem 0.8rem;border-radius:0 8px 8px 0;">
-    "{clean_context}"
-  </div>
-  <div style="margin-bottom:1rem;">
-    <div style="font-size:0.7rem;text-transform:uppercase;color:#475569;margin-bottom:0.3rem;font-weight:700;">TRADUCTION RELATIONNELLE :</div>
-    <div style="font-size:1.05rem;font-weight:600;color:#e2e8f0;line-height:1.4;">{clean_punchline}</div>
-  </div>
-  {punchline_block}
-  <div style="font-size:0.75rem;color:#475569;text-align:right;border-top:1px solid #334155;padding-top:0.5rem;">
-    Généré par SUBTEXT • Détecteur de bullshit
-  </div>
-</div>
-"""
-    st.markdown(html_code, unsafe_allow_html=True)
+    st.markdown(view.share_card_html, unsafe_allow_html=True)
 
     if persona_mode_current == "Calme":
         st.caption("Prends une capture de cet encadré pour partager le scan.")
     else:
         st.caption("Screen cette carte et balance-la sur ton thread préféré.")
 
-    if st.button("📋 Copier en version forum (BBCode)"):
-        st.code(bbcode_summary, language="text")
-        st.success("Sélectionne ce bloc et copie-le (Ctrl+C / Cmd+C) pour le coller sur un forum.")
+    render_bbcode_export(view.bbcode_summary)
 
     footer_text = (
         "Made by Thomas — MVP SUBTEXT"
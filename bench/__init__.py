@@ -0,0 +1,4 @@
+"""
+Benchmarks hors ligne : serveur OpenAI simulé (`bench.mock_server`) et
+mesures de bout en bout avec détection de régressions (`bench.run`).
+"""
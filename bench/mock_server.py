@@ -0,0 +1,393 @@
+"""
+Serveur local imitant `POST /v1/chat/completions` d'OpenAI.
+
+Trois sources de réponses, par ordre de priorité :
+
+1. une cassette (JSON) : réponses enregistrées, indexées par modèle + messages ;
+2. en mode enregistrement, l'API réelle (la réponse est ajoutée à la cassette) ;
+   sans clé d'API, c'est la réponse synthétique qui y est figée ;
+3. sinon une réponse synthétique au bon schéma, construite à partir du
+   pré-score lexical (`subtext.heuristics`), pour que le moteur suive les
+   mêmes chemins de code qu'en production.
+
+La latence est simulée : délai avant le premier token puis débit de tokens
+constant, en streaming SSE comme en réponse complète.
+
+    python -m bench.mock_server --port 8089 --ttft 0.4 --tokens-per-s 80
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=bench streamlit run App.py
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.request
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from subtext.heuristics import prescore
+
+UPSTREAM_URL = "https://api.openai.com/v1/chat/completions"
+# Approximation usuelle pour le français comme pour l'anglais.
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class MockConfig:
+    ttft_s: float = 0.4
+    tokens_per_s: float = 80.0
+    cassette_path: Optional[str] = None
+    record: bool = False
+    upstream_key: Optional[str] = None
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def cassette_key(request: Dict[str, Any]) -> str:
+    """Clé stable d'une requête : modèle + messages, indépendante des options de transport."""
+    payload = json.dumps(
+        {"model": request.get("model"), "messages": request.get("messages")},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Réponses enregistrées, sauvegardées à chaque ajout."""
+
+    def __init__(self, path: Optional[str]) -> None:
+        self.path = path
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            if self.path:
+                tmp = f"{self.path}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self._entries, f, ensure_ascii=False, indent=1)
+                os.replace(tmp, self.path)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+# ───────────────── RÉPONSES SYNTHÉTIQUES ─────────────────
+_FILLER = (
+    "Le message installe un rapport de force discret : il présente une exigence comme une évidence "
+    "et laisse peu de place à une réponse sur un pied d'égalité."
+)
+
+
+def _call_type(request: Dict[str, Any]) -> str:
+    key = str(request.get("prompt_cache_key") or "")
+    return key.split("subtext-", 1)[-1] if key.startswith("subtext-") else "analysis"
+
+
+def _user_messages(request: Dict[str, Any]) -> List[str]:
+    messages: List[Dict[str, Any]] = request.get("messages") or []
+    return [str(m.get("content") or "") for m in messages if m.get("role") == "user"]
+
+
+def _systemic_view(scale: str) -> Dict[str, Any]:
+    return {
+        "scale": scale,
+        "power_dynamics": " ".join([_FILLER] * 4),
+        "narrative_frame": " ".join([_FILLER] * 4),
+        "macro_implications": [_FILLER, _FILLER],
+    }
+
+
+def _highlight(quote: str, tag: str, technique: str = "cadrage") -> Dict[str, Any]:
+    return {
+        "quote": quote,
+        "tag": tag,
+        "technique_name": technique,
+        "simple_definition": _FILLER,
+        "everyday_example": _FILLER,
+        "explanation": f"{_FILLER} {_FILLER}",
+    }
+
+
+def _analysis_payload(text: str) -> Dict[str, Any]:
+    pre = prescore(text)
+    data = pre.to_analysis()
+    data.pop("analysis_source", None)
+    data.update(
+        {
+            "main_effect": _FILLER,
+            "profile": {"relation_type": "professionnel", "channel": "email", "power_asymmetry": "forte", "target_audience": "individu"},
+            "plain_translation": f"{_FILLER} {_FILLER}",
+            "systemic_view": _systemic_view("micro"),
+            "highlights": [_highlight(text[:60], (pre.tags or ["neutre"])[0])],
+            "recommended_actions": [{"label": "Répondre par écrit", "detail": _FILLER, "priority": 1}],
+            "reaction_validation": _FILLER,
+            "viral_punchline": "Le sous-texte parle plus fort que le texte.",
+        }
+    )
+    return data
+
+
+def _section_payload(prompt: str) -> Dict[str, Any]:
+    """Champs de la section demandée (voir `_section_request` dans subtext/engine.py)."""
+    head, _, rest = prompt.partition("\n\n")
+    section = head.split(":", 1)[-1].strip()
+    summary_block, _, _ = rest.partition("\n\nTexte analysé :")
+    try:
+        summary = json.loads(summary_block.split("\n", 1)[-1])
+    except ValueError:
+        summary = {}
+    if section == "systemic_view":
+        return {"systemic_view": _systemic_view("micro→macro")}
+    if section == "highlight_details":
+        tag = (summary.get("tags") or ["neutre"])[0]
+        return {
+            "highlights": [
+                _highlight(h.get("quote") or "", tag, h.get("technique_name") or "cadrage")
+                for h in summary.get("highlights") or []
+            ]
+        }
+    if section == "fact_checks":
+        return {
+            "fact_checks": [
+                {"claim": "Tout le monde le sait.", "verdict": "incertain", "explanation": _FILLER, "sources": []}
+            ]
+        }
+    return {"reaction_validation": f"{_FILLER} {_FILLER}"}
+
+
+def _repair_payload(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Seuls les champs redemandés, pris dans l'analyse synthétique du texte d'origine."""
+    prompts = _user_messages(request)
+    missing = [name.strip() for name in prompts[-1].rsplit(":", 1)[-1].split(",") if name.strip()]
+    full = _analysis_payload(prompts[0] if prompts else "")
+    full.update(_section_payload(prompts[0]) if prompts and prompts[0].startswith("Section demandée") else {})
+    return {name: full[name] for name in missing if name in full}
+
+
+def synthetic_content(request: Dict[str, Any]) -> str:
+    """Réponse JSON plausible pour le type d'appel (déduit de `prompt_cache_key`)."""
+    call_type = _call_type(request)
+    prompts = _user_messages(request)
+    text = prompts[-1] if prompts else ""
+    if call_type == "triage":
+        pre = prescore(text)
+        data: Dict[str, Any] = {
+            "content_type": "autre",
+            "global_score": pre.global_score,
+            "confidence": 0.8,
+        }
+    elif call_type == "reply":
+        data = {
+            "calm": "Je comprends ta demande. " + _FILLER,
+            "assertive": "Je préfère qu'on en parle posément. " + _FILLER,
+        }
+    elif call_type == "synthesis":
+        data = {
+            "global_label": prescore(text).global_label,
+            "main_effect": _FILLER,
+            "profile": {"relation_type": "public", "channel": "article", "power_asymmetry": "forte", "target_audience": "grand public"},
+            "plain_translation": f"{_FILLER} {_FILLER}",
+            "systemic_view": _systemic_view("micro→macro"),
+            "reaction_validation": f"{_FILLER} {_FILLER}",
+            "viral_punchline": "Le sous-texte parle plus fort que le texte.",
+        }
+    elif call_type == "section":
+        data = _section_payload(text)
+    elif call_type == "repair":
+        data = _repair_payload(request)
+    else:  # analysis, chunk
+        data = _analysis_payload(text)
+    return json.dumps(data, ensure_ascii=False)
+
+
+# ───────────────── SERVEUR ─────────────────
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: MockConfig) -> None:
+        super().__init__(address, _Handler)
+        self.config = config
+        self.cassette = Cassette(config.cassette_path)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.simulated_s = 0.0
+        self.sources: Dict[str, int] = {"cassette": 0, "upstream": 0, "synthetic": 0}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def account(self, source: str, seconds: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self.simulated_s += seconds
+            self.sources[source] += 1
+
+    def resolve(self, request: Dict[str, Any]) -> Tuple[str, Dict[str, int], str]:
+        """Contenu, usage et source de la réponse à servir."""
+        key = cassette_key(request)
+        entry = self.cassette.get(key)
+        if entry is not None:
+            return entry["content"], entry["usage"], "cassette"
+        if self.config.record and self.config.upstream_key:
+            content, usage = self._fetch_upstream(request)
+            self.cassette.put(key, {"model": request.get("model"), "content": content, "usage": usage})
+            return content, usage, "upstream"
+        content = synthetic_content(request)
+        prompt_chars = sum(len(str(m.get("content") or "")) for m in request.get("messages") or [])
+        usage = {"prompt_tokens": estimate_tokens("x" * prompt_chars), "completion_tokens": estimate_tokens(content)}
+        if self.config.record:
+            # Sans clé : la réponse synthétique est figée dans la cassette.
+            self.cassette.put(key, {"model": request.get("model"), "content": content, "usage": usage, "synthetic": True})
+        return content, usage, "synthetic"
+
+    def _fetch_upstream(self, request: Dict[str, Any]) -> Tuple[str, Dict[str, int]]:
+        body = {k: v for k, v in request.items() if k not in ("stream", "stream_options")}
+        req = urllib.request.Request(
+            UPSTREAM_URL,
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Authorization": f"Bearer {self.config.upstream_key}", "Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(req, timeout=120) as resp:
+            data = json.load(resp)
+        usage = data.get("usage") or {}
+        return data["choices"][0]["message"]["content"], {
+            "prompt_tokens": int(usage.get("prompt_tokens", 0)),
+            "completion_tokens": int(usage.get("completion_tokens", 0)),
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: MockOpenAIServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_POST(self) -> None:  # noqa: N802 (API http.server)
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        content, usage, source = self.server.resolve(request)
+        usage_body = dict(usage, total_tokens=usage["prompt_tokens"] + usage["completion_tokens"])
+        usage_body["prompt_tokens_details"] = {"cached_tokens": 0}
+        config = self.server.config
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+        model = request.get("model", "mock")
+        started = time.perf_counter()
+
+        if request.get("stream"):
+            self._stream(completion_id, model, content, usage_body, bool((request.get("stream_options") or {}).get("include_usage")))
+        else:
+            time.sleep(config.ttft_s + usage["completion_tokens"] / config.tokens_per_s)
+            body = json.dumps(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                    "usage": usage_body,
+                },
+                ensure_ascii=False,
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        self.server.account(source, time.perf_counter() - started)
+
+    def _stream(self, completion_id: str, model: str, content: str, usage: Dict[str, Any], include_usage: bool) -> None:
+        config = self.server.config
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(payload: Dict[str, Any]) -> None:
+            self.wfile.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        def chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> Dict[str, Any]:
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+
+        time.sleep(config.ttft_s)
+        event(chunk({"role": "assistant", "content": ""}))
+        # Un événement toutes les ~4 tokens, au débit configuré.
+        step = 4 * CHARS_PER_TOKEN
+        pause = 4 / config.tokens_per_s
+        for i in range(0, len(content), step):
+            event(chunk({"content": content[i:i + step]}))
+            time.sleep(pause)
+        event(chunk({}, finish="stop"))
+        if include_usage:
+            event({"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model, "choices": [], "usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_server(config: MockConfig, host: str = "127.0.0.1", port: int = 0) -> MockOpenAIServer:
+    """Démarre le serveur dans un thread de fond (port 0 : port libre)."""
+    server = MockOpenAIServer((host, port), config)
+    threading.Thread(target=server.serve_forever, name="mock-openai", daemon=True).start()
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serveur OpenAI local pour les benchmarks SUBTEXT.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--ttft", type=float, default=0.4, help="délai avant le premier token (s)")
+    parser.add_argument("--tokens-per-s", type=float, default=80.0)
+    parser.add_argument("--cassette", help="fichier JSON de réponses enregistrées")
+    parser.add_argument("--record", action="store_true", help="complète la cassette (API réelle si OPENAI_API_KEY, sinon réponses synthétiques)")
+    args = parser.parse_args(argv)
+
+    config = MockConfig(
+        ttft_s=args.ttft,
+        tokens_per_s=args.tokens_per_s,
+        cassette_path=args.cassette,
+        record=args.record,
+        upstream_key=os.getenv("OPENAI_API_KEY"),
+    )
+    if config.record and not config.cassette_path:
+        parser.error("--record demande --cassette")
+    server = MockOpenAIServer((args.host, args.port), config)
+    print(f"Mock OpenAI sur {server.base_url} ({len(server.cassette)} réponse(s) en cassette)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,189 @@
+"""
+Benchmarks hors ligne de SUBTEXT, contre le serveur local de `bench.mock_server`.
+
+Mesure, pour chaque texte de démonstration :
+- `scan_s` : scan complet à froid (triage, analyse streamée, réponses) ;
+- `overhead_s` : ce même temps moins la latence simulée par le serveur,
+  c'est-à-dire le coût propre de SUBTEXT (parsing, cache, routage…) ;
+- `scan_cached_s` : second scan du même texte (cache chaud) ;
+- `rerun_s` / `scan_rerun_s` : durée d'un rerun Streamlit à vide et d'un
+  rerun de scan, via `streamlit.testing` ;
+- `session_peak_kb` : pic mémoire (tracemalloc) d'une session complète.
+
+Les résultats sont comparés à `bench/baseline.json` ; le script sort en
+erreur si une mesure dépasse la référence de plus de `--tolerance`, ou si
+la référence manque (sauf `--allow-missing-baseline`).
+
+    python -m bench.run                      # compare à la référence
+    python -m bench.run --update-baseline    # enregistre une nouvelle référence
+    python -m bench.run --cassette bench/cassettes/demos.json            # rejoue les réponses enregistrées
+    python -m bench.run --cassette bench/cassettes/demos.json --record   # les complète (API réelle si OPENAI_API_KEY)
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from bench.mock_server import MockConfig, start_server
+from subtext.demos import DEMOS
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+APP_PATH = os.path.join(os.path.dirname(BENCH_DIR), "App.py")
+# En dessous de ces écarts absolus, une hausse relative est du bruit.
+NOISE_FLOOR = {"s": 0.01, "kb": 256.0}
+
+
+def _median_time(fn: Callable[[], Any], iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples), 4)
+
+
+def bench_engine(server: Any, iterations: int) -> Dict[str, Dict[str, float]]:
+    # Import tardif : le moteur doit voir OPENAI_BASE_URL et la clé de bench.
+    from subtext.cache import analysis_cache
+    from subtext.engine import analyze_text, generate_replies
+
+    def scan(text: str) -> None:
+        analysis = analyze_text(text, on_field=lambda key, value, fields: None)
+        generate_replies(text, analysis, "calme", True, "Calme")
+
+    results: Dict[str, Dict[str, float]] = {"scan_s": {}, "overhead_s": {}, "scan_cached_s": {}}
+    for name, text in DEMOS.items():
+        walls: List[float] = []
+        overheads: List[float] = []
+        for _ in range(iterations):
+            analysis_cache.clear()
+            simulated_before = server.simulated_s
+            started = time.perf_counter()
+            scan(text)
+            wall = time.perf_counter() - started
+            walls.append(wall)
+            overheads.append(wall - (server.simulated_s - simulated_before))
+        results["scan_s"][name] = round(statistics.median(walls), 4)
+        results["overhead_s"][name] = round(max(0.0, statistics.median(overheads)), 4)
+        results["scan_cached_s"][name] = _median_time(lambda: scan(text), iterations)
+    return results
+
+
+def bench_streamlit(iterations: int) -> Dict[str, Dict[str, float]]:
+    """Reruns et mémoire par session via `streamlit.testing` (ignoré si absent)."""
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print("streamlit.testing indisponible : mesures de rerun ignorées.", file=sys.stderr)
+        return {}
+
+    results: Dict[str, Dict[str, float]] = {"rerun_s": {}, "scan_rerun_s": {}, "session_peak_kb": {}}
+    for name, text in DEMOS.items():
+        idle: List[float] = []
+        scans: List[float] = []
+        peaks: List[float] = []
+        for _ in range(iterations):
+            tracemalloc.start()
+            at = AppTest.from_file(APP_PATH, default_timeout=120)
+            at.run()
+            at.text_area(key="input_text").set_value(text)
+            scan_button = next(b for b in at.button if b.label.startswith("🔍 Scanner"))
+            started = time.perf_counter()
+            scan_button.click().run()
+            # Le scan tourne en tâche de fond (subtext/jobs.py) : reruns
+            # jusqu'à ce que son résultat soit reporté dans la session.
+            while not at.session_state["analysis"] and time.perf_counter() - started < 120:
+                time.sleep(0.05)
+                at.run()
+            scans.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            at.run()
+            idle.append(time.perf_counter() - started)
+            peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+            tracemalloc.stop()
+        results["scan_rerun_s"][name] = round(statistics.median(scans), 4)
+        results["rerun_s"][name] = round(statistics.median(idle), 4)
+        results["session_peak_kb"][name] = round(statistics.median(peaks), 1)
+    return results
+
+
+def compare(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """Liste lisible des régressions (mesures présentes des deux côtés)."""
+    regressions = []
+    for metric, values in baseline.items():
+        unit = metric.rsplit("_", 1)[-1]
+        floor = NOISE_FLOOR.get(unit, 0.0)
+        for name, reference in values.items():
+            value = (current.get(metric) or {}).get(name)
+            if value is None:
+                continue
+            if value > reference * (1 + tolerance) and value - reference > floor:
+                regressions.append(f"{metric}[{name}] : {value} (référence {reference}, +{(value / reference - 1) if reference else 0:.0%})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks hors ligne de SUBTEXT (serveur OpenAI simulé).")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--ttft", type=float, default=0.4, help="délai simulé avant le premier token (s)")
+    parser.add_argument("--tokens-per-s", type=float, default=80.0)
+    parser.add_argument("--cassette", help="réponses enregistrées à rejouer")
+    parser.add_argument("--record", action="store_true", help="complète la cassette (API réelle si OPENAI_API_KEY, sinon réponses synthétiques)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--allow-missing-baseline", action="store_true", help="sort sans erreur s'il n'y a pas de référence")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="hausse relative tolérée (0.25 = +25 %%)")
+    parser.add_argument("--output", help="écrit aussi les résultats dans ce fichier JSON")
+    parser.add_argument("--skip-streamlit", action="store_true")
+    args = parser.parse_args(argv)
+
+    config = MockConfig(
+        ttft_s=args.ttft,
+        tokens_per_s=args.tokens_per_s,
+        cassette_path=args.cassette,
+        record=args.record,
+        upstream_key=os.getenv("OPENAI_API_KEY"),
+    )
+    if config.record and not config.cassette_path:
+        parser.error("--record demande --cassette")
+    server = start_server(config)
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ["OPENAI_API_KEY"] = "bench"
+    # Pas d'écriture du journal de télémétrie pendant les mesures.
+    os.environ.setdefault("SUBTEXT_TELEMETRY_PATH", "")
+
+    results = bench_engine(server, args.iterations)
+    if not args.skip_streamlit:
+        results.update(bench_streamlit(args.iterations))
+    server.shutdown()
+
+    report = {"results": results, "mock": {"requests": server.requests, "sources": server.sources}}
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"Référence enregistrée : {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"Pas de référence ({args.baseline}) : relancer avec --update-baseline.", file=sys.stderr)
+        return 0 if args.allow_missing_baseline else 2
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"RÉGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,7 @@
+"""
+Briques internes de SUBTEXT, importables sans Streamlit.
+
+Le script `App.py` est réexécuté à chaque interaction : tout ce qui doit
+survivre d'un rerun à l'autre (caches, compteurs…) vit donc ici, dans des
+modules importés une seule fois par processus.
+"""
@@ -0,0 +1,226 @@
+"""
+Analyse par lots, hors Streamlit.
+
+Lit des messages depuis un fichier JSONL ou CSV, lance N analyses en
+parallèle et écrit chaque résultat dès qu'il arrive dans un JSONL de
+sortie. Ce fichier sert aussi de point de reprise : relancer la même
+commande après un crash ne retraite que les messages manquants.
+
+    python -m subtext.batch messages.jsonl resultats.jsonl --concurrency 8 --replies
+
+Format d'entrée : un objet par ligne (JSONL) ou une ligne par message (CSV),
+avec un champ `text` et, de préférence, un champ `id` stable. À défaut, le
+numéro de ligne sert d'identifiant.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from subtext.engine import analyze_text, generate_replies
+
+logger = logging.getLogger("subtext.batch")
+
+DEFAULT_TONE = {"Calme": "calme", "Roast": "sarcastique / moqueur (déconseillé)"}
+
+
+@dataclass
+class BatchItem:
+    id: str
+    text: str
+
+
+@dataclass
+class BatchStats:
+    total: int = 0
+    skipped: int = 0
+    done: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """Messages traités par seconde depuis le début du run."""
+        processed = self.done + self.failed
+        return processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        processed = self.done + self.failed
+        remaining = self.total - self.skipped - processed
+        eta = remaining / self.throughput if self.throughput > 0 else float("inf")
+        return (
+            f"{processed}/{self.total - self.skipped} traités "
+            f"({self.done} ok, {self.failed} en erreur, {self.skipped} déjà faits) — "
+            f"{self.throughput:.2f} msg/s, ETA {eta:.0f} s"
+        )
+
+
+def _item_id(raw: Any, index: int) -> str:
+    return str(index) if raw is None or raw == "" else str(raw)
+
+
+def read_items(path: str, text_field: str = "text", id_field: str = "id") -> Iterator[BatchItem]:
+    """Lit les messages d'un fichier JSONL ou CSV (selon l'extension)."""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for index, row in enumerate(csv.DictReader(f)):
+                yield BatchItem(id=_item_id(row.get(id_field), index), text=row.get(text_field) or "")
+        return
+    with open(path, encoding="utf-8") as f:
+        for index, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            yield BatchItem(id=_item_id(row.get(id_field), index), text=row.get(text_field) or "")
+
+
+def load_checkpoint(output_path: str, retry_errors: bool = False) -> Set[str]:
+    """
+    Renvoie les ids déjà présents dans le fichier de sortie. Une dernière
+    ligne tronquée (crash pendant l'écriture) est ignorée.
+    """
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if retry_errors and record.get("error"):
+                continue
+            done.add(str(record.get("id")))
+    return done
+
+
+def _terminate_partial_line(output_path: str) -> None:
+    """Referme une ligne tronquée par un crash pour ne pas y coller la suivante."""
+    if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+        return
+    with open(output_path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def process_item(
+    item: BatchItem,
+    with_replies: bool = False,
+    persona_mode: str = "Calme",
+) -> Dict[str, Any]:
+    """Analyse un message (et génère les réponses si demandé)."""
+    started = time.monotonic()
+    record: Dict[str, Any] = {"id": item.id, "analysis": None, "replies": None, "error": None}
+    try:
+        analysis = analyze_text(item.text)
+        record["analysis"] = analysis
+        if analysis and analysis.get("degraded"):
+            # Estimation de secours (backend en panne) : gardée pour info mais
+            # comptée en erreur, pour être reprise avec --retry-errors.
+            record["error"] = "degraded: backend indisponible"
+        elif with_replies and analysis:
+            record["replies"] = generate_replies(
+                original_text=item.text,
+                analysis=analysis,
+                tone_pref=DEFAULT_TONE.get(persona_mode, "calme"),
+                emoji_allowed=True,
+                persona_mode=persona_mode,
+            )
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["elapsed_s"] = round(time.monotonic() - started, 3)
+    return record
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    concurrency: int = 4,
+    with_replies: bool = False,
+    persona_mode: str = "Calme",
+    retry_errors: bool = False,
+    progress_every: int = 25,
+) -> BatchStats:
+    """
+    Traite tous les messages de `input_path` non encore présents dans
+    `output_path`, avec au plus `concurrency` appels LLM simultanés.
+    """
+    items = list(read_items(input_path))
+    already_done = load_checkpoint(output_path, retry_errors=retry_errors)
+    todo = [item for item in items if item.id not in already_done]
+    stats = BatchStats(total=len(items), skipped=len(items) - len(todo))
+    logger.info("%d messages, %d déjà traités, %d à faire", stats.total, stats.skipped, len(todo))
+
+    _terminate_partial_line(output_path)
+    pending: Set[Future] = set()
+    queue = iter(todo)
+    with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=concurrency) as pool:
+
+        def _fill() -> None:
+            # Fenêtre glissante : on ne soumet pas des milliers de tâches d'un coup.
+            while len(pending) < concurrency * 2:
+                item = next(queue, None)
+                if item is None:
+                    return
+                pending.add(pool.submit(process_item, item, with_replies, persona_mode))
+
+        _fill()
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                pending.discard(future)
+                record = future.result()
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                os.fsync(out.fileno())
+                if record["error"]:
+                    stats.failed += 1
+                    logger.warning("message %s en erreur : %s", record["id"], record["error"])
+                else:
+                    stats.done += 1
+                if (stats.done + stats.failed) % progress_every == 0:
+                    logger.info(stats.summary())
+            _fill()
+
+    logger.info("Terminé en %.1f s — %s", stats.elapsed, stats.summary())
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyse SUBTEXT par lots (JSONL ou CSV).")
+    parser.add_argument("input", help="fichier d'entrée .jsonl ou .csv")
+    parser.add_argument("output", help="fichier de sortie .jsonl (sert aussi de point de reprise)")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="appels LLM simultanés")
+    parser.add_argument("--replies", action="store_true", help="génère aussi les réponses suggérées")
+    parser.add_argument("--persona", choices=["Calme", "Roast"], default="Calme")
+    parser.add_argument("--retry-errors", action="store_true", help="retraite les messages en erreur")
+    parser.add_argument("--progress-every", type=int, default=25)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    stats = run_batch(
+        args.input,
+        args.output,
+        concurrency=max(1, args.concurrency),
+        with_replies=args.replies,
+        persona_mode=args.persona,
+        retry_errors=args.retry_errors,
+        progress_every=max(1, args.progress_every),
+    )
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Cache mémoire des résultats LLM, adressé par le contenu.
+
+La clé dépend du texte normalisé, du modèle et de la version du prompt :
+un même mail recollé (ou un bouton de démo recliqué) ressort en quelques
+millisecondes au lieu de relancer un appel de 10–20 s.
+"""
+import copy
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalise un texte pour la clé de cache (NFC, espaces compactés)."""
+    text = unicodedata.normalize("NFC", text or "")
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def make_cache_key(text: str, *parts: Any) -> str:
+    """
+    Construit une clé stable à partir du texte normalisé et de composants
+    additionnels (modèle, version de prompt…).
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\x00")
+    h.update(normalize_text(text).encode("utf-8"))
+    return h.hexdigest()
+
+
+class TTLCache:
+    """
+    Cache LRU borné avec expiration (TTL) et compteurs hit/miss.
+
+    Thread-safe : Streamlit sert plusieurs sessions depuis le même processus.
+    Les valeurs sont copiées en lecture comme en écriture pour qu'une session
+    ne puisse pas modifier le résultat servi à une autre (`copy_values=False`
+    pour des valeurs immuables, qu'il est inutile de copier).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: Optional[float] = 3600.0,
+        copy_values: bool = True,
+    ) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self.copy_values = copy_values
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def _is_expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - stored_at > self.ttl_seconds
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            stored_at, value = entry
+            if self._is_expired(stored_at, now):
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value) if self.copy_values else value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.copy_values:
+            value = copy.deepcopy(value)
+        now = time.monotonic()
+        with self._lock:
+            self._data[key] = (now, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+# Instance partagée par toutes les sessions du processus.
+analysis_cache = TTLCache(max_entries=256, ttl_seconds=6 * 3600)
@@ -0,0 +1,91 @@
+"""
+Client OpenAI partagé, créé à la demande.
+
+Le SDK n'est importé et le client construit qu'au premier appel LLM : ouvrir
+la page ou cliquer sur une démo ne coûte rien, et l'app démarre même sans
+clé d'API configurée. Un seul client par processus, avec un pool de
+connexions HTTP keep-alive réglable, pour que les scans successifs (et
+toutes les sessions) réutilisent les connexions TLS déjà ouvertes.
+"""
+import os
+import threading
+from typing import Any, Optional
+
+# Pool HTTP et délais (secondes), réglables par variables d'environnement.
+HTTP_MAX_CONNECTIONS = int(os.getenv("SUBTEXT_HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("SUBTEXT_HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("SUBTEXT_HTTP_KEEPALIVE_EXPIRY", "120"))
+OPENAI_TIMEOUT = float(os.getenv("SUBTEXT_OPENAI_TIMEOUT", "60"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("SUBTEXT_OPENAI_CONNECT_TIMEOUT", "5"))
+# Ouvre la connexion TLS en arrière-plan au démarrage de l'app.
+PREWARM_ENABLED = os.getenv("SUBTEXT_PREWARM", "on") != "off"
+
+_client: Optional[Any] = None
+_client_lock = threading.Lock()
+_prewarm_started = False
+
+
+class MissingAPIKeyError(RuntimeError):
+    """Aucune clé d'API : l'app tourne, mais sans appel LLM possible."""
+
+
+def is_configured() -> bool:
+    return bool(os.getenv("OPENAI_API_KEY"))
+
+
+def get_client() -> Any:
+    """Client OpenAI du processus, construit au premier appel (thread-safe)."""
+    global _client
+    if _client is not None:
+        return _client
+    with _client_lock:
+        if _client is None:
+            if not is_configured():
+                raise MissingAPIKeyError(
+                    "OPENAI_API_KEY n'est pas définie : configure la clé pour lancer une analyse IA."
+                )
+            import httpx
+            from openai import DefaultHttpxClient, OpenAI
+
+            _client = OpenAI(
+                # Nouvelles tentatives gérées par subtext.resilience (délais, disjoncteur).
+                max_retries=0,
+                http_client=DefaultHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+                    ),
+                    timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+                ),
+            )
+    return _client
+
+
+def reset_client() -> None:
+    """Ferme le pool (changement de clé, tests, benchmarks)."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+
+
+def _prewarm(model: str) -> None:
+    try:
+        # Requête gratuite : établit la connexion TLS que le premier scan réutilisera.
+        get_client().with_options(timeout=OPENAI_CONNECT_TIMEOUT * 2, max_retries=0).models.retrieve(model)
+    except Exception:
+        pass
+
+
+def prewarm(model: str) -> None:
+    """Prépare client et connexion en tâche de fond, une fois par processus."""
+    global _prewarm_started
+    if not PREWARM_ENABLED or not is_configured():
+        return
+    with _client_lock:
+        if _prewarm_started:
+            return
+        _prewarm_started = True
+    threading.Thread(target=_prewarm, args=(model,), name="openai-prewarm", daemon=True).start()
@@ -0,0 +1,121 @@
+"""
+Sections différées : décryptage, détail des passages et fact-check à la demande.
+
+La plupart des utilisateurs ne regardent que la carte Diagnostic, mais un
+scan payait d'un bloc la vue systémique, les fact-checks et les longues
+explications des passages. L'analyse bloquante se limite désormais au
+profil « cœur » (voir subtext/profiles.py) ; les sections omises que la
+page affiche sont rédigées en arrière-plan, une par appel, dès le premier
+affichage des résultats, puis fusionnées dans l'analyse de la session.
+
+Les tâches sont partagées par le processus : deux sessions qui affichent la
+même analyse attendent le même appel, et chaque section est en cache
+(texte + résumé de l'analyse). Une section en échec n'est pas relancée
+avant `DEFERRED_RETRY_AFTER_S`, pour ne pas marteler un backend en panne.
+"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from subtext.cache import normalize_text
+from subtext.engine import expand_section, section_key
+
+DEFERRED_MAX_WORKERS = 8
+DEFERRED_RETRY_AFTER_S = 60.0
+# Intervalle de vérification des sections en cours côté interface.
+DEFERRED_POLL_S = 1.0
+_DETAIL_FIELDS = ("simple_definition", "everyday_example", "explanation")
+
+
+def merge_section(analysis: Dict[str, Any], section: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Nouvelle analyse complétée par `fields` ; la section sort de `deferred`."""
+    merged = dict(analysis)
+    # Nouveau contenu : nouvel identifiant de vue (voir subtext/views.py).
+    merged.pop("analysis_id", None)
+    if section == "highlight_details":
+        # Détails rattachés par citation, à défaut par position.
+        details = {normalize_text(d.get("quote") or "").lower(): d for d in fields.get("highlights") or []}
+        ordered = list(fields.get("highlights") or [])
+        highlights = []
+        for i, highlight in enumerate(analysis.get("highlights") or []):
+            detail = details.get(normalize_text(highlight.get("quote") or "").lower())
+            if detail is None and i < len(ordered):
+                detail = ordered[i]
+            highlight = dict(highlight)
+            for key in _DETAIL_FIELDS:
+                if detail and detail.get(key) and not highlight.get(key):
+                    highlight[key] = detail[key]
+            highlights.append(highlight)
+        merged["highlights"] = highlights
+    else:
+        merged.update(fields)
+    remaining = [s for s in analysis.get("deferred") or () if s != section]
+    if remaining:
+        merged["deferred"] = remaining
+    else:
+        merged.pop("deferred", None)
+    return merged
+
+
+class DeferredSections:
+    """Rédaction des sections différées sur un pool borné, partagé par le processus."""
+
+    def __init__(self, max_workers: int = DEFERRED_MAX_WORKERS) -> None:
+        self._max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[str, Future] = {}
+        self._failed: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="subtext-section")
+        return self._pool
+
+    def request(self, text: str, analysis: Dict[str, Any], sections: Iterable[str]) -> None:
+        """Lance en arrière-plan les sections pas encore en cours (sans effet sinon)."""
+        now = time.monotonic()
+        with self._lock:
+            self._failed = {k: v for k, v in self._failed.items() if now - v[0] < DEFERRED_RETRY_AFTER_S}
+            for section in sections:
+                key = section_key(text, analysis, section)
+                if key in self._jobs or key in self._failed:
+                    continue
+                self._jobs[key] = self._executor().submit(expand_section, text, analysis, section)
+
+    def collect(
+        self, text: str, analysis: Dict[str, Any], sections: Iterable[str]
+    ) -> Tuple[Dict[str, Dict[str, Any]], List[str], Dict[str, str]]:
+        """
+        État des sections demandées : (terminées → champs, en cours, en
+        échec → message). Les tâches terminées sont retirées ; leur résultat
+        reste disponible par le cache d'analyse.
+        """
+        ready: Dict[str, Dict[str, Any]] = {}
+        pending: List[str] = []
+        errors: Dict[str, str] = {}
+        with self._lock:
+            for section in sections:
+                key = section_key(text, analysis, section)
+                job = self._jobs.get(key)
+                if job is None:
+                    if key in self._failed:
+                        errors[section] = self._failed[key][1]
+                    continue
+                if not job.done():
+                    pending.append(section)
+                    continue
+                del self._jobs[key]
+                exc = job.exception()
+                if exc is None:
+                    ready[section] = job.result()
+                else:
+                    message = f"{type(exc).__name__}: {exc}"
+                    self._failed[key] = (time.monotonic(), message)
+                    errors[section] = message
+        return ready, pending, errors
+
+
+# Partagé par toutes les sessions du processus.
+deferred_sections = DeferredSections()
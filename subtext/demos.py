@@ -0,0 +1,34 @@
+"""
+Textes de démonstration (boutons de l'app, benchmarks hors ligne).
+"""
+
+DEMO_EMAIL_MANAGER = (
+    "Bonjour,\n\n"
+    "Pour la troisième fois je dois te rappeler cette tâche pourtant simple. "
+    "Je ne vais pas repasser derrière toi indéfiniment : à un moment il va falloir "
+    "te mettre au niveau du reste de l'équipe.\n\n"
+    "Bien à toi."
+)
+DEMO_SMS_RUPTURE = (
+    "écoute, je t'avais prévenu. Si tu faisais un effort on n'en serait pas là. "
+    "Je ne peux pas continuer à être le seul à essayer dans cette relation. "
+    "Tu t'étonnes que je sois froid, mais tu récoltes juste ce que tu as semé."
+)
+DEMO_TWEET_POLITIQUE = (
+    "Sérieux les golems qui croient encore au CDI en 2025... "
+    "Continuez à enrichir votre patron pendant que je fais x10 en dropshipping depuis Bali. "
+    "La sélection est naturelle les shills. 🤡"
+)
+DEMO_FORUM_TOXIC = (
+    "Face à la crise, le gouvernement prend ses responsabilités. "
+    "Il est temps de demander des efforts à ceux qui profitent du système au détriment des travailleurs honnêtes. "
+    "Cette réforme est la seule voie possible pour sauver notre modèle social, n'en déplaise aux agitateurs professionnels."
+)
+
+# Identifiants stables, utilisés comme noms de scénarios par `bench`.
+DEMOS = {
+    "email_manager": DEMO_EMAIL_MANAGER,
+    "sms_rupture": DEMO_SMS_RUPTURE,
+    "tweet_politique": DEMO_TWEET_POLITIQUE,
+    "forum_toxic": DEMO_FORUM_TOXIC,
+}
@@ -0,0 +1,815 @@
+"""
+Moteur d'analyse SUBTEXT, sans dépendance à Streamlit.
+
+Contient les appels LLM (analyse + réponses) utilisés par l'app comme par
+le traitement par lots (`subtext.batch`). Les erreurs sont propagées :
+c'est à l'appelant de décider comment les afficher ou les journaliser.
+"""
+import copy
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from subtext.cache import analysis_cache, make_cache_key
+from subtext.client import get_client
+from subtext.heuristics import prescore, score_to_global_label
+from subtext.incremental import (
+    INCREMENTAL_ENABLED,
+    INCREMENTAL_MAX_CHANGE,
+    INCREMENTAL_RESYNTH_DELTA,
+    can_reuse,
+    merge_incremental,
+    plan_edit,
+)
+from subtext.longdoc import LONG_DOC_THRESHOLD_CHARS, Chunk, reduce_chunk_analyses, split_into_chunks
+from subtext.prompts import (
+    CHUNK_SYSTEM_PROMPT,
+    REPLY_CALM_SYSTEM_PROMPT,
+    REPAIR_USER_PROMPT,
+    REPLY_ROAST_SYSTEM_PROMPT,
+    SECTION_SYSTEM_PROMPT,
+    SYNTHESIS_SYSTEM_PROMPT,
+    TRIAGE_SYSTEM_PROMPT,
+)
+from subtext.neardup import NEARDUP_ENABLED, near_duplicates
+from subtext.profiles import FULL, PROFILES, OutputProfile, covering_profiles, covers, get_profile
+from subtext.resilience import (
+    HEDGE_MIN_SAMPLES,
+    CircuitOpenError,
+    DeadlineExceeded,
+    breaker,
+    call_with_retries,
+    deadline_for,
+    hedged,
+    is_retryable,
+    record_outcome,
+    retry_delay,
+)
+from subtext.routing import (
+    ROUTING_HIGH_RISK,
+    ROUTING_LONG_TEXT_CHARS,
+    RoutingDecision,
+    TriageResult,
+    decide,
+    routing_log,
+)
+from subtext.schema import (
+    CHUNK_SCHEMA,
+    REPLY_SCHEMA,
+    SECTION_SCHEMAS,
+    SYNTHESIS_SCHEMA,
+    Schema,
+    ValidationReport,
+    complete,
+    parse_response,
+    repair_json,
+    schema_stats,
+)
+from subtext.singleflight import inflight
+from subtext.streaming import JsonFieldStreamer
+from subtext.telemetry import CallRecord, telemetry
+from subtext.usage import TokenUsage, extract_usage, usage_ledger
+
+OPENAI_MAIN_MODEL = "gpt-4.1"
+OPENAI_LIGHT_MODEL = "gpt-4.1-mini"
+OPENAI_TRIAGE_MODEL = "gpt-4.1-nano"
+OPENAI_REPLY_MODEL = "gpt-4.1-mini"
+# À incrémenter dès que le prompt d'analyse change : invalide le cache.
+ANALYSIS_PROMPT_VERSION = "2025-06-b"
+
+# Filtre lexical local avant l'appel LLM, pour les textes sous le seuil :
+# "off" (toujours le modèle principal), "downgrade" (modèle léger) ou
+# "skip" (pas d'appel, analyse heuristique minimale).
+PRESCORE_GATE = os.getenv("SUBTEXT_PRESCORE_GATE", "off")
+PRESCORE_THRESHOLD = int(os.getenv("SUBTEXT_PRESCORE_THRESHOLD", "15"))
+
+# Triage par un petit modèle avant l'analyse (voir subtext/routing.py).
+ROUTING_ENABLED = os.getenv("SUBTEXT_ROUTING", "on") != "off"
+TRIAGE_PROMPT_VERSION = "2025-06-a"
+TRIAGE_MAX_CHARS = 3000
+
+# ───────────────── APPELS BRUTS (PRÉFIXE DE PROMPT, TOKENS, TÉLÉMÉTRIE) ─────────────────
+def _cache_routing(call_type: str) -> Dict[str, Any]:
+    # Même clé pour tous les appels d'un type : le fournisseur les envoie vers
+    # les mêmes serveurs, où le préfixe statique est déjà en cache.
+    return {"extra_body": {"prompt_cache_key": f"subtext-{call_type}"}}
+
+def _record_failure(call_type: str, model: str, started: float, exc: BaseException) -> None:
+    telemetry.record(
+        CallRecord(
+            call_type=call_type,
+            model=model,
+            wall_s=round(time.perf_counter() - started, 4),
+            ok=False,
+            error=f"{type(exc).__name__}: {exc}"[:300],
+        )
+    )
+
+def _chat(call_type: str, **request: Any) -> str:
+    """
+    Appel non streamé, avec délai, nouvelles tentatives et hedging (voir
+    subtext/resilience.py) ; renvoie le contenu, comptabilise tokens et latence.
+    """
+    started = time.perf_counter()
+    hedge_after = telemetry.latency_percentile(call_type, 95, min_samples=HEDGE_MIN_SAMPLES)
+
+    def _attempt(timeout: float) -> Any:
+        # Les nouvelles tentatives sont gérées ici, pas par le SDK.
+        client = get_client().with_options(timeout=timeout, max_retries=0)
+        return hedged(
+            lambda: client.chat.completions.create(**request, **_cache_routing(call_type)),
+            hedge_after,
+        )
+
+    try:
+        completion, retries = call_with_retries(_attempt, call_type)
+    except Exception as exc:
+        _record_failure(call_type, request["model"], started, exc)
+        raise
+    usage = usage_ledger.record(extract_usage(call_type, request["model"], completion.usage))
+    telemetry.record(CallRecord.from_usage(usage, time.perf_counter() - started, retries=retries))
+    return completion.choices[0].message.content
+
+def _chat_stream(call_type: str, **request: Any) -> Iterator[str]:
+    """
+    Appel streamé ; produit les morceaux de texte, l'usage arrive en dernier.
+    Une erreur transitoire n'est retentée qu'avant le premier morceau reçu.
+    """
+    started = time.perf_counter()
+    deadline = time.monotonic() + deadline_for(call_type)
+    first_token: Optional[float] = None
+    usage: Optional[TokenUsage] = None
+    retries = 0
+    while True:
+        try:
+            breaker.check()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"délai de {deadline_for(call_type):.0f}s dépassé ({call_type})")
+            stream = get_client().with_options(timeout=remaining, max_retries=0).chat.completions.create(
+                stream=True,
+                stream_options={"include_usage": True},
+                **request,
+                **_cache_routing(call_type),
+            )
+            for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    usage = extract_usage(call_type, request["model"], chunk.usage)
+                if chunk.choices:
+                    delta = chunk.choices[0].delta.content or ""
+                    if delta and first_token is None:
+                        first_token = time.perf_counter() - started
+                    yield delta
+                if time.monotonic() > deadline:
+                    raise DeadlineExceeded(f"délai de {deadline_for(call_type):.0f}s dépassé ({call_type})")
+            record_outcome(None)
+            break
+        except CircuitOpenError as exc:
+            _record_failure(call_type, request["model"], started, exc)
+            raise
+        except Exception as exc:
+            record_outcome(exc)
+            delay = None if first_token is not None else retry_delay(exc, retries, deadline)
+            if delay is None:
+                _record_failure(call_type, request["model"], started, exc)
+                raise
+            time.sleep(delay)
+            retries += 1
+    usage = usage_ledger.record(usage or TokenUsage(call_type, request["model"]))
+    telemetry.record(
+        CallRecord.from_usage(
+            usage,
+            time.perf_counter() - started,
+            ttft_s=round(first_token, 4) if first_token is not None else None,
+            retries=retries,
+        )
+    )
+
+def _validated(schema: Schema, content: str, request: Dict[str, Any]) -> Tuple[Dict[str, Any], ValidationReport]:
+    """
+    Réponse JSON réparée et validée (voir subtext/schema.py). Les champs
+    obligatoires manquants (réponse tronquée, oubli du modèle) sont
+    redemandés seuls, une fois ; à défaut ils gardent une valeur neutre.
+    """
+    data, report = parse_response(content, schema)
+    if report.missing:
+        try:
+            follow_up = _chat(
+                "repair",
+                model=request["model"],
+                messages=[
+                    *request["messages"],
+                    {"role": "assistant", "content": content},
+                    {"role": "user", "content": REPAIR_USER_PROMPT + ", ".join(report.missing)},
+                ],
+                response_format={"type": "json_object"},
+                temperature=request.get("temperature", 0.2),
+            )
+            data = complete(data, repair_json(follow_up) or {}, schema, report)
+        except Exception:
+            pass
+    schema_stats.record(report)
+    return data, report
+
+# ───────────────── LLM : TRIAGE + ROUTAGE ─────────────────
+def triage_text(text: str) -> TriageResult:
+    """
+    Classement express par le modèle de triage : type de contenu, score
+    grossier et confiance. Résultat mis en cache comme les analyses.
+    """
+    cache_key = make_cache_key(text, OPENAI_TRIAGE_MODEL, TRIAGE_PROMPT_VERSION)
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        result = TriageResult.from_json(cached)
+        result.cached = True
+        return result
+    started = time.monotonic()
+
+    def _call(emit: Callable[[Any], None]) -> Dict[str, Any]:
+        content = _chat(
+            "triage",
+            model=OPENAI_TRIAGE_MODEL,
+            messages=[
+                {"role": "system", "content": TRIAGE_SYSTEM_PROMPT},
+                {"role": "user", "content": text[:TRIAGE_MAX_CHARS]},
+            ],
+            response_format={"type": "json_object"},
+            temperature=0,
+            max_tokens=60,
+        )
+        data = json.loads(content)
+        analysis_cache.set(cache_key, data)
+        return data
+
+    data, _ = inflight.do(cache_key, _call)
+    return TriageResult.from_json(data, latency_s=round(time.monotonic() - started, 3))
+
+def route_text(text: str, pre_score: int) -> RoutingDecision:
+    """
+    Décide du modèle d'analyse. Le triage est évité quand le pré-score ou la
+    longueur imposent déjà le modèle complet ; s'il échoue, on escalade.
+    """
+    triage: Optional[TriageResult] = None
+    if pre_score < ROUTING_HIGH_RISK and len(text) <= ROUTING_LONG_TEXT_CHARS:
+        try:
+            triage = triage_text(text)
+        except Exception:
+            triage = None
+    return decide(text, OPENAI_MAIN_MODEL, OPENAI_LIGHT_MODEL, triage=triage, prescore=pre_score)
+
+# ───────────────── LLM : ANALYSE (VERSION BOOSTÉE / ÉDUCATIVE + SYSTÉMIQUE) ─────────────────
+def _fallback_analysis(text: str) -> Dict[str, Any]:
+    """
+    Résultat de secours quand le backend est indisponible : une analyse déjà
+    en cache pour ce texte (quel que soit le modèle), sinon le pré-score
+    local. Marqué `degraded` et jamais mis en cache.
+    """
+    keys = [_analysis_cache_key(text, model, profile) for profile in PROFILES.values() for model in (OPENAI_MAIN_MODEL, OPENAI_LIGHT_MODEL)]
+    keys.append(make_cache_key(text, OPENAI_MAIN_MODEL, "long", LONG_DOC_PROMPT_VERSION))
+    for key in keys:
+        cached = analysis_cache.get(key)
+        if cached is not None:
+            cached["degraded"] = True
+            return cached
+    analysis = prescore(text).to_analysis()
+    analysis["main_effect"] = "Analyse IA momentanément indisponible : estimation locale à partir des signaux repérés."
+    analysis["degraded"] = True
+    return analysis
+
+def _analysis_cache_key(text: str, model: str, profile: Any) -> str:
+    # Clé du profil complet inchangée : le cache existant reste valide.
+    if profile is FULL:
+        return make_cache_key(text, model, ANALYSIS_PROMPT_VERSION)
+    return make_cache_key(text, model, ANALYSIS_PROMPT_VERSION, profile.name)
+
+def _cached_analysis(text: str, model: str, output: OutputProfile) -> Optional[Dict[str, Any]]:
+    # Une analyse complète déjà en cache sert aussi le profil compact.
+    for key in dict.fromkeys((_analysis_cache_key(text, model, FULL), _analysis_cache_key(text, model, output))):
+        cached = analysis_cache.get(key)
+        if cached is not None and covers(cached, output):
+            return cached
+    return None
+
+def analyze_text(
+    text: str,
+    on_field: Optional[Callable[[str, Any, Dict[str, Any]], None]] = None,
+    gate: Optional[str] = None,
+    model: Optional[str] = None,
+    profile: Optional[str] = None,
+    reuse_similar: bool = True,
+) -> Optional[Dict[str, Any]]:
+    """
+    Appelle le modèle OpenAI pour analyser un texte et renvoie un JSON
+    conforme au schéma attendu par tout le reste de l'app. Si le texte
+    est vide, retourne None. Les erreurs d'appel ou de JSON sont propagées.
+
+    Si `on_field` est fourni, la réponse est lue en streaming et le callback
+    est appelé avec (clé, valeur, champs déjà reçus) à chaque champ de
+    premier niveau refermé, dans l'ordre du schéma.
+
+    `gate` remplace `PRESCORE_GATE` pour cet appel. Sans `model` explicite,
+    le modèle est choisi par ce filtre puis par le routage ; le forcer
+    (ex : `OPENAI_MAIN_MODEL`) court-circuite les deux.
+
+    `profile` (« full » par défaut, « compact » ou « core ») choisit les
+    champs demandés au modèle (voir subtext/profiles.py) ; les sections
+    omises sont listées dans `deferred`, à compléter avec `expand_section`.
+    Les documents longs
+    passent toujours par l'analyse par morceaux, au profil complet.
+
+    Sans `model` explicite et avec `reuse_similar`, un quasi-doublon d'un
+    texte déjà analysé reprend son analyse (voir subtext/neardup.py).
+    """
+    if not text.strip():
+        return None
+    if len(text) > LONG_DOC_THRESHOLD_CHARS:
+        try:
+            return analyze_long_text(text, on_field=on_field)
+        except Exception as exc:
+            if isinstance(exc, CircuitOpenError) or is_retryable(exc):
+                return _fallback_analysis(text)
+            raise
+    gate = PRESCORE_GATE if gate is None else gate
+    decision: Optional[RoutingDecision] = None
+    output = get_profile(profile)
+    # Avant le filtre et le routage : un quasi-doublon évite aussi l'appel de tri.
+    if reuse_similar and model is None and not any(
+        _cached_analysis(text, m, output) for m in (OPENAI_MAIN_MODEL, OPENAI_LIGHT_MODEL)
+    ):
+        reused = _reuse_near_duplicate(text, output, on_field)
+        if reused is not None:
+            return reused
+    if model is None:
+        model = OPENAI_MAIN_MODEL
+        pre = prescore(text)
+        if gate in ("downgrade", "skip") and pre.global_score < PRESCORE_THRESHOLD:
+            if gate == "skip":
+                return pre.to_analysis()
+            model = OPENAI_LIGHT_MODEL
+        elif ROUTING_ENABLED:
+            decision = route_text(text, pre.global_score)
+            model = decision.analysis_model
+    cache_key = _analysis_cache_key(text, model, output)
+    cached = _cached_analysis(text, model, output)
+    if cached is not None:
+        return cached
+    # Préfixe statique d'abord, texte variable en dernier (voir subtext/prompts.py).
+    user_prompt = f"Texte à analyser (en français) :\n\n{text}"
+    request = dict(
+        model=model,
+        messages=[
+            {"role": "system", "content": output.system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        response_format={"type": "json_object"},
+        temperature=0.2,
+    )
+
+    def _call(emit: Callable[[Any], None]) -> Dict[str, Any]:
+        started = time.monotonic()
+        try:
+            if on_field is None:
+                content = _chat("analysis", **request)
+            else:
+                streamer = JsonFieldStreamer()
+                try:
+                    for delta in _chat_stream("analysis", **request):
+                        for key, value in streamer.feed(delta):
+                            emit((key, value, dict(streamer.fields)))
+                except Exception:
+                    # Coupure en plein streaming : les champs déjà reçus sont
+                    # gardés, le reste est redemandé par `_validated`.
+                    if not streamer.fields:
+                        raise
+                content = streamer.text
+        except Exception as exc:
+            # Backend en panne (disjoncteur ouvert, tentatives épuisées) : on
+            # sert un résultat de secours plutôt que de perdre le scan.
+            if isinstance(exc, CircuitOpenError) or is_retryable(exc):
+                return _fallback_analysis(text)
+            raise
+        data, report = _validated(output.schema, content, request)
+        if output.omits:
+            data["deferred"] = list(output.omits)
+        elapsed = time.monotonic() - started
+        if decision is not None:
+            decision.analysis_latency_s = round(elapsed, 3)
+            routing_log.record(decision, OPENAI_MAIN_MODEL)
+        else:
+            routing_log.observe_latency(model, elapsed)
+        # Un résultat encore incomplet n'est pas figé en cache.
+        if not report.missing:
+            analysis_cache.set(cache_key, data)
+            near_duplicates.add(text, data, model, ANALYSIS_PROMPT_VERSION, output.name)
+        return data
+
+    # Même texte scanné au même moment par plusieurs sessions (post viral) :
+    # un seul appel, dont les champs streamés et le résultat sont partagés.
+    data, _ = inflight.do(
+        cache_key,
+        _call,
+        on_event=(lambda event: on_field(*event)) if on_field is not None else None,
+    )
+    return data
+
+def _replay_fields(analysis: Dict[str, Any], on_field: Optional[Callable[[str, Any, Dict[str, Any]], None]]) -> None:
+    """Rejoue un résultat obtenu sans streaming, champ par champ, pour `on_field`."""
+    if on_field is None:
+        return
+    fields: Dict[str, Any] = {}
+    for key, value in analysis.items():
+        fields[key] = value
+        on_field(key, value, fields)
+
+def _reuse_near_duplicate(
+    text: str,
+    output: OutputProfile,
+    on_field: Optional[Callable[[str, Any, Dict[str, Any]], None]],
+) -> Optional[Dict[str, Any]]:
+    """
+    Analyse tirée d'un quasi-doublon déjà analysé : reprise telle quelle si
+    seuls la ponctuation, la casse ou les emojis changent, sinon réanalyse
+    des seules phrases qui diffèrent. None si aucun texte assez proche.
+    """
+    if not NEARDUP_ENABLED:
+        return None
+    # Mêmes conditions que le cache exact : modèles du routage, version de
+    # prompt courante, profil contenant tous les champs demandés.
+    match = near_duplicates.find(
+        text,
+        models=(OPENAI_MAIN_MODEL, OPENAI_LIGHT_MODEL),
+        prompt_version=ANALYSIS_PROMPT_VERSION,
+        profiles=covering_profiles(output),
+    )
+    if match is None:
+        return None
+    origin = {"similarity": match.similarity, "identical": match.identical}
+    if match.identical:
+        analysis = match.analysis
+        analysis["analysis_source"] = "near_duplicate"
+        analysis["near_duplicate"] = origin
+        _replay_fields(analysis, on_field)
+        return analysis
+    analysis = analyze_text_incremental(
+        text, match.text, match.analysis, on_field=on_field, profile=output.name, reuse_similar=False
+    )
+    # Écart trop grand : `analysis` vient d'une analyse complète, pas du doublon.
+    if analysis and analysis.get("analysis_source") == "incremental":
+        analysis["near_duplicate"] = origin
+    return analysis
+
+# ───────────────── LLM : DOCUMENTS LONGS (MAP-REDUCE) ─────────────────
+LONG_DOC_PROMPT_VERSION = "2025-06-a"
+LONG_DOC_MAX_WORKERS = 6
+# Début du document transmis à l'appel de synthèse, pour le contexte.
+LONG_DOC_SYNTHESIS_EXCERPT_CHARS = 1500
+
+def _analyze_chunk(chunk: Chunk, total: int) -> Dict[str, Any]:
+    """Analyse compacte d'un morceau : scores, signaux, passages, fact-checks."""
+    cache_key = make_cache_key(chunk.text, OPENAI_MAIN_MODEL, "chunk", LONG_DOC_PROMPT_VERSION)
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    request = dict(
+        model=OPENAI_MAIN_MODEL,
+        messages=[
+            {"role": "system", "content": CHUNK_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Extrait {chunk.index + 1}/{total} :\n\n{chunk.text}"},
+        ],
+        response_format={"type": "json_object"},
+        temperature=0.2,
+    )
+
+    def _call(emit: Callable[[Any], None]) -> Dict[str, Any]:
+        data, report = _validated(CHUNK_SCHEMA, _chat("chunk", **request), request)
+        if not report.missing:
+            analysis_cache.set(cache_key, data)
+        return data
+
+    data, _ = inflight.do(cache_key, _call)
+    return data
+
+def _synthesize_long_document(
+    text: str,
+    merged: Dict[str, Any],
+    chunk_effects: List[str],
+) -> Dict[str, Any]:
+    """Appel court qui rédige les champs de synthèse à partir de la fusion."""
+    summary = {
+        "content_type": merged.get("content_type"),
+        "global_score": merged.get("global_score"),
+        "hostility": merged.get("hostility"),
+        "manipulation": merged.get("manipulation"),
+        "pressure": merged.get("pressure"),
+        "tags": merged.get("tags"),
+        "effets_par_morceau": chunk_effects,
+        "techniques_reperees": [
+            {"quote": h.get("quote"), "technique": h.get("technique_name")} for h in merged.get("highlights", [])
+        ],
+    }
+    user_prompt = (
+        f"Début du document :\n{text[:LONG_DOC_SYNTHESIS_EXCERPT_CHARS]}\n\n"
+        f"Fusion des analyses par morceaux :\n{json.dumps(summary, ensure_ascii=False)}"
+    )
+    request = dict(
+        model=OPENAI_MAIN_MODEL,
+        messages=[
+            {"role": "system", "content": SYNTHESIS_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt},
+        ],
+        response_format={"type": "json_object"},
+        temperature=0.2,
+    )
+    data, _ = _validated(SYNTHESIS_SCHEMA, _chat("synthesis", **request), request)
+    return data
+
+def analyze_long_text(
+    text: str,
+    on_field: Optional[Callable[[str, Any, Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Mode document long : morceaux analysés en parallèle, fusion
+    déterministe, puis un appel de synthèse. La latence suit le morceau le
+    plus lent plutôt que la longueur totale. `on_field` reçoit d'abord les
+    scores fusionnés, puis les champs de synthèse.
+    """
+    cache_key = make_cache_key(text, OPENAI_MAIN_MODEL, "long", LONG_DOC_PROMPT_VERSION)
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    chunks = split_into_chunks(text)
+    errors: List[Exception] = []
+
+    def _safe_chunk(chunk: Chunk) -> Optional[Dict[str, Any]]:
+        try:
+            return _analyze_chunk(chunk, len(chunks))
+        except Exception as e:
+            errors.append(e)
+            return None
+
+    with ThreadPoolExecutor(max_workers=min(LONG_DOC_MAX_WORKERS, len(chunks))) as pool:
+        partials = list(pool.map(_safe_chunk, chunks))
+    if not any(partials):
+        raise errors[0] if errors else ValueError("aucun morceau analysé")
+
+    merged = reduce_chunk_analyses(chunks, partials)
+    fields: Dict[str, Any] = {}
+
+    def _emit(key: str, value: Any) -> None:
+        fields[key] = value
+        if on_field is not None:
+            on_field(key, value, fields)
+
+    for key in ("content_type", "global_score", "tags", "hostility", "manipulation", "pressure"):
+        _emit(key, merged[key])
+    chunk_effects = [p["main_effect"] for p in partials if p and p.get("main_effect")]
+    synthesis = _synthesize_long_document(text, merged, chunk_effects)
+
+    analysis = {
+        "content_type": merged["content_type"],
+        "global_score": merged["global_score"],
+        "global_label": synthesis.get("global_label") or score_to_global_label(merged["global_score"]),
+        "main_effect": synthesis.get("main_effect", ""),
+        "secondary_effects": merged["secondary_effects"],
+        "tags": merged["tags"],
+        "hostility": merged["hostility"],
+        "manipulation": merged["manipulation"],
+        "pressure": merged["pressure"],
+        "profile": synthesis.get("profile", {}),
+        "plain_translation": synthesis.get("plain_translation", ""),
+        "systemic_view": synthesis.get("systemic_view", {}),
+        "highlights": merged["highlights"],
+        "fact_checks": merged["fact_checks"],
+        "recommended_actions": merged["recommended_actions"],
+        "reaction_validation": synthesis.get("reaction_validation", ""),
+        "viral_punchline": synthesis.get("viral_punchline", ""),
+    }
+    for key, value in analysis.items():
+        if key not in fields:
+            _emit(key, value)
+    # Un morceau en échec rend le résultat partiel : on ne le fige pas en cache.
+    if not errors:
+        analysis_cache.set(cache_key, analysis)
+    return analysis
+
+# ───────────────── LLM : RÉANALYSE INCRÉMENTALE ─────────────────
+# Champs rédigés réécrits quand une retouche fait bouger le score global.
+INCREMENTAL_SYNTHESIS_FIELDS = (
+    "global_label",
+    "main_effect",
+    "profile",
+    "plain_translation",
+    "systemic_view",
+    "reaction_validation",
+    "viral_punchline",
+)
+
+def analyze_text_incremental(
+    text: str,
+    previous_text: str,
+    previous_analysis: Optional[Dict[str, Any]],
+    on_field: Optional[Callable[[str, Any, Dict[str, Any]], None]] = None,
+    profile: Optional[str] = None,
+    reuse_similar: bool = True,
+) -> Optional[Dict[str, Any]]:
+    """
+    Réanalyse `text` à partir de l'analyse de `previous_text` : seules les
+    régions modifiées sont envoyées au modèle (en parallèle), puis fusionnées
+    avec l'analyse précédente. Retombe sur `analyze_text` quand l'écart est
+    trop grand ou que la base n'est pas réutilisable. `on_field` reçoit les
+    champs du résultat final, dans l'ordre du schéma. Une base au profil
+    compact ne sert pas une analyse complète. Un texte inchangé renvoie
+    l'analyse précédente. `reuse_similar` est transmis à `analyze_text` en
+    cas de repli.
+    """
+    reusable = can_reuse(previous_analysis) and covers(previous_analysis, get_profile(profile))
+    if not INCREMENTAL_ENABLED or not reusable or not text.strip():
+        return analyze_text(text, on_field=on_field, profile=profile, reuse_similar=reuse_similar)
+    plan = plan_edit(previous_text, text)
+    if plan.is_noop:
+        # Mêmes phrases (aux espaces près) : l'analyse précédente
+        # vaut telle quelle, sans fusion ni nouvelle génération incrémentale.
+        analysis = copy.deepcopy(previous_analysis)
+        _replay_fields(analysis, on_field)
+        return analysis
+    if plan.change_ratio > INCREMENTAL_MAX_CHANGE or not plan.unchanged_text():
+        return analyze_text(text, on_field=on_field, profile=profile, reuse_similar=reuse_similar)
+
+    regions = [Chunk(index=i, text=t) for i, t in enumerate(plan.region_texts())]
+    try:
+        partials: List[Dict[str, Any]] = []
+        if regions:
+            with ThreadPoolExecutor(max_workers=min(LONG_DOC_MAX_WORKERS, len(regions))) as pool:
+                partials = list(pool.map(lambda chunk: _analyze_chunk(chunk, len(regions)), regions))
+    except Exception:
+        # Une région en échec : la fusion serait bancale, on repart de zéro.
+        return analyze_text(text, on_field=on_field, profile=profile, reuse_similar=reuse_similar)
+
+    analysis = merge_incremental(previous_analysis, plan, previous_text, text, partials)
+    if abs(analysis["global_score"] - int(previous_analysis.get("global_score") or 0)) >= INCREMENTAL_RESYNTH_DELTA:
+        effects = [p["main_effect"] for p in partials if p.get("main_effect")]
+        try:
+            synthesis = _synthesize_long_document(text, analysis, effects)
+        except Exception:
+            synthesis = {}
+        for key in INCREMENTAL_SYNTHESIS_FIELDS:
+            if synthesis.get(key):
+                analysis[key] = synthesis[key]
+
+    _replay_fields(analysis, on_field)
+    return analysis
+
+# ───────────────── LLM : SECTIONS DIFFÉRÉES ─────────────────
+SECTION_PROMPT_VERSION = "2025-07-a"
+# Champs de l'analyse cœur rappelés au modèle pour rédiger une section.
+SECTION_SUMMARY_FIELDS = ("content_type", "global_score", "global_label", "main_effect", "tags", "profile", "plain_translation")
+
+def _section_request(text: str, analysis: Dict[str, Any], section: str) -> Tuple[str, Dict[str, Any]]:
+    summary = {key: analysis.get(key) for key in SECTION_SUMMARY_FIELDS}
+    if section == "highlight_details":
+        summary["highlights"] = [
+            {"quote": h.get("quote"), "technique_name": h.get("technique_name")}
+            for h in analysis.get("highlights") or []
+        ]
+    user_prompt = (
+        f"Section demandée : {section}\n\n"
+        f"Résumé de l'analyse :\n{json.dumps(summary, ensure_ascii=False)}\n\n"
+        f"Texte analysé :\n\n{text}"
+    )
+    request = dict(
+        model=OPENAI_MAIN_MODEL,
+        messages=[
+            {"role": "system", "content": SECTION_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt},
+        ],
+        response_format={"type": "json_object"},
+        temperature=0.3,
+    )
+    return make_cache_key(user_prompt, OPENAI_MAIN_MODEL, "section", SECTION_PROMPT_VERSION), request
+
+def section_key(text: str, analysis: Dict[str, Any], section: str) -> str:
+    """Clé de cache d'une section : texte, section et résumé de l'analyse cœur."""
+    return _section_request(text, analysis, section)[0]
+
+def expand_section(text: str, analysis: Dict[str, Any], section: str) -> Dict[str, Any]:
+    """
+    Rédige une section omise par un profil partiel (voir subtext/profiles.py)
+    et renvoie ses seuls champs, à fusionner avec `deferred.merge_section`.
+    Les erreurs sont propagées.
+    """
+    schema = SECTION_SCHEMAS[section]
+    cache_key, request = _section_request(text, analysis, section)
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    def _call(emit: Callable[[Any], None]) -> Dict[str, Any]:
+        data, report = _validated(schema, _chat("section", **request), request)
+        fields = {key: data[key] for key in schema.fields}
+        if not report.missing:
+            analysis_cache.set(cache_key, fields)
+        return fields
+
+    data, _ = inflight.do(cache_key, _call)
+    return data
+
+# ───────────────── LLM : RÉPONSES (MODE CALME vs ROAST) ─────────────────
+# Seuls champs de l'analyse utilisés pour rédiger les réponses. Ils arrivent
+# en tête du JSON, ce qui permet de lancer la réponse pendant le streaming.
+REPLY_SUMMARY_FIELDS = (
+    "global_score",
+    "global_label",
+    "main_effect",
+    "tags",
+    "hostility",
+    "manipulation",
+    "pressure",
+    "profile",
+    "plain_translation",
+)
+
+def generate_replies(
+    original_text: str,
+    analysis: Dict[str, Any],
+    tone_pref: str,
+    emoji_allowed: bool,
+    persona_mode: str,
+) -> Dict[str, str]:
+    """
+    Génère deux réponses (calme et assertive) à partir du texte original et
+    de l'analyse. Le style de réponse dépend à la fois des
+    préférences de l'utilisateur et du mode sélectionné (Calme vs Roast).
+
+    - En mode « Roast », la réponse utilise toujours un système prompt de type
+      "Khey" et force un style sarcastique / moqueur inspiré de forums 18-25.
+    - En mode « Calme », le comportement reste similaire à l'application
+      originale : le système choisit entre un prompt empathique ou sarcastique
+      selon le ton demandé par l'utilisateur.
+
+    L'argument `emoji_allowed` est conservé mais n'est pas utilisé pour
+    l'instant.
+
+    Peut tourner dans un thread ; les erreurs sont propagées à l'appelant.
+    """
+    if not analysis or not original_text:
+        return {"calm": "", "assertive": ""}
+
+    use_sarcastic = False
+    if persona_mode.lower() == "roast":
+        use_sarcastic = True
+    else:
+        lower_tone = tone_pref.lower() if tone_pref else ""
+        if "sarcastique" in lower_tone or "moqueur" in lower_tone:
+            use_sarcastic = True
+
+    if use_sarcastic:
+        system_prompt = REPLY_ROAST_SYSTEM_PROMPT
+    else:
+        system_prompt = REPLY_CALM_SYSTEM_PROMPT
+
+    summary_for_reply = {
+        "global_score": analysis.get("global_score"),
+        "global_label": analysis.get("global_label"),
+        "main_effect": analysis.get("main_effect"),
+        "tags": analysis.get("tags", []),
+        "hostility": analysis.get("hostility", {}),
+        "manipulation": analysis.get("manipulation", {}),
+        "pressure": analysis.get("pressure", {}),
+        "profile": analysis.get("profile", {}),
+        "plain_translation": analysis.get("plain_translation", ""),
+    }
+
+    # La règle de ton, variable, vient après le prompt système statique (et non
+    # dans un second message système) pour garder un préfixe réutilisable.
+    user_prompt = f"""
+Texte original reçu :
+{original_text}
+
+Résumé d'analyse (ne PAS renvoyer) :
+{json.dumps(summary_for_reply, ensure_ascii=False)}
+
+Préférences utilisateur :
+- Ton souhaité : {tone_pref}
+- Emojis autorisés : {'oui' if emoji_allowed else 'non'}
+
+RÈGLE PRIORITAIRE : le ton demandé par l'utilisateur est « {tone_pref} ». Respecte ce ton dans la forme, le vocabulaire et le niveau de directivité.
+
+Génère UNIQUEMENT un objet json avec deux champs : "calm" et "assertive".
+"""
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+    request = dict(
+        model=OPENAI_REPLY_MODEL,
+        messages=messages,
+        response_format={"type": "json_object"},
+        temperature=0.5 if not use_sarcastic else 0.95,
+    )
+    data, _ = _validated(REPLY_SCHEMA, _chat("reply", **request), request)
+    return {"calm": data["calm"], "assertive": data["assertive"]}
+
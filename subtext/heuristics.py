@@ -0,0 +1,204 @@
+"""
+Pré-score lexical local, sans appel réseau.
+
+Estime en quelques millisecondes l'hostilité, la manipulation et la
+pression d'un texte français à partir de lexiques pondérés et de motifs
+(insultes, culpabilisation, ultimatums, urgence…). Sert à afficher des
+jauges provisoires tout de suite et, si configuré, à éviter ou alléger
+l'appel LLM pour les textes manifestement neutres.
+
+Les étiquettes reprennent le vocabulaire `tags` du prompt d'analyse
+(`TAG_VOCABULARY`).
+"""
+import math
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Pattern, Tuple
+
+@dataclass(frozen=True)
+class LexiconRule:
+    pattern: Pattern[str]
+    tag: str
+    weights: Tuple[float, float, float]  # (hostilité, manipulation, pression)
+    word_start: bool
+
+
+def _rule(regex: str, tag: str, hostility: float = 0.0, manipulation: float = 0.0, pressure: float = 0.0) -> LexiconRule:
+    # Un `\b` en tête empêche `re` de sauter directement aux premiers
+    # caractères possibles (×5 sur un long texte) : on le retire et la limite
+    # de mot est vérifiée à la main dans `prescore`.
+    word_start = regex.startswith(r"\b")
+    if word_start:
+        regex = regex[2:].replace(r"|\b", "|")
+    return LexiconRule(re.compile(regex), tag, (hostility, manipulation, pressure), word_start)
+
+
+# Les motifs s'appliquent au texte en minuscules, apostrophes normalisées ;
+# `\b` est compatible avec les lettres accentuées en Python 3.
+LEXICON: List[LexiconRule] = [
+    # Insultes, mépris
+    _rule(r"\b(golems?|clowns?|abrutis?|cr[ée]tins?|idiots?|d[ée]biles?|connards?|cons?|bouffons?|tocards?|losers?|npc)\b", "intimidation", hostility=3.0),
+    _rule(r"\b(incomp[ée]tente?s?|nuls?|minables?|path[ée]tiques?|ridicules?)\b", "ton sec", hostility=2.0),
+    _rule(r"🤡|🙄|🖕", "sarcasme", hostility=1.5),
+    _rule(r"\b(ferme[- ]la|tais[- ]toi|d[ée]gage)\b", "intimidation", hostility=3.0, pressure=1.0),
+    # Intimidation, ultimatums
+    _rule(r"\bsinon\b|\bdernier avertissement\b|\bderni[èe]re fois\b", "intimidation", hostility=1.0, pressure=2.5),
+    _rule(r"\b(tu vas|vous allez) le regretter\b|\bil y aura des cons[ée]quences\b", "intimidation", hostility=2.5, pressure=2.5),
+    _rule(r"\bil va falloir\b|\bje ne vais pas\b.{0,40}\bind[ée]finiment\b", "management autoritaire", pressure=2.0),
+    _rule(r"\bpour la (deuxi[èe]me|troisi[èe]me|ni[èe]me|[0-9]+e) fois\b|\bje dois te rappeler\b|\brepasser derri[èe]re\b", "passif-agressif", hostility=1.5, pressure=1.5),
+    _rule(r"\bte mettre au niveau\b|\bau niveau du reste\b|\bpourtant simple\b", "management autoritaire", hostility=1.5, manipulation=1.0, pressure=1.0),
+    # Culpabilisation, chantage affectif
+    _rule(r"\bje t'avais (pr[ée]venue?|dit)\b|\bc'est (de )?ta faute\b|\b[àa] cause de toi\b", "culpabilisation", manipulation=2.5),
+    _rule(r"\bsi tu faisais un effort\b|\btu r[ée]coltes\b|\bapr[èe]s tout ce que j'ai fait\b", "culpabilisation", manipulation=2.5, hostility=1.0),
+    _rule(r"\bsi tu m'aimais\b|\bje ne peux (pas|plus) continuer\b|\ble seul [àa] essayer\b|\bla seule [àa] essayer\b", "chantage affectif", manipulation=3.0),
+    _rule(r"\btu t'[ée]tonnes\b|\bne viens pas te plaindre\b", "passif-agressif", hostility=1.5, manipulation=1.0),
+    # Urgence, pression
+    _rule(r"\b(urgent|imm[ée]diatement|tout de suite|sans d[ée]lai|asap|au plus vite|avant ce soir|dernier d[ée]lai)\b", "management autoritaire", pressure=2.0),
+    _rule(r"\b(dernier jour|derni[èe]re chance|plus que quelques heures|offre limit[ée]e)\b", "intimidation", pressure=2.5, manipulation=1.5),
+    # Cadrages politiques / idéologiques
+    _rule(r"\bceux qui profitent\b|\bassist[ée]s\b|\bprofiteurs\b|\bagitateurs\b", "bouc émissaire", hostility=2.0, manipulation=2.0),
+    _rule(r"\bla seule voie\b|\bpas d'autre choix\b|\bil n'y a pas d'alternative\b|\bn'en d[ée]plaise\b", "propagande", manipulation=2.5, pressure=1.0),
+    _rule(r"\bs[ée]lection (est )?naturelle\b|\bquand on veut,? on peut\b|\btravailleurs honn[êe]tes\b|\benrichir (votre|ton) patron\b", "idéologie de mérite individuel", manipulation=2.0, hostility=1.0),
+    _rule(r"\bil est temps\b|\bensemble,? (nous|on)\b|\bmobilis", "mobilisation politique", manipulation=1.0, pressure=1.0),
+    _rule(r"\bs[ée]rieux\b|\bbravo\b.{0,20}\.\.\.|\bf[ée]licitations\b.{0,20}\.\.\.|\bmdr\b|\bptdr\b", "sarcasme", hostility=1.0),
+]
+
+_BENEVOLENT_RE = re.compile(
+    r"\b(merci|avec plaisir|n'h[ée]site pas|bonne (journ[ée]e|soir[ée]e)|bien cordialement|je comprends|pas de souci)\b|🙂|😊|🙏|❤️"
+)
+
+_SHOUT_RE = re.compile(r"\b[A-ZÀ-Ý]{4,}\b")
+_PUNCT_RE = re.compile(r"[!?]{2,}")
+
+# Plus `SATURATION` est grand, plus il faut de signaux pour approcher 100.
+SATURATION = 6.0
+
+
+def score_to_level(score: int) -> str:
+    """Échelle de labels du prompt (très faible → très élevée)."""
+    if score <= 20:
+        return "très faible"
+    if score <= 40:
+        return "faible"
+    if score <= 60:
+        return "moyenne"
+    if score <= 80:
+        return "élevée"
+    return "très élevée"
+
+
+def score_to_global_label(score: int, benevolent: bool = False) -> str:
+    if score <= 20:
+        return "Positif" if benevolent else "Neutre"
+    if score <= 40:
+        return "Ambigu"
+    if score <= 70:
+        return "Tendu"
+    return "Toxique"
+
+
+@dataclass
+class PreScore:
+    hostility: int = 0
+    manipulation: int = 0
+    pressure: int = 0
+    global_score: int = 0
+    tags: List[str] = field(default_factory=list)
+    matches: int = 0
+    benevolent: bool = False
+    elapsed_ms: float = 0.0
+
+    @property
+    def global_label(self) -> str:
+        return score_to_global_label(self.global_score, self.benevolent)
+
+    def as_fields(self) -> Dict[str, Any]:
+        """Champs au format du schéma d'analyse (pour les jauges provisoires)."""
+        return {
+            "global_score": self.global_score,
+            "global_label": self.global_label,
+            "tags": list(self.tags),
+            "hostility": {"score": self.hostility, "label": score_to_level(self.hostility)},
+            "manipulation": {"score": self.manipulation, "label": score_to_level(self.manipulation)},
+            "pressure": {"score": self.pressure, "label": score_to_level(self.pressure)},
+        }
+
+    def to_analysis(self) -> Dict[str, Any]:
+        """
+        Analyse minimale compatible avec le schéma, utilisée quand l'appel LLM
+        est évité. Les sections pédagogiques restent vides.
+        """
+        analysis = self.as_fields()
+        analysis.update(
+            {
+                "content_type": "autre",
+                "main_effect": "Message plutôt neutre : aucun signal de pression ou d'hostilité repéré.",
+                "secondary_effects": [],
+                "profile": {},
+                "plain_translation": "",
+                "systemic_view": {},
+                "highlights": [],
+                "fact_checks": [],
+                "recommended_actions": [],
+                "reaction_validation": "",
+                "viral_punchline": "",
+                "analysis_source": "heuristic",
+            }
+        )
+        return analysis
+
+
+def _saturate(weight: float) -> int:
+    return int(round(100 * (1 - math.exp(-weight / SATURATION))))
+
+
+def prescore(text: str) -> PreScore:
+    """
+    Calcule le pré-score lexical d'un texte : moins d'une ms pour un message,
+    une vingtaine de ms pour un article de 50k caractères.
+    """
+    started = time.perf_counter()
+    low = text.lower().replace("’", "'")
+    totals = [0.0, 0.0, 0.0]
+    tag_weights: Dict[str, float] = defaultdict(float)
+    matches = 0
+    for rule in LEXICON:
+        count = 0
+        for m in rule.pattern.finditer(low):
+            start = m.start()
+            if rule.word_start and start > 0 and low[start - 1].isalnum():
+                continue
+            count += 1
+        if not count:
+            continue
+        matches += count
+        # Rendements décroissants : une insulte répétée 10 fois ne vaut pas 10 insultes.
+        factor = 1.0 + math.log(count)
+        for i, w in enumerate(rule.weights):
+            totals[i] += w * factor
+        tag_weights[rule.tag] += sum(rule.weights) * factor
+
+    shouting = len(_SHOUT_RE.findall(text)) + len(_PUNCT_RE.findall(text))
+    if shouting:
+        totals[0] += 0.8 * (1.0 + math.log(shouting))
+        totals[2] += 0.5 * (1.0 + math.log(shouting))
+
+    benevolent = _BENEVOLENT_RE.search(low) is not None
+    if benevolent and matches == 0:
+        tag_weights["bienveillant"] += 1.0
+
+    hostility, manipulation, pressure = (_saturate(t) for t in totals)
+    global_score = int(round(0.6 * max(hostility, manipulation, pressure) + 0.4 * (hostility + manipulation + pressure) / 3))
+    tags = [t for t, _ in sorted(tag_weights.items(), key=lambda kv: -kv[1])] or ["neutre"]
+    return PreScore(
+        hostility=hostility,
+        manipulation=manipulation,
+        pressure=pressure,
+        global_score=global_score,
+        tags=tags[:5],
+        matches=matches,
+        benevolent=benevolent,
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+    )
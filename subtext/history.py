@@ -0,0 +1,302 @@
+"""
+Historique local des scans, avec recherche plein texte (SQLite + FTS5).
+
+Une analyse ne vivait que dans la session : `reset_app` ou la fin de la
+session la faisait disparaître, et les mêmes mails de manager étaient
+rescannés pour revoir un ancien résultat. Ici, chaque scan terminé est
+enregistré (empreinte du texte, texte, analyse et réponses en JSON, dates),
+un seul enregistrement par texte. Un index FTS5 couvre le texte, les tags et
+l'effet principal : une recherche répond en quelques millisecondes, et la
+liste paginée ne lit que les colonnes légères, jamais le JSON complet.
+
+L'historique est désactivé par défaut : l'interface annonce que les
+messages ne sont pas stockés, et il est partagé par tous les visiteurs du
+serveur. À activer avec `SUBTEXT_HISTORY_PATH` pour un usage local.
+
+    python -m subtext.history list               # derniers scans
+    python -m subtext.history search "réunion"   # recherche plein texte
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from subtext.cache import make_cache_key
+
+# Chemin de la base SQLite ; chaîne vide (défaut) pour désactiver l'historique.
+HISTORY_PATH = os.getenv("SUBTEXT_HISTORY_PATH", "")
+HISTORY_PAGE_SIZE = 20
+HISTORY_PREVIEW_CHARS = 160
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    input_hash TEXT NOT NULL UNIQUE,
+    text TEXT NOT NULL,
+    preview TEXT NOT NULL,
+    persona_mode TEXT,
+    global_score INTEGER,
+    global_label TEXT,
+    main_effect TEXT,
+    tags TEXT,
+    analysis TEXT NOT NULL,
+    replies TEXT,
+    scan_count INTEGER NOT NULL DEFAULT 1,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scans_updated_at ON scans (updated_at DESC);
+CREATE VIRTUAL TABLE IF NOT EXISTS scans_fts USING fts5(
+    text, tags, main_effect,
+    content='scans', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS scans_ai AFTER INSERT ON scans BEGIN
+    INSERT INTO scans_fts (rowid, text, tags, main_effect) VALUES (new.id, new.text, new.tags, new.main_effect);
+END;
+CREATE TRIGGER IF NOT EXISTS scans_ad AFTER DELETE ON scans BEGIN
+    INSERT INTO scans_fts (scans_fts, rowid, text, tags, main_effect) VALUES ('delete', old.id, old.text, old.tags, old.main_effect);
+END;
+CREATE TRIGGER IF NOT EXISTS scans_au AFTER UPDATE OF text, tags, main_effect ON scans BEGIN
+    INSERT INTO scans_fts (scans_fts, rowid, text, tags, main_effect) VALUES ('delete', old.id, old.text, old.tags, old.main_effect);
+    INSERT INTO scans_fts (rowid, text, tags, main_effect) VALUES (new.id, new.text, new.tags, new.main_effect);
+END;
+"""
+_LIST_COLUMNS = "s.id, s.preview, s.persona_mode, s.global_score, s.global_label, s.main_effect, s.tags, s.scan_count, s.created_at, s.updated_at"
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class HistoryEntry:
+    """Ligne de la liste : colonnes légères, sans l'analyse complète."""
+    id: int
+    preview: str
+    persona_mode: Optional[str]
+    global_score: int
+    global_label: str
+    main_effect: str
+    tags: List[str]
+    scan_count: int
+    created_at: float
+    updated_at: float
+    # Extrait du texte autour des termes trouvés (recherche uniquement).
+    snippet: Optional[str] = None
+
+
+def fts_query(query: str) -> str:
+    """Requête FTS5 sûre : chaque mot saisi, en préfixe, tous requis."""
+    return " ".join(f'"{token}"*' for token in _TOKEN_RE.findall(query or ""))
+
+
+class ScanHistory:
+    """Base SQLite partagée par le processus (une connexion, sérialisée par un verrou)."""
+
+    def __init__(self, path: str = HISTORY_PATH) -> None:
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def record(
+        self,
+        text: str,
+        analysis: Dict[str, Any],
+        replies: Optional[Dict[str, str]] = None,
+        persona_mode: Optional[str] = None,
+    ) -> Optional[int]:
+        """
+        Enregistre (ou met à jour) le scan de `text`. Les réponses et le mode
+        absents gardent leur valeur précédente. Renvoie l'identifiant.
+        """
+        if not self.enabled or not text.strip() or not analysis:
+            return None
+        now = time.time()
+        tags = ", ".join(str(t) for t in analysis.get("tags") or [])
+        row = {
+            "input_hash": make_cache_key(text),
+            "text": text,
+            "preview": " ".join(text.split())[:HISTORY_PREVIEW_CHARS],
+            "persona_mode": persona_mode,
+            "global_score": int(analysis.get("global_score") or 0),
+            "global_label": analysis.get("global_label") or "",
+            "main_effect": analysis.get("main_effect") or "",
+            "tags": tags,
+            "analysis": json.dumps(analysis, ensure_ascii=False),
+            "replies": json.dumps(replies, ensure_ascii=False) if replies and any(replies.values()) else None,
+            "now": now,
+        }
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute(
+                    """
+                    INSERT INTO scans (input_hash, text, preview, persona_mode, global_score, global_label,
+                                       main_effect, tags, analysis, replies, created_at, updated_at)
+                    VALUES (:input_hash, :text, :preview, :persona_mode, :global_score, :global_label,
+                            :main_effect, :tags, :analysis, :replies, :now, :now)
+                    ON CONFLICT (input_hash) DO UPDATE SET
+                        persona_mode = COALESCE(excluded.persona_mode, persona_mode),
+                        global_score = excluded.global_score,
+                        global_label = excluded.global_label,
+                        main_effect = excluded.main_effect,
+                        tags = excluded.tags,
+                        analysis = excluded.analysis,
+                        replies = COALESCE(excluded.replies, replies),
+                        scan_count = scan_count + 1,
+                        updated_at = excluded.updated_at
+                    """,
+                    row,
+                )
+            found = db.execute("SELECT id FROM scans WHERE input_hash = ?", (row["input_hash"],)).fetchone()
+        return int(found["id"]) if found else None
+
+    def update_analysis(self, text: str, analysis: Dict[str, Any]) -> None:
+        """Remplace l'analyse enregistrée (sections différées arrivées après coup)."""
+        if not self.enabled or not analysis:
+            return
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute(
+                    "UPDATE scans SET analysis = ? WHERE input_hash = ?",
+                    (json.dumps(analysis, ensure_ascii=False), make_cache_key(text)),
+                )
+
+    def page(self, page: int = 0, query: str = "", page_size: int = HISTORY_PAGE_SIZE) -> Tuple[List[HistoryEntry], int]:
+        """
+        Une page de l'historique, du plus récent au plus ancien, ou des
+        résultats de recherche par pertinence. Renvoie (entrées, total).
+        """
+        if not self.enabled:
+            return [], 0
+        match = fts_query(query)
+        offset = max(0, page) * page_size
+        with self._lock:
+            db = self._db()
+            if not match:
+                total = db.execute("SELECT COUNT(*) FROM scans").fetchone()[0]
+                rows = db.execute(
+                    f"SELECT {_LIST_COLUMNS}, NULL AS snippet FROM scans s ORDER BY s.updated_at DESC LIMIT ? OFFSET ?",
+                    (page_size, offset),
+                ).fetchall()
+            else:
+                total = db.execute("SELECT COUNT(*) FROM scans_fts WHERE scans_fts MATCH ?", (match,)).fetchone()[0]
+                rows = db.execute(
+                    f"""
+                    SELECT {_LIST_COLUMNS}, snippet(scans_fts, 0, '**', '**', '…', 16) AS snippet
+                    FROM scans_fts JOIN scans s ON s.id = scans_fts.rowid
+                    WHERE scans_fts MATCH ?
+                    ORDER BY bm25(scans_fts, 1.0, 2.0, 1.5), s.updated_at DESC
+                    LIMIT ? OFFSET ?
+                    """,
+                    (match, page_size, offset),
+                ).fetchall()
+        return [self._entry(row) for row in rows], int(total)
+
+    def get(self, entry_id: int) -> Optional[Dict[str, Any]]:
+        """Scan complet : texte, analyse, réponses, mode et dates."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._db().execute(
+                "SELECT id, text, analysis, replies, persona_mode, created_at, updated_at FROM scans WHERE id = ?",
+                (entry_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "text": row["text"],
+            "analysis": json.loads(row["analysis"]),
+            "replies": json.loads(row["replies"]) if row["replies"] else {"calm": "", "assertive": ""},
+            "persona_mode": row["persona_mode"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    def find(self, text: str) -> Optional[HistoryEntry]:
+        """Scan déjà enregistré pour ce texte (même texte normalisé)."""
+        if not self.enabled or not text.strip():
+            return None
+        with self._lock:
+            row = self._db().execute(
+                f"SELECT {_LIST_COLUMNS}, NULL AS snippet FROM scans s WHERE s.input_hash = ?",
+                (make_cache_key(text),),
+            ).fetchone()
+        return self._entry(row) if row else None
+
+    def delete(self, entry_id: int) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute("DELETE FROM scans WHERE id = ?", (entry_id,))
+
+    @staticmethod
+    def _entry(row: sqlite3.Row) -> HistoryEntry:
+        return HistoryEntry(
+            id=row["id"],
+            preview=row["preview"],
+            persona_mode=row["persona_mode"],
+            global_score=int(row["global_score"] or 0),
+            global_label=row["global_label"] or "",
+            main_effect=row["main_effect"] or "",
+            tags=[t for t in (row["tags"] or "").split(", ") if t],
+            scan_count=int(row["scan_count"]),
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            snippet=row["snippet"],
+        )
+
+
+# Partagé par toutes les sessions du processus.
+scan_history = ScanHistory()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Historique local des scans SUBTEXT.")
+    parser.add_argument("--path", default=HISTORY_PATH or os.path.join(".subtext", "history.sqlite3"))
+    sub = parser.add_subparsers(dest="command", required=True)
+    listing = sub.add_parser("list", help="derniers scans")
+    listing.add_argument("--page", type=int, default=0)
+    search = sub.add_parser("search", help="recherche plein texte (texte, tags, effet principal)")
+    search.add_argument("query")
+    search.add_argument("--page", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    history = ScanHistory(args.path)
+    started = time.perf_counter()
+    entries, total = history.page(args.page, getattr(args, "query", ""))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for entry in entries:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.updated_at))
+        print(f"#{entry.id}  {when}  {entry.global_score:3d}% {entry.global_label:<8} {entry.snippet or entry.preview}")
+    print(f"{len(entries)}/{total} scan(s) en {elapsed_ms:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
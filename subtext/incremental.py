@@ -0,0 +1,157 @@
+"""
+Réanalyse incrémentale d'un texte retouché.
+
+Changer trois mots puis rescanner relançait toute l'analyse. Ici, le
+nouveau texte est comparé phrase par phrase à la dernière version analysée :
+seules les régions modifiées (avec une phrase de contexte de part et
+d'autre) repartent au modèle, sous forme d'extraits. La fusion avec
+l'analyse précédente est ensuite déterministe :
+- les passages repérés dont la citation est toujours présente sont gardés ;
+- les scores combinent l'analyse précédente (pondérée par le texte
+  inchangé) et celles des régions, comme en mode document long ;
+- une suppression fait baisser les scores d'autant que le pré-score
+  lexical du texte entier a baissé, puisqu'aucun appel ne la réévalue.
+
+Au-delà d'une part de texte modifiée, ou après plusieurs retouches
+successives, la réanalyse complète redevient la règle.
+"""
+import difflib
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from subtext.cache import normalize_text
+from subtext.heuristics import prescore, score_to_global_label, score_to_level
+from subtext.longdoc import AXES, _PARAGRAPH_RE, _SENTENCE_END_RE, Chunk, reduce_chunk_analyses
+
+INCREMENTAL_ENABLED = os.getenv("SUBTEXT_INCREMENTAL", "on") != "off"
+# Part du texte (en caractères) au-delà de laquelle on réanalyse tout.
+INCREMENTAL_MAX_CHANGE = float(os.getenv("SUBTEXT_INCREMENTAL_MAX_CHANGE", "0.35"))
+# Retouches incrémentales successives tolérées avant une analyse complète.
+INCREMENTAL_MAX_GENERATIONS = 3
+INCREMENTAL_CONTEXT_SENTENCES = 1
+# Écart de score global à partir duquel les champs rédigés sont réécrits.
+INCREMENTAL_RESYNTH_DELTA = 10
+
+
+@dataclass
+class EditPlan:
+    """Différence phrase à phrase entre la version analysée et la nouvelle."""
+    sentences: List[str]
+    # Intervalles [début, fin) de phrases du nouveau texte à réanalyser.
+    regions: List[Tuple[int, int]] = field(default_factory=list)
+    added_chars: int = 0
+    removed: List[str] = field(default_factory=list)
+    total_chars: int = 0
+
+    @property
+    def change_ratio(self) -> float:
+        changed = self.added_chars + sum(len(s) for s in self.removed)
+        return changed / self.total_chars if self.total_chars else 1.0
+
+    @property
+    def is_noop(self) -> bool:
+        return not self.regions and not self.removed
+
+    def region_texts(self) -> List[str]:
+        return [" ".join(self.sentences[start:end]) for start, end in self.regions]
+
+    def unchanged_text(self) -> str:
+        inside = {i for start, end in self.regions for i in range(start, end)}
+        return " ".join(s for i, s in enumerate(self.sentences) if i not in inside)
+
+
+def split_sentences(text: str) -> List[str]:
+    sentences: List[str] = []
+    for paragraph in _PARAGRAPH_RE.split(text or ""):
+        for sentence in _SENTENCE_END_RE.split(paragraph.strip()):
+            sentence = sentence.strip()
+            if sentence:
+                sentences.append(sentence)
+    return sentences
+
+
+def plan_edit(old_text: str, new_text: str) -> EditPlan:
+    old = split_sentences(old_text)
+    new = split_sentences(new_text)
+    matcher = difflib.SequenceMatcher(
+        a=[normalize_text(s) for s in old],
+        b=[normalize_text(s) for s in new],
+        autojunk=False,
+    )
+    plan = EditPlan(sentences=new, total_chars=max(len(old_text), len(new_text)))
+    spans: List[Tuple[int, int]] = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        plan.removed.extend(old[i1:i2])
+        if j2 > j1:
+            plan.added_chars += sum(len(s) for s in new[j1:j2])
+            spans.append((max(0, j1 - INCREMENTAL_CONTEXT_SENTENCES), min(len(new), j2 + INCREMENTAL_CONTEXT_SENTENCES)))
+    for start, end in spans:
+        # Régions qui se touchent : un seul extrait.
+        if plan.regions and start <= plan.regions[-1][1]:
+            plan.regions[-1] = (plan.regions[-1][0], max(end, plan.regions[-1][1]))
+        else:
+            plan.regions.append((start, end))
+    return plan
+
+
+def can_reuse(previous: Optional[Dict[str, Any]]) -> bool:
+    """Une analyse de secours ou heuristique ne sert pas de base incrémentale."""
+    if not previous or previous.get("degraded") or previous.get("analysis_source") == "heuristic":
+        return False
+    generation = (previous.get("incremental") or {}).get("generation", 0)
+    return generation < INCREMENTAL_MAX_GENERATIONS
+
+
+def _clamp(value: float) -> int:
+    return max(0, min(100, int(round(value))))
+
+
+def merge_incremental(
+    previous: Dict[str, Any],
+    plan: EditPlan,
+    previous_text: str,
+    new_text: str,
+    partials: Sequence[Optional[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    """
+    Analyse du nouveau texte à partir de l'analyse précédente et de celles
+    des régions modifiées. Les champs rédigés (effet principal, traduction…)
+    sont repris tels quels ; à l'appelant de les réécrire si le score bouge.
+    """
+    present = normalize_text(new_text).lower()
+    base = dict(previous)
+    base["highlights"] = [
+        h for h in previous.get("highlights") or []
+        if normalize_text(str(h.get("quote") or "")).lower() in present
+    ]
+    if plan.removed:
+        # Ce qui a disparu ne pèse plus : on retire sa contribution lexicale.
+        before, after = prescore(previous_text), prescore(new_text)
+        drop = {axis: max(0, getattr(before, axis) - getattr(after, axis)) for axis in AXES}
+        for axis in AXES:
+            score = _clamp(int((previous.get(axis) or {}).get("score") or 0) - drop[axis])
+            base[axis] = {"score": score, "label": score_to_level(score)}
+        base["global_score"] = _clamp(int(previous.get("global_score") or 0) - max(drop.values()))
+
+    chunks = [Chunk(index=0, text=plan.unchanged_text() or " ")]
+    chunks += [Chunk(index=i + 1, text=t) for i, t in enumerate(plan.region_texts())]
+    merged = reduce_chunk_analyses(chunks, [base, *partials])
+
+    analysis = dict(previous)
+    # Nouveau contenu : nouvel identifiant de vue (voir subtext/views.py).
+    analysis.pop("analysis_id", None)
+    for key in ("global_score", *AXES, "tags", "highlights", "fact_checks", "recommended_actions"):
+        analysis[key] = merged[key]
+    if abs(merged["global_score"] - int(previous.get("global_score") or 0)) >= INCREMENTAL_RESYNTH_DELTA:
+        analysis["global_label"] = score_to_global_label(merged["global_score"], "bienveillant" in merged["tags"])
+    analysis["analysis_source"] = "incremental"
+    analysis["incremental"] = {
+        "generation": (previous.get("incremental") or {}).get("generation", 0) + 1,
+        "regions": len(plan.regions),
+        "change_ratio": round(plan.change_ratio, 3),
+        "kept_highlights": len(base["highlights"]),
+    }
+    return analysis
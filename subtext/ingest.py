@@ -0,0 +1,519 @@
+"""
+Récupération d'une page web et extraction de son contenu principal.
+
+Coller une page entière fait analyser (et payer) le menu, le pied de page et
+les bandeaux de cookies. Ici, l'app télécharge l'URL elle-même :
+- session `requests` partagée par le processus, avec pool de connexions ;
+- téléchargement streamé, borné en taille et en durée ;
+- cache disque validé par ETag / Last-Modified : un article déjà récupéré
+  ne revient qu'en 304, sans corps ; borné en entrées, en octets et en âge ;
+- extraction « readability » allégée : on retire le décor, puis on garde
+  `article` / `main` ou, à défaut, le bloc le plus dense en paragraphes.
+
+Par défaut, seules les adresses publiques sont joignables (pas de
+localhost ni de réseau interne) : le nom est vérifié avant la requête, puis
+l'adresse réellement connectée, avant d'envoyer quoi que ce soit (un
+domaine qui change de réponse DNS entre les deux ne passe pas). `allow_private=True` ou
+`SUBTEXT_FETCH_ALLOW_PRIVATE=on` lève ce garde-fou, pour un serveur de test.
+
+    python -m subtext.ingest https://exemple.org/article
+"""
+import argparse
+import hashlib
+import ipaddress
+import json
+import os
+import re
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+FETCH_MAX_BYTES = int(os.getenv("SUBTEXT_FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+FETCH_TIMEOUT = float(os.getenv("SUBTEXT_FETCH_TIMEOUT", "10"))
+FETCH_CONNECT_TIMEOUT = 5.0
+FETCH_MAX_REDIRECTS = 5
+FETCH_ALLOW_PRIVATE = os.getenv("SUBTEXT_FETCH_ALLOW_PRIVATE", "off") == "on"
+# Vide : pas de cache disque.
+HTTP_CACHE_DIR = os.getenv("SUBTEXT_HTTP_CACHE_DIR", os.path.join(".subtext", "http_cache"))
+# Le cache est rempli par les URL des visiteurs : borné en nombre, en taille
+# et en âge, les entrées les plus anciennes partent en premier.
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv("SUBTEXT_HTTP_CACHE_MAX_ENTRIES", "500"))
+HTTP_CACHE_MAX_BYTES = int(os.getenv("SUBTEXT_HTTP_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+HTTP_CACHE_MAX_AGE = float(os.getenv("SUBTEXT_HTTP_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+USER_AGENT = "SUBTEXT.ai/1.0 (+lecture d'article pour analyse)"
+
+_ACCEPTED_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+_CHUNK_BYTES = 16 * 1024
+
+# Décor jamais utile à l'analyse.
+_JUNK_TAGS = [
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "form",
+    "button", "nav", "header", "footer", "aside", "menu", "dialog",
+]
+_UNLIKELY_RE = re.compile(
+    r"cookie|consent|share|social|sidebar|menu|navbar|breadcrumb|newsletter|promo|advert|\bads?\b|banner|related|popup|modal|subscribe",
+    re.I,
+)
+_LIKELY_RE = re.compile(r"article|body|content|main|post|message|thread|story|text", re.I)
+_PARAGRAPH_TAGS = ["p", "li", "blockquote", "pre", "td", "dd"]
+_BLOCK_TAGS = _PARAGRAPH_TAGS + [
+    "h1", "h2", "h3", "h4", "h5", "h6", "dt", "figcaption", "div", "section", "article", "main", "tr",
+]
+_MIN_PARAGRAPH_CHARS = 25
+_MIN_CONTENT_CHARS = 200
+
+
+class FetchError(RuntimeError):
+    """URL refusée ou page impossible à récupérer ; le message est affichable tel quel."""
+
+
+@dataclass
+class FetchedPage:
+    url: str
+    content_type: str
+    encoding: Optional[str]
+    body: bytes
+    from_cache: bool
+    elapsed_s: float
+
+
+@dataclass
+class Article:
+    url: str
+    title: str
+    text: str
+    from_cache: bool
+    bytes: int
+    elapsed_s: float
+
+
+# ───────── Garde-fous sur les adresses ─────────
+def _is_public(address: str) -> bool:
+    return ipaddress.ip_address(address.split("%", 1)[0]).is_global
+
+
+def _resolve(host: str, port: int) -> List[str]:
+    return [info[4][0] for info in socket.getaddrinfo(host, port)]
+
+
+def _public_only_adapter(**kwargs: Any) -> Any:
+    """
+    Adaptateur `requests` dont les connexions vérifient l'adresse du pair
+    juste après le `connect`, avant tout envoi : la résolution faite par
+    `_check_url` ne peut pas être contournée par une seconde réponse DNS.
+    """
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class _PeerCheck:
+        def _new_conn(self) -> socket.socket:
+            sock = super()._new_conn()  # type: ignore[misc]
+            if not _is_public(sock.getpeername()[0]):
+                sock.close()
+                raise FetchError("Adresse locale ou privée refusée.")
+            return sock
+
+    class _HTTPConnection(_PeerCheck, HTTPConnection):
+        pass
+
+    class _HTTPSConnection(_PeerCheck, HTTPSConnection):
+        pass
+
+    class _HTTPPool(HTTPConnectionPool):
+        ConnectionCls = _HTTPConnection
+
+    class _HTTPSPool(HTTPSConnectionPool):
+        ConnectionCls = _HTTPSConnection
+
+    class _Adapter(HTTPAdapter):
+        def init_poolmanager(self, *args: Any, **pool_kwargs: Any) -> None:
+            super().init_poolmanager(*args, **pool_kwargs)
+            self.poolmanager.pool_classes_by_scheme = {"http": _HTTPPool, "https": _HTTPSPool}
+
+    return _Adapter(**kwargs)
+
+
+# ───────── Sessions HTTP partagées ─────────
+_sessions: Dict[bool, Any] = {}
+_session_lock = threading.Lock()
+
+
+def get_session(allow_private: bool = False) -> Any:
+    """
+    Session `requests` du processus, créée au premier téléchargement ; une
+    session distincte, sans contrôle du pair, sert les adresses privées.
+    """
+    session = _sessions.get(allow_private)
+    if session is not None:
+        return session
+    with _session_lock:
+        if allow_private not in _sessions:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            pool = dict(pool_connections=16, pool_maxsize=16, max_retries=0)
+            adapter = HTTPAdapter(**pool) if allow_private else _public_only_adapter(**pool)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({
+                "User-Agent": USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml;q=0.9,text/plain;q=0.8",
+            })
+            _sessions[allow_private] = session
+    return _sessions[allow_private]
+
+
+def _check_url(url: str, allow_private: bool) -> None:
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        raise FetchError("Seules les adresses http:// et https:// sont acceptées.")
+    if not parts.hostname:
+        raise FetchError("Adresse invalide : nom de domaine manquant.")
+    if allow_private:
+        return
+    try:
+        addresses = _resolve(parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+    except (socket.gaierror, UnicodeError):
+        raise FetchError(f"Domaine introuvable : {parts.hostname}")
+    # Contrôle anticipé, pour un message clair ; l'adresse effectivement
+    # connectée est revérifiée par la session (voir `_public_only_adapter`).
+    if not all(_is_public(address) for address in addresses):
+        raise FetchError("Adresse locale ou privée refusée.")
+
+
+# ───────── Cache disque (ETag / Last-Modified) ─────────
+def _cache_paths(url: str, cache_dir: str) -> Tuple[str, str]:
+    stem = os.path.join(cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest())
+    return stem + ".json", stem + ".body"
+
+
+def _cache_load(url: str, cache_dir: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+    meta_path, body_path = _cache_paths(url, cache_dir)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if time.time() - float(meta.get("stored_at", 0)) > HTTP_CACHE_MAX_AGE:
+            _cache_remove(meta_path)
+            return None
+        with open(body_path, "rb") as f:
+            return meta, f.read()
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def _cache_store(url: str, cache_dir: str, meta: Dict[str, Any], body: bytes) -> None:
+    meta_path, body_path = _cache_paths(url, cache_dir)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Corps d'abord, puis métadonnées : une entrée n'existe qu'une fois complète.
+        for path, data, mode in ((body_path, body, "wb"), (meta_path, json.dumps(meta).encode("utf-8"), "wb")):
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, mode) as f:
+                f.write(data)
+            os.replace(tmp, path)
+    except OSError:
+        return
+    _cache_prune(cache_dir)
+
+
+def _cache_remove(meta_path: str) -> None:
+    # Métadonnées d'abord : une entrée sans elles n'est plus lue.
+    for path in (meta_path, meta_path[: -len(".json")] + ".body"):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_prune_lock = threading.Lock()
+
+
+def _cache_prune(cache_dir: str) -> None:
+    """Retire les entrées expirées, puis les plus anciennes au-delà des plafonds."""
+    with _prune_lock:
+        entries = []
+        try:
+            names = os.listdir(cache_dir)
+        except OSError:
+            return
+        now = time.time()
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            meta_path = os.path.join(cache_dir, name)
+            try:
+                stored_at = os.path.getmtime(meta_path)
+                size = os.path.getsize(meta_path) + os.path.getsize(meta_path[: -len(".json")] + ".body")
+            except OSError:
+                continue
+            if now - stored_at > HTTP_CACHE_MAX_AGE:
+                _cache_remove(meta_path)
+            else:
+                entries.append((stored_at, size, meta_path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > HTTP_CACHE_MAX_ENTRIES or total > HTTP_CACHE_MAX_BYTES):
+            _, size, meta_path = entries.pop(0)
+            _cache_remove(meta_path)
+            total -= size
+
+
+# ───────── Téléchargement ─────────
+def _read_body(response: Any, max_bytes: int, deadline: float) -> bytes:
+    declared = response.headers.get("Content-Length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise FetchError(f"Page trop lourde (plus de {max_bytes // 1024} Ko).")
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(chunk_size=_CHUNK_BYTES):
+        size += len(chunk)
+        if size > max_bytes:
+            raise FetchError(f"Page trop lourde (plus de {max_bytes // 1024} Ko).")
+        if time.monotonic() > deadline:
+            raise FetchError("Téléchargement trop lent : délai dépassé.")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def fetch(
+    url: str,
+    allow_private: Optional[bool] = None,
+    max_bytes: int = FETCH_MAX_BYTES,
+    timeout: float = FETCH_TIMEOUT,
+    cache_dir: Optional[str] = None,
+) -> FetchedPage:
+    """
+    Télécharge `url` (redirections suivies et revérifiées une à une).
+    Lève `FetchError` pour toute URL refusée, erreur HTTP ou dépassement.
+    """
+    import requests
+
+    allow_private = FETCH_ALLOW_PRIVATE if allow_private is None else allow_private
+    cache_dir = HTTP_CACHE_DIR if cache_dir is None else cache_dir
+    started = time.monotonic()
+    deadline = started + timeout
+    session = get_session(allow_private)
+
+    current = url.strip()
+    for _ in range(FETCH_MAX_REDIRECTS + 1):
+        _check_url(current, allow_private)
+        cached = _cache_load(current, cache_dir) if cache_dir else None
+        headers = {}
+        if cached is not None:
+            meta = cached[0]
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise FetchError("Téléchargement trop lent : délai dépassé.")
+        try:
+            response = session.get(
+                current,
+                headers=headers,
+                stream=True,
+                allow_redirects=False,
+                timeout=(min(FETCH_CONNECT_TIMEOUT, remaining), remaining),
+            )
+        except requests.Timeout:
+            raise FetchError("Le site ne répond pas (délai dépassé).")
+        except requests.RequestException as e:
+            raise FetchError(f"Connexion impossible : {type(e).__name__}.")
+
+        with response:
+            if response.is_redirect:
+                location = response.headers.get("Location", "")
+                current = urljoin(current, location)
+                continue
+            if response.status_code == 304 and cached is not None:
+                meta, body = cached
+                return FetchedPage(
+                    url=current,
+                    content_type=meta.get("content_type", "text/html"),
+                    encoding=meta.get("encoding"),
+                    body=body,
+                    from_cache=True,
+                    elapsed_s=time.monotonic() - started,
+                )
+            if response.status_code >= 400:
+                raise FetchError(f"Le site a répondu {response.status_code}.")
+            content_type = response.headers.get("Content-Type", "text/html").split(";", 1)[0].strip().lower()
+            if content_type not in _ACCEPTED_TYPES:
+                raise FetchError(f"Contenu non textuel ({content_type or 'type inconnu'}).")
+            # `requests` suppose ISO-8859-1 pour tout text/* sans charset : on
+            # ne garde que le charset explicite et on laisse BeautifulSoup lire
+            # la balise <meta charset> sinon.
+            encoding = None
+            if "charset=" in response.headers.get("Content-Type", "").lower():
+                encoding = response.encoding
+            try:
+                body = _read_body(response, max_bytes, deadline)
+            except requests.RequestException:
+                raise FetchError("Téléchargement interrompu.")
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+        if cache_dir and (etag or last_modified):
+            _cache_store(current, cache_dir, {
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_type": content_type,
+                "encoding": encoding,
+                "stored_at": time.time(),
+            }, body)
+        return FetchedPage(
+            url=current,
+            content_type=content_type,
+            encoding=encoding,
+            body=body,
+            from_cache=False,
+            elapsed_s=time.monotonic() - started,
+        )
+    raise FetchError("Trop de redirections.")
+
+
+# ───────── Extraction du contenu principal ─────────
+def _text_of(node: Any) -> str:
+    """Texte d'un nœud, un paragraphe par bloc, lignes et espaces compactés."""
+    for br in node.find_all("br"):
+        br.replace_with("\n")
+    for block in node.find_all(_BLOCK_TAGS):
+        block.insert_before("\n\n")
+        block.insert_after("\n\n")
+    paragraphs = []
+    for raw in re.split(r"\n\s*\n", node.get_text()):
+        lines = [" ".join(line.split()) for line in raw.splitlines()]
+        paragraph = "\n".join(line for line in lines if line)
+        if paragraph:
+            paragraphs.append(paragraph)
+    return "\n\n".join(paragraphs)
+
+
+def _link_density(node: Any) -> float:
+    total = len(node.get_text(" ", strip=True))
+    if not total:
+        return 1.0
+    linked = sum(len(a.get_text(" ", strip=True)) for a in node.find_all("a"))
+    return min(1.0, linked / total)
+
+
+def _title_of(soup: Any) -> str:
+    og = soup.find("meta", attrs={"property": "og:title"})
+    if og and og.get("content"):
+        return " ".join(og["content"].split())
+    for tag in ("h1", "title"):
+        node = soup.find(tag)
+        if node and node.get_text(strip=True):
+            return " ".join(node.get_text(" ", strip=True).split())
+    return ""
+
+
+def _best_candidate(body: Any) -> Any:
+    """
+    Bloc principal : chaque paragraphe crédite son parent et, pour moitié,
+    son grand-parent (plusieurs messages d'un fil remontent ainsi à leur
+    conteneur commun) ; score pénalisé par la densité de liens, bonus pour
+    `article` / `main`.
+    """
+    scores: Dict[int, float] = {}
+    nodes: Dict[int, Any] = {}
+    for paragraph in body.find_all(_PARAGRAPH_TAGS):
+        text = paragraph.get_text(" ", strip=True)
+        if len(text) < _MIN_PARAGRAPH_CHARS:
+            continue
+        points = 1 + text.count(",") + min(len(text) / 100, 3)
+        for node, share in ((paragraph.parent, 1.0), (paragraph.parent.parent if paragraph.parent else None, 0.5)):
+            if node is None or node.name in (None, "[document]", "html"):
+                continue
+            nodes[id(node)] = node
+            scores[id(node)] = scores.get(id(node), 0.0) + points * share
+
+    best, best_score = None, 0.0
+    for key, node in nodes.items():
+        score = scores[key] * (1 - _link_density(node))
+        if node.name in ("article", "main") or node.get("role") == "main" or node.get("itemprop") == "articleBody":
+            score *= 1.25
+        if score > best_score:
+            best, best_score = node, score
+    return best
+
+
+def extract_main_text(html: Any, encoding: Optional[str] = None) -> Tuple[str, str]:
+    """(titre, texte principal) d'une page HTML (str ou bytes)."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser", from_encoding=encoding if isinstance(html, bytes) else None)
+    title = _title_of(soup)
+    body = soup.body or soup
+
+    for tag in body.find_all(_JUNK_TAGS):
+        tag.decompose()
+    for tag in body.find_all(True):
+        if tag.decomposed or tag.name in ("body", "article", "main"):
+            continue
+        marker = " ".join(tag.get("class") or []) + " " + (tag.get("id") or "")
+        if _UNLIKELY_RE.search(marker) and not _LIKELY_RE.search(marker):
+            tag.decompose()
+
+    candidate = _best_candidate(body)
+    text = _text_of(candidate) if candidate is not None else ""
+    if len(text) < _MIN_CONTENT_CHARS:
+        text = _text_of(body)
+    return title, text
+
+
+def ingest_url(url: str, **fetch_kwargs: Any) -> Article:
+    """Télécharge `url` et renvoie son contenu principal, prêt à analyser."""
+    page = fetch(url, **fetch_kwargs)
+    if page.content_type == "text/plain":
+        title, text = "", page.body.decode(page.encoding or "utf-8", errors="replace").strip()
+    else:
+        title, text = extract_main_text(page.body, page.encoding)
+    if not text:
+        raise FetchError("Aucun texte exploitable trouvé sur cette page.")
+    return Article(
+        url=page.url,
+        title=title,
+        text=text,
+        from_cache=page.from_cache,
+        bytes=len(page.body),
+        elapsed_s=round(page.elapsed_s, 3),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Récupère une page et affiche son contenu principal.")
+    parser.add_argument("url")
+    parser.add_argument("--allow-private", action="store_true", help="autorise localhost et les réseaux privés")
+    parser.add_argument("--no-cache", action="store_true", help="ignore le cache disque")
+    args = parser.parse_args(argv)
+
+    try:
+        article = ingest_url(
+            args.url,
+            allow_private=args.allow_private or None,
+            cache_dir="" if args.no_cache else None,
+        )
+    except FetchError as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
+    if article.title:
+        print(f"# {article.title}\n")
+    print(article.text)
+    print(
+        f"\n{article.url} — {article.bytes} octets, {len(article.text)} caractères extraits, "
+        f"{article.elapsed_s:.2f}s{' (cache)' if article.from_cache else ''}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,207 @@
+"""
+File de scans en arrière-plan, indépendante des reruns Streamlit.
+
+Un scan tournait dans le script Streamlit, sous `st.spinner` : un
+rafraîchissement de page ou un rerun intempestif perdait le travail en
+cours, et le thread du script restait bloqué pendant tout l'appel LLM. Ici,
+`scan_jobs.submit` rend aussitôt un identifiant de tâche ; l'analyse (puis
+la réponse par défaut, lancée dès que les champs du résumé sont arrivés)
+tourne sur un pool de workers partagé par le processus. L'interface
+consulte l'état de la tâche (champs déjà reçus, résultat, erreur) par son
+identifiant, gardé dans l'URL : après un rafraîchissement, la session
+retrouve la tâche en cours ou son résultat.
+
+Les tâches terminées restent consultables `JOB_TTL_S` secondes ; si
+l'historique local est activé (voir subtext/history.py), chaque scan réussi
+y est aussi enregistré.
+"""
+import copy
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Optional
+
+from subtext.engine import (
+    REPLY_SUMMARY_FIELDS,
+    analyze_text,
+    analyze_text_incremental,
+    generate_replies,
+)
+from subtext.history import scan_history
+
+logger = logging.getLogger("subtext.jobs")
+
+SCAN_WORKERS = int(os.getenv("SUBTEXT_SCAN_WORKERS", "16"))
+JOB_TTL_S = 3600.0
+JOB_MAX_ENTRIES = 1000
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class ScanJob:
+    id: str
+    text: str
+    persona_mode: str
+    tone_pref: str
+    status: str = QUEUED
+    # Champs de premier niveau déjà reçus pendant le streaming.
+    fields: Dict[str, Any] = field(default_factory=dict)
+    analysis: Optional[Dict[str, Any]] = None
+    replies: Dict[str, str] = field(default_factory=lambda: {"calm": "", "assertive": ""})
+    error: Optional[str] = None
+    reply_error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+
+class ScanJobs:
+    """Tâches de scan en cours et récentes, partagées par toutes les sessions."""
+
+    def __init__(self, max_workers: int = SCAN_WORKERS) -> None:
+        self._max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._reply_pool: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[str, ScanJob] = {}
+        self._lock = threading.Lock()
+
+    def _executors(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="subtext-scan")
+            # Pool séparé : un worker de scan attend sa réponse sans bloquer le pool.
+            self._reply_pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="subtext-reply")
+        return self._pool
+
+    def submit(
+        self,
+        text: str,
+        persona_mode: str,
+        tone_pref: str,
+        profile: Optional[str] = None,
+        previous_text: Optional[str] = None,
+        previous_analysis: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None,
+    ) -> str:
+        """
+        Met un scan en file et renvoie son identifiant. Un `model` forcé
+        court-circuite le pré-filtre, le routage, la réutilisation des
+        quasi-doublons et la réanalyse incrémentale (voir `analyze_text`).
+        """
+        job = ScanJob(id=uuid.uuid4().hex[:12], text=text, persona_mode=persona_mode, tone_pref=tone_pref)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+            pool = self._executors()
+        pool.submit(self._run, job, profile, previous_text, previous_analysis, model)
+        return job.id
+
+    def get(self, job_id: Optional[str]) -> Optional[ScanJob]:
+        """Instantané de la tâche (copie), ou None si inconnue ou expirée."""
+        with self._lock:
+            job = self._jobs.get(job_id or "")
+            if job is None:
+                return None
+            return replace(job, fields=dict(job.fields), replies=dict(job.replies))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                status: sum(1 for job in self._jobs.values() if job.status == status)
+                for status in (QUEUED, RUNNING, DONE, FAILED)
+            }
+
+    def _prune(self) -> None:
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.done and now - (job.finished or now) > JOB_TTL_S:
+                del self._jobs[job_id]
+        # Au-delà de la limite, les plus anciennes tâches terminées sortent.
+        finished = sorted((job for job in self._jobs.values() if job.done), key=lambda job: job.created)
+        for job in finished[: max(0, len(self._jobs) - JOB_MAX_ENTRIES)]:
+            del self._jobs[job.id]
+
+    def _update(self, job: ScanJob, **changes: Any) -> None:
+        with self._lock:
+            for key, value in changes.items():
+                setattr(job, key, value)
+
+    def _run(
+        self,
+        job: ScanJob,
+        profile: Optional[str],
+        previous_text: Optional[str],
+        previous_analysis: Optional[Dict[str, Any]],
+        model: Optional[str],
+    ) -> None:
+        self._update(job, status=RUNNING)
+        reply_jobs: Dict[str, Future] = {}
+
+        def _start_replies(analysis: Dict[str, Any]) -> None:
+            reply_jobs["default"] = self._reply_pool.submit(
+                generate_replies,
+                original_text=job.text,
+                analysis=analysis,
+                tone_pref=job.tone_pref,
+                emoji_allowed=True,
+                persona_mode=job.persona_mode,
+            )
+
+        def _on_field(key: str, value: Any, fields: Dict[str, Any]) -> None:
+            self._update(job, fields=copy.deepcopy(fields))
+            # La réponse part dès que les champs du résumé sont arrivés, en
+            # parallèle de la fin de l'analyse.
+            if "default" not in reply_jobs and all(f in fields for f in REPLY_SUMMARY_FIELDS):
+                _start_replies(dict(fields))
+
+        try:
+            if previous_analysis is not None and previous_text and model is None:
+                analysis = analyze_text_incremental(
+                    job.text, previous_text, previous_analysis, on_field=_on_field, profile=profile
+                )
+            else:
+                analysis = analyze_text(job.text, on_field=_on_field, model=model, profile=profile)
+        except Exception as e:
+            self._update(job, status=FAILED, error=f"{type(e).__name__}: {e}", finished=time.time())
+            return
+
+        replies = {"calm": "", "assertive": ""}
+        reply_error = None
+        if analysis:
+            # Résultat servi par le cache : pas de streaming, donc la réponse
+            # n'a pas encore été lancée.
+            if "default" not in reply_jobs and analysis.get("analysis_source") != "heuristic" and not analysis.get("degraded"):
+                _start_replies(analysis)
+            if "default" in reply_jobs:
+                try:
+                    replies = reply_jobs["default"].result()
+                except Exception as e:
+                    reply_error = f"{type(e).__name__}: {e}"
+            if not analysis.get("degraded"):
+                try:
+                    scan_history.record(job.text, analysis, replies, job.persona_mode)
+                except Exception:
+                    # L'historique est un confort : son échec ne fait pas échouer le scan.
+                    logger.exception("Enregistrement du scan dans l'historique impossible")
+        self._update(
+            job,
+            status=DONE,
+            analysis=analysis,
+            replies=replies,
+            reply_error=reply_error,
+            finished=time.time(),
+        )
+
+
+# Partagé par toutes les sessions du processus.
+scan_jobs = ScanJobs()
@@ -0,0 +1,209 @@
+"""
+Position des passages repérés (`highlights[].quote`) dans le texte analysé.
+
+Les citations n'étaient affichées qu'en cartes séparées, sans lien avec
+l'endroit du texte où elles apparaissent, et sur les longs articles le
+modèle les reformule souvent légèrement (apostrophes typographiques,
+casse, espaces, mot changé, coupe en « … »). Ici, chaque citation est
+ramenée à un intervalle [début, fin) de caractères du texte d'origine :
+
+1. recherche exacte sur une forme repliée du texte (casse, accents,
+   guillemets et espaces uniformisés), construite une seule fois ; une
+   citation coupée par « … » est cherchée morceau par morceau, dans l'ordre ;
+2. à défaut, recherche approchée bornée : les trigrammes de mots de la
+   citation votent pour des positions de départ, et seules les
+   `LOCATE_MAX_CANDIDATES` meilleures fenêtres sont alignées
+   (`difflib.SequenceMatcher`) ; un alignement sous `LOCATE_MIN_SCORE`
+   laisse la citation sans position.
+
+Le résultat est mis en cache par texte et liste de citations : une analyse
+n'est localisée qu'une fois, quels que soient le mode d'affichage et les
+sections différées fusionnées ensuite.
+"""
+import re
+import unicodedata
+from bisect import bisect_right
+from collections import Counter
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from subtext.cache import TTLCache, make_cache_key
+
+# Part minimale de la citation retrouvée dans la fenêtre alignée.
+LOCATE_MIN_SCORE = 0.8
+LOCATE_MAX_CANDIDATES = 4
+# Occurrences d'un même trigramme prises en compte (mots très fréquents).
+LOCATE_MAX_ANCHOR_HITS = 16
+# Au-delà, seul le début de la citation sert à la recherche approchée.
+LOCATE_MAX_FUZZY_CHARS = 400
+ANCHOR_WORDS = 3
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_WHITESPACE_RUN_RE = re.compile(r"\s{2,}")
+_WORD_RE = re.compile(r"\w+")
+_ELLIPSIS_RE = re.compile(r"\s*(?:\[\s*(?:\.\.\.|…)\s*\]|\(\s*(?:\.\.\.|…)\s*\)|\.\.\.|…)\s*")
+_EDGE_QUOTES = " \"'«»“”„‹›"
+_PUNCTUATION = {
+    "’": "'", "‘": "'", "ʼ": "'", "`": "'", "´": "'",
+    "«": '"', "»": '"', "“": '"', "”": '"', "„": '"', "‹": '"', "›": '"',
+    "–": "-", "—": "-", "‑": "-",
+}
+
+
+class _FoldTable(dict):
+    """Table de `str.translate` remplie à la demande : un caractère → un caractère."""
+
+    def __missing__(self, code: int) -> str:
+        char = chr(code)
+        folded = _PUNCTUATION.get(char)
+        if folded is None:
+            base = "".join(c for c in unicodedata.normalize("NFKD", char) if not unicodedata.combining(c))
+            folded = base.casefold()
+            if len(folded) != 1:
+                # Repli multi-caractères (ß, ligatures) : on garde la longueur.
+                folded = char.lower() if len(char.lower()) == 1 else char
+        self[code] = folded
+        return folded
+
+
+_FOLD = _FoldTable()
+
+
+@dataclass(frozen=True)
+class QuoteSpan:
+    """Intervalle [start, end) d'une citation dans le texte d'origine."""
+    start: int
+    end: int
+    exact: bool
+    score: float
+
+
+class FoldedText:
+    """Texte replié (casse, accents, ponctuation, espaces) et correspondance des positions."""
+
+    def __init__(self, text: str) -> None:
+        folded = text.translate(_FOLD)
+        # Début de chaque segment hors espaces : (position repliée, position d'origine).
+        self._folded_starts: List[int] = [0]
+        self._original_starts: List[int] = [0]
+        removed = 0
+        # Un espace isolé garde sa position : seules les suites décalent.
+        for match in _WHITESPACE_RUN_RE.finditer(folded):
+            removed += len(match.group()) - 1
+            self._folded_starts.append(match.end() - removed)
+            self._original_starts.append(match.end())
+        self.text = _WHITESPACE_RE.sub(" ", folded)
+
+    def original(self, index: int) -> int:
+        """Position d'origine du caractère `index` du texte replié."""
+        k = bisect_right(self._folded_starts, index) - 1
+        return self._original_starts[k] + index - self._folded_starts[k]
+
+    def span(self, start: int, end: int, exact: bool, score: float) -> QuoteSpan:
+        return QuoteSpan(self.original(start), self.original(end - 1) + 1, exact, round(score, 3))
+
+
+def fold(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", (text or "").translate(_FOLD)).strip()
+
+
+def _find_exact(haystack: str, quote: str) -> Optional[Tuple[int, int]]:
+    """Citation telle quelle, ou ses morceaux séparés par « … » dans l'ordre."""
+    parts = [p.strip(_EDGE_QUOTES) for p in _ELLIPSIS_RE.split(quote)]
+    parts = [p for p in parts if p]
+    if not parts:
+        return None
+    start = haystack.find(parts[0])
+    if start < 0:
+        return None
+    end = start + len(parts[0])
+    for part in parts[1:]:
+        found = haystack.find(part, end)
+        if found < 0:
+            return None
+        end = found + len(part)
+    return start, end
+
+
+def _find_fuzzy(haystack: str, quote: str) -> Optional[Tuple[int, int, float]]:
+    """Meilleure fenêtre proche de la citation parmi les positions les plus votées."""
+    quote = _ELLIPSIS_RE.sub(" ", quote)[:LOCATE_MAX_FUZZY_CHARS].strip(_EDGE_QUOTES)
+    words = list(_WORD_RE.finditer(quote))
+    if len(words) < ANCHOR_WORDS:
+        return None
+    votes: Counter = Counter()
+    for i in range(len(words) - ANCHOR_WORDS + 1):
+        first, last = words[i], words[i + ANCHOR_WORDS - 1]
+        anchor = quote[first.start():last.end()]
+        hit = haystack.find(anchor)
+        hits = 0
+        while hit >= 0 and hits < LOCATE_MAX_ANCHOR_HITS:
+            # Position de départ impliquée, regroupée par paquets de 16 caractères.
+            votes[max(0, hit - first.start()) // 16] += 1
+            hits += 1
+            hit = haystack.find(anchor, hit + 1)
+    best: Optional[Tuple[int, int, float]] = None
+    slack = len(quote) // 4 + 16
+    for bucket, _ in votes.most_common(LOCATE_MAX_CANDIDATES):
+        offset = max(0, bucket * 16 - slack)
+        window = haystack[offset:bucket * 16 + len(quote) + slack]
+        blocks = [b for b in SequenceMatcher(None, quote, window, autojunk=False).get_matching_blocks() if b.size]
+        if not blocks:
+            continue
+        score = sum(b.size for b in blocks) / len(quote)
+        if best is None or score > best[2]:
+            best = (offset + blocks[0].b, offset + blocks[-1].b + blocks[-1].size, score)
+    if best is None or best[2] < LOCATE_MIN_SCORE:
+        return None
+    return best
+
+
+def _locate(text: str, quotes: Sequence[str]) -> Tuple[Optional[QuoteSpan], ...]:
+    folded = FoldedText(text)
+    spans: List[Optional[QuoteSpan]] = []
+    for quote in quotes:
+        needle = fold(quote).strip(_EDGE_QUOTES)
+        if not needle:
+            spans.append(None)
+            continue
+        exact = _find_exact(folded.text, needle)
+        if exact is not None:
+            spans.append(folded.span(exact[0], exact[1], True, 1.0))
+            continue
+        fuzzy = _find_fuzzy(folded.text, needle)
+        spans.append(folded.span(*fuzzy[:2], False, fuzzy[2]) if fuzzy else None)
+    return tuple(spans)
+
+
+# Intervalles immuables : pas de copie à la lecture.
+_span_cache = TTLCache(max_entries=256, ttl_seconds=6 * 3600, copy_values=False)
+
+
+def locate_quotes(text: str, quotes: Sequence[str]) -> Tuple[Optional[QuoteSpan], ...]:
+    """
+    Intervalle de chaque citation dans `text` (None si introuvable), dans
+    l'ordre des citations. Calculé une fois par texte et liste de citations.
+    """
+    if not text or not quotes:
+        return tuple(None for _ in quotes)
+    # Texte brut dans la clé : les positions dépendent de ses espaces.
+    key = make_cache_key("\x00".join(quotes), text)
+    spans = _span_cache.get(key)
+    if spans is None:
+        spans = _locate(text, quotes)
+        _span_cache.set(key, spans)
+    return spans
+
+
+def non_overlapping(spans: Sequence[Optional[QuoteSpan]]) -> Dict[int, QuoteSpan]:
+    """Intervalles à surligner (indice de citation → intervalle), sans chevauchement."""
+    kept: Dict[int, QuoteSpan] = {}
+    last_end = -1
+    for index, span in sorted(
+        ((i, s) for i, s in enumerate(spans) if s is not None), key=lambda item: (item[1].start, -item[1].end)
+    ):
+        if span.start >= last_end:
+            kept[index] = span
+            last_end = span.end
+    return kept
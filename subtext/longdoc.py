@@ -0,0 +1,165 @@
+"""
+Découpage et réduction pour les documents longs (articles, discours).
+
+Un long texte envoyé d'un bloc produit des sorties tronquées, du JSON
+invalide et des latences énormes. Ici on le coupe en morceaux qui se
+chevauchent (pour ne pas perdre une phrase à cheval sur deux morceaux),
+chaque morceau est analysé en parallèle par le moteur, puis les résultats
+sont fusionnés de façon déterministe dans le schéma habituel. Seuls les
+champs de synthèse (effet principal, traduction, vue systémique…) passent
+par un dernier appel court, côté moteur.
+"""
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence
+
+from subtext.cache import normalize_text
+from subtext.heuristics import score_to_level
+
+# Au-delà de ce nombre de caractères, l'analyse passe en mode long.
+LONG_DOC_THRESHOLD_CHARS = 9000
+CHUNK_TARGET_CHARS = 6000
+CHUNK_OVERLAP_CHARS = 500
+MAX_HIGHLIGHTS = 8
+MAX_FACT_CHECKS = 8
+MAX_TAGS = 8
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?…])\s+")
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+AXES = ("hostility", "manipulation", "pressure")
+
+
+@dataclass
+class Chunk:
+    index: int
+    text: str
+
+
+def _split_units(text: str) -> List[str]:
+    """Paragraphes, eux-mêmes coupés en phrases s'ils dépassent la taille cible."""
+    units: List[str] = []
+    for paragraph in _PARAGRAPH_RE.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= CHUNK_TARGET_CHARS:
+            units.append(paragraph)
+            continue
+        for sentence in _SENTENCE_END_RE.split(paragraph):
+            # Phrase démesurée (texte sans ponctuation) : coupe franche.
+            for i in range(0, len(sentence), CHUNK_TARGET_CHARS):
+                units.append(sentence[i:i + CHUNK_TARGET_CHARS])
+    return units
+
+
+def _overlap_tail(text: str) -> str:
+    """Dernières phrases d'un morceau, dans la limite du chevauchement."""
+    tail = ""
+    for sentence in reversed(_SENTENCE_END_RE.split(text)):
+        candidate = f"{sentence} {tail}".strip()
+        if len(candidate) > CHUNK_OVERLAP_CHARS:
+            break
+        tail = candidate
+    return tail or text[-CHUNK_OVERLAP_CHARS:]
+
+
+def split_into_chunks(text: str) -> List[Chunk]:
+    """
+    Découpe en morceaux d'environ `CHUNK_TARGET_CHARS`, en respectant
+    paragraphes puis phrases ; chaque morceau reprend la fin du précédent.
+    """
+    chunks: List[Chunk] = []
+    current: List[str] = []
+    size = 0
+    fresh = 0  # unités ajoutées depuis le dernier morceau (hors chevauchement)
+
+    for unit in _split_units(text):
+        if fresh and size + len(unit) > CHUNK_TARGET_CHARS:
+            body = "\n\n".join(current)
+            chunks.append(Chunk(index=len(chunks), text=body))
+            tail = _overlap_tail(body)
+            current, size, fresh = [tail], len(tail), 0
+        current.append(unit)
+        size += len(unit) + 2
+        fresh += 1
+    if fresh:
+        chunks.append(Chunk(index=len(chunks), text="\n\n".join(current)))
+    return chunks
+
+
+def _int(value: Any) -> int:
+    try:
+        return max(0, min(100, int(value)))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _combine(scores: Sequence[int], weights: Sequence[float]) -> int:
+    """Moitié pic, moitié moyenne pondérée : un passage très toxique compte, sans tout écraser."""
+    if not scores:
+        return 0
+    total = sum(weights) or 1.0
+    mean = sum(s * w for s, w in zip(scores, weights)) / total
+    return int(round(0.5 * max(scores) + 0.5 * mean))
+
+
+def _priority(action: Dict[str, Any]) -> int:
+    try:
+        return int(action.get("priority", 3))
+    except (TypeError, ValueError):
+        return 3
+
+
+def reduce_chunk_analyses(chunks: Sequence[Chunk], partials: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Fusion déterministe des analyses partielles : scores (pic + moyenne
+    pondérée par la longueur), tags et effets par fréquence, passages et
+    fact-checks dédoublonnés dans l'ordre du document.
+    """
+    pairs = [(c, p) for c, p in zip(chunks, partials) if p]
+    weights = [float(len(c.text)) for c, _ in pairs]
+    merged: Dict[str, Any] = {}
+
+    types = Counter((p.get("content_type") or "autre") for _, p in pairs)
+    merged["content_type"] = types.most_common(1)[0][0] if types else "autre"
+    merged["global_score"] = _combine([_int(p.get("global_score")) for _, p in pairs], weights)
+    for axis in AXES:
+        score = _combine([_int((p.get(axis) or {}).get("score")) for _, p in pairs], weights)
+        merged[axis] = {"score": score, "label": score_to_level(score)}
+
+    tag_counts: Counter = Counter()
+    effect_counts: Counter = Counter()
+    for _, p in pairs:
+        tag_counts.update(t for t in (p.get("tags") or []) if isinstance(t, str))
+        effect_counts.update(e for e in (p.get("secondary_effects") or []) if isinstance(e, str))
+    merged["tags"] = [t for t, _ in tag_counts.most_common(MAX_TAGS)]
+    merged["secondary_effects"] = [e for e, _ in effect_counts.most_common(4)]
+
+    highlights: List[Dict[str, Any]] = []
+    seen_quotes = set()
+    fact_checks: List[Dict[str, Any]] = []
+    seen_claims = set()
+    actions: Dict[str, Dict[str, Any]] = {}
+    for _, p in pairs:
+        for h in p.get("highlights") or []:
+            key = normalize_text(str(h.get("quote") or "")).lower()
+            if key and key not in seen_quotes:
+                seen_quotes.add(key)
+                highlights.append(h)
+        for fc in p.get("fact_checks") or []:
+            key = normalize_text(str(fc.get("claim") or "")).lower()
+            if key and key not in seen_claims:
+                seen_claims.add(key)
+                fact_checks.append(fc)
+        for act in p.get("recommended_actions") or []:
+            key = normalize_text(str(act.get("label") or "")).lower()
+            if not key:
+                continue
+            if key not in actions or _priority(act) < _priority(actions[key]):
+                actions[key] = act
+    merged["highlights"] = highlights[:MAX_HIGHLIGHTS]
+    merged["fact_checks"] = fact_checks[:MAX_FACT_CHECKS]
+    merged["recommended_actions"] = sorted(actions.values(), key=_priority)[:5]
+    return merged
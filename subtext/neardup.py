@@ -0,0 +1,243 @@
+"""
+Quasi-doublons : réutiliser l'analyse d'un texte presque identique.
+
+Le cache d'analyse est adressé par le texte exact : une chaîne de messages,
+une copypasta ou des éléments de langage recopiés avec deux mots ou trois
+emojis de différence repartaient pour un appel complet. Ici, chaque texte
+analysé par le modèle est résumé par une signature MinHash (128 hachages
+des trigrammes de mots, calculés d'un bloc avec NumPy) et rangé dans un
+index LSH (32 bandes de 4 valeurs) : la recherche ne compare la signature
+qu'aux textes qui partagent au moins une bande, puis garde le plus proche
+au-delà de `NEARDUP_THRESHOLD` (similarité de Jaccard estimée).
+
+Un texte dont les mots sont les mêmes (seuls la casse, les accents, la
+ponctuation ou les emojis changent) reprend l'analyse telle quelle ; sinon,
+le texte trouvé sert de base à la réanalyse incrémentale, qui ne renvoie au
+modèle que les phrases qui diffèrent (voir `analyze_text` dans
+subtext/engine.py).
+
+Chaque entrée garde le modèle, la version du prompt et le profil de sortie
+de son analyse : comme pour le cache exact, une analyse n'est reprise que
+si elle vient d'un modèle accepté, de la version de prompt courante et d'un
+profil qui contient tous les champs demandés.
+
+Tout reste en mémoire du processus, borné et à durée de vie limitée comme
+le cache d'analyse.
+"""
+import copy
+import os
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Collection, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from subtext.cache import make_cache_key
+
+NEARDUP_ENABLED = os.getenv("SUBTEXT_NEARDUP", "on") != "off"
+# Similarité de Jaccard (estimée) à partir de laquelle un texte est un quasi-doublon.
+NEARDUP_THRESHOLD = float(os.getenv("SUBTEXT_NEARDUP_THRESHOLD", "0.7"))
+# En dessous, chaque mot compte pour le ton : pas de réutilisation.
+NEARDUP_MIN_TOKENS = 12
+NEARDUP_MAX_ENTRIES = 2048
+NEARDUP_TTL_S = 6 * 3600.0
+
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+# 32 bandes × 4 lignes : un texte similaire à 0,7 est candidat à plus de 99,9 %.
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERM // LSH_BANDS
+
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+# Graine fixe : les signatures restent comparables d'un démarrage à l'autre.
+_rng = np.random.default_rng(20250701)
+_PERM_A = _rng.integers(1, int(_MERSENNE_PRIME), size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, int(_MERSENNE_PRIME), size=NUM_PERM, dtype=np.uint64)
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Mots du texte, sans casse, accents, ponctuation ni emojis."""
+    decomposed = unicodedata.normalize("NFKD", (text or "").casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _TOKEN_RE.findall(stripped)
+
+
+def signature(tokens: List[str]) -> np.ndarray:
+    """Signature MinHash (NUM_PERM valeurs) des trigrammes de mots."""
+    size = min(SHINGLE_SIZE, len(tokens)) or 1
+    shingles = {" ".join(tokens[i:i + size]) for i in range(max(1, len(tokens) - size + 1))}
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles)
+    ) % _MERSENNE_PRIME
+    # (a·x + b) mod p pour toutes les permutations d'un coup : matrice NUM_PERM × shingles.
+    permuted = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return permuted.min(axis=1)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Similarité de Jaccard estimée entre deux signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def _band_keys(sig: np.ndarray) -> List[bytes]:
+    return [sig[i * LSH_ROWS:(i + 1) * LSH_ROWS].tobytes() for i in range(LSH_BANDS)]
+
+
+@dataclass
+class NearDuplicate:
+    """Texte déjà analysé le plus proche du texte cherché."""
+    text: str
+    analysis: Dict[str, Any]
+    similarity: float
+    # Mêmes mots dans le même ordre : l'analyse vaut telle quelle.
+    identical: bool
+
+
+@dataclass
+class _Entry:
+    text: str
+    words: str
+    analysis: Dict[str, Any]
+    model: str
+    prompt_version: str
+    profile: str
+    signature: np.ndarray
+    bands: List[bytes]
+    stored_at: float
+
+
+class NearDuplicateIndex:
+    """Index MinHash/LSH des textes analysés, partagé par les sessions du processus."""
+
+    def __init__(
+        self,
+        threshold: float = NEARDUP_THRESHOLD,
+        max_entries: int = NEARDUP_MAX_ENTRIES,
+        ttl_seconds: Optional[float] = NEARDUP_TTL_S,
+    ) -> None:
+        self.threshold = threshold
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._buckets: List[Dict[bytes, Set[str]]] = [{} for _ in range(LSH_BANDS)]
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.identical = 0
+        self.similar = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def add(self, text: str, analysis: Dict[str, Any], model: str, prompt_version: str, profile: str) -> None:
+        """
+        Indexe `text` et son analyse, produite par `model` avec cette version
+        de prompt et ce profil (remplace l'entrée identique).
+        """
+        tokens = tokenize(text)
+        if len(tokens) < NEARDUP_MIN_TOKENS or not analysis:
+            return
+        sig = signature(tokens)
+        entry = _Entry(
+            text=text,
+            words=" ".join(tokens),
+            analysis=copy.deepcopy(analysis),
+            model=model,
+            prompt_version=prompt_version,
+            profile=profile,
+            signature=sig,
+            bands=_band_keys(sig),
+            stored_at=time.monotonic(),
+        )
+        key = make_cache_key(text, model, prompt_version, profile)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            for band, bucket in zip(entry.bands, self._buckets):
+                bucket.setdefault(band, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def find(
+        self,
+        text: str,
+        models: Collection[str],
+        prompt_version: str,
+        profiles: Collection[str],
+    ) -> Optional[NearDuplicate]:
+        """
+        Quasi-doublon le plus proche de `text` (autre que lui-même), ou None.
+        Seules comptent les analyses d'un des `models`, de `prompt_version`
+        et d'un des `profiles`.
+        """
+        tokens = tokenize(text)
+        if len(tokens) < NEARDUP_MIN_TOKENS:
+            return None
+        sig = signature(tokens)
+        words = " ".join(tokens)
+        now = time.monotonic()
+        with self._lock:
+            self.lookups += 1
+            candidates: Set[str] = set()
+            for band, bucket in zip(_band_keys(sig), self._buckets):
+                candidates |= bucket.get(band, set())
+            best: Optional[Tuple[float, _Entry]] = None
+            for key in candidates:
+                entry = self._entries[key]
+                if self.ttl_seconds is not None and now - entry.stored_at > self.ttl_seconds:
+                    self._remove(key)
+                    continue
+                if (
+                    entry.text == text
+                    or entry.model not in models
+                    or entry.prompt_version != prompt_version
+                    or entry.profile not in profiles
+                ):
+                    continue
+                score = 1.0 if entry.words == words else similarity(sig, entry.signature)
+                if score >= self.threshold and (best is None or score > best[0]):
+                    best = (score, entry)
+            if best is None:
+                return None
+            score, entry = best
+            identical = entry.words == words
+            if identical:
+                self.identical += 1
+            else:
+                self.similar += 1
+            return NearDuplicate(
+                text=entry.text,
+                analysis=copy.deepcopy(entry.analysis),
+                similarity=round(score, 3),
+                identical=identical,
+            )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "lookups": self.lookups,
+                "identical": self.identical,
+                "similar": self.similar,
+            }
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band, bucket in zip(entry.bands, self._buckets):
+            keys = bucket.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del bucket[band]
+
+
+# Partagé par toutes les sessions du processus.
+near_duplicates = NearDuplicateIndex()
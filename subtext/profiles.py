@@ -0,0 +1,102 @@
+"""
+Profils de sortie de l'analyse : ne demander au modèle que ce qui sera affiché.
+
+Le mode Roast n'affiche ni l'onglet Décryptage (vue systémique), ni la
+pédagogie des passages repérés (définition, exemple, explication), ni la
+validation de la réaction. Les faire rédiger quand même coûtait plusieurs
+centaines de tokens de sortie par scan, et ce sont eux qui dominent la
+latence de génération. Le profil « compact » a son propre prompt système,
+statique comme les autres (préfixe toujours réutilisable par le cache du
+fournisseur), et son propre schéma de validation ; le JSON produit garde
+les mêmes clés, les champs non demandés prenant leur valeur neutre.
+
+En mode Calme, le profil « cœur » ne demande que ce que la carte Diagnostic
+et l'onglet Actions affichent ; les sections longues sont rédigées ensuite,
+en arrière-plan (voir subtext/deferred.py).
+
+Chaque analyse produite par un profil partiel liste ses sections omises
+dans `deferred`. Une analyse sert un profil si elle ne lui manque rien :
+le cache et la réanalyse incrémentale s'appuient sur `covers`.
+"""
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from subtext.prompts import ANALYSIS_COMPACT_SYSTEM_PROMPT, ANALYSIS_CORE_SYSTEM_PROMPT, ANALYSIS_SYSTEM_PROMPT
+from subtext.schema import ANALYSIS_COMPACT_SCHEMA, ANALYSIS_CORE_SCHEMA, ANALYSIS_SCHEMA, Schema
+
+OUTPUT_PROFILES_ENABLED = os.getenv("SUBTEXT_OUTPUT_PROFILES", "on") != "off"
+DEFERRED_SECTIONS_ENABLED = os.getenv("SUBTEXT_DEFERRED_SECTIONS", "on") != "off"
+
+# Sections qu'un profil peut omettre, rédigées à part à la demande.
+SECTIONS = ("reaction_validation", "highlight_details", "systemic_view", "fact_checks")
+# Types de contenu pour lesquels l'interface affiche le fact-check.
+FACT_CHECK_CONTENT_TYPES = ("article", "discours", "forum", "réseau_social")
+
+
+@dataclass(frozen=True)
+class OutputProfile:
+    name: str
+    system_prompt: str
+    schema: Schema
+    omits: Tuple[str, ...] = ()
+
+
+FULL = OutputProfile("full", ANALYSIS_SYSTEM_PROMPT, ANALYSIS_SCHEMA)
+COMPACT = OutputProfile(
+    "compact",
+    ANALYSIS_COMPACT_SYSTEM_PROMPT,
+    ANALYSIS_COMPACT_SCHEMA,
+    omits=("reaction_validation", "highlight_details", "systemic_view"),
+)
+CORE = OutputProfile(
+    "core",
+    ANALYSIS_CORE_SYSTEM_PROMPT,
+    ANALYSIS_CORE_SCHEMA,
+    omits=("highlight_details", "systemic_view", "fact_checks"),
+)
+PROFILES: Dict[str, OutputProfile] = {profile.name: profile for profile in (FULL, COMPACT, CORE)}
+
+
+def get_profile(name: Optional[str]) -> OutputProfile:
+    return PROFILES.get(name or FULL.name, FULL)
+
+
+def profile_for_persona(persona_mode: str) -> OutputProfile:
+    """Profil adapté à ce que le mode d'affichage rend réellement."""
+    roast = (persona_mode or "").lower() == "roast"
+    if OUTPUT_PROFILES_ENABLED and roast:
+        return COMPACT
+    if DEFERRED_SECTIONS_ENABLED and not roast:
+        return CORE
+    return FULL
+
+
+def covers(analysis: Optional[Dict[str, Any]], profile: OutputProfile) -> bool:
+    """`analysis` contient-elle tous les champs que `profile` demande ?"""
+    if not analysis:
+        return False
+    return set(analysis.get("deferred") or ()) <= set(profile.omits)
+
+
+def covering_profiles(profile: OutputProfile) -> Tuple[str, ...]:
+    """Profils dont les analyses contiennent tous les champs que `profile` demande."""
+    return tuple(other.name for other in PROFILES.values() if set(other.omits) <= set(profile.omits))
+
+
+def rendered_sections(persona_mode: str, content_type: Optional[str]) -> Tuple[str, ...]:
+    """Sections que la page de résultats affiche pour ce mode et ce type de contenu."""
+    sections: Tuple[str, ...] = ()
+    if (persona_mode or "").lower() != "roast":
+        sections = ("reaction_validation", "highlight_details", "systemic_view")
+    if (content_type or "autre").lower() in FACT_CHECK_CONTENT_TYPES:
+        sections += ("fact_checks",)
+    return sections
+
+
+def missing_sections(analysis: Optional[Dict[str, Any]], persona_mode: str) -> List[str]:
+    """Sections omises à la génération que l'affichage courant réclame."""
+    if not analysis:
+        return []
+    wanted = rendered_sections(persona_mode, analysis.get("content_type"))
+    return [section for section in analysis.get("deferred") or () if section in wanted]
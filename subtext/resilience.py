@@ -0,0 +1,237 @@
+"""
+Résilience des appels LLM : délais, nouvelles tentatives, hedging, disjoncteur.
+
+- Chaque type d'appel a un délai global (`CALL_DEADLINES`) qui borne aussi
+  la durée cumulée des nouvelles tentatives.
+- Les erreurs transitoires (429, 5xx, timeouts, coupures réseau) sont
+  retentées avec un backoff exponentiel à gigue complète, en respectant
+  `Retry-After` quand le fournisseur l'envoie.
+- Hedging (optionnel) : si un appel non streamé dépasse le p95 observé pour
+  son type, un doublon part en parallèle et la première réponse gagne.
+- Disjoncteur : après une série d'échecs transitoires, les appels sont
+  refusés immédiatement (`CircuitOpenError`) pendant un temps de repos ; le
+  moteur sert alors un résultat en cache ou heuristique.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Délai global par type d'appel (secondes), nouvelles tentatives comprises.
+CALL_DEADLINES: Dict[str, float] = {
+    "triage": 8.0,
+    "analysis": 60.0,
+    "chunk": 45.0,
+    "synthesis": 30.0,
+    "reply": 30.0,
+    "repair": 30.0,
+    "section": 45.0,
+}
+DEFAULT_DEADLINE = 45.0
+RETRY_MAX_ATTEMPTS = int(os.getenv("SUBTEXT_RETRY_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+
+HEDGING_ENABLED = os.getenv("SUBTEXT_HEDGING", "off") == "on"
+# Sous ce nombre d'appels observés, le p95 n'est pas fiable : pas de hedging.
+HEDGE_MIN_SAMPLES = 20
+
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30.0
+
+_RETRYABLE_STATUS = {408, 409, 429}
+_RETRYABLE_NAMES = {"APITimeoutError", "APIConnectionError", "DeadlineExceeded", "TimeoutException", "ConnectError"}
+
+
+class CircuitOpenError(RuntimeError):
+    """Le disjoncteur est ouvert : le backend est jugé indisponible."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Le délai global de l'appel est dépassé."""
+
+
+def deadline_for(call_type: str) -> float:
+    return CALL_DEADLINES.get(call_type, DEFAULT_DEADLINE)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Erreur transitoire côté fournisseur ou réseau (par opposition à une requête invalide)."""
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status in _RETRYABLE_STATUS or status >= 500
+    return type(exc).__name__ in _RETRYABLE_NAMES or isinstance(exc, (TimeoutError, ConnectionError))
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return max(0.0, float(headers.get("retry-after")))
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(exc: BaseException, attempt: int, deadline: float) -> Optional[float]:
+    """
+    Pause avant la tentative `attempt + 1`, ou None s'il ne faut pas
+    retenter (erreur définitive, tentatives épuisées, délai dépassé).
+    """
+    if not is_retryable(exc) or attempt + 1 >= RETRY_MAX_ATTEMPTS:
+        return None
+    delay = _retry_after(exc)
+    if delay is None:
+        delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+    if time.monotonic() + delay >= deadline:
+        return None
+    return delay
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur à trois états : fermé (normal), ouvert (appels refusés) et
+    semi-ouvert (un seul appel d'essai après le temps de repos).
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def check(self) -> None:
+        if not self.allow():
+            raise CircuitOpenError("Service IA momentanément indisponible (disjoncteur ouvert).")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probe_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._probe_in_flight:
+                    self.trips += 1
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def record_neutral(self) -> None:
+        """Issue qui ne dit rien de la santé du backend : l'éventuel essai est rendu."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._state(time.monotonic()),
+                "consecutive_failures": self._failures,
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
+
+
+def record_outcome(exc: Optional[BaseException]) -> None:
+    """
+    Met à jour le disjoncteur : seules les erreurs transitoires comptent
+    comme pannes. Une erreur définitive (requête invalide, contenu refusé)
+    est neutre : elle ne remet pas à zéro une série d'échecs en cours.
+    """
+    if exc is None:
+        breaker.record_success()
+    elif is_retryable(exc):
+        breaker.record_failure()
+    else:
+        breaker.record_neutral()
+
+
+def call_with_retries(fn: Callable[[float], T], call_type: str) -> Tuple[T, int]:
+    """
+    Exécute `fn(timeout_restant)` avec nouvelles tentatives et disjoncteur.
+    Renvoie le résultat et le nombre de nouvelles tentatives effectuées.
+    """
+    deadline = time.monotonic() + deadline_for(call_type)
+    attempt = 0
+    while True:
+        breaker.check()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"délai de {deadline_for(call_type):.0f}s dépassé ({call_type})")
+        try:
+            result = fn(remaining)
+        except Exception as exc:
+            record_outcome(exc)
+            delay = retry_delay(exc, attempt, deadline)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            attempt += 1
+            continue
+        record_outcome(None)
+        return result, attempt
+
+
+# Pool dédié aux requêtes doublées ; les perdants finissent en arrière-plan.
+_hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="subtext-hedge")
+
+
+def hedged(fn: Callable[[], T], hedge_after: Optional[float]) -> T:
+    """
+    Lance `fn` ; si aucune réponse n'est arrivée après `hedge_after`
+    secondes, lance un doublon et renvoie la première réponse valide.
+    """
+    if not HEDGING_ENABLED or hedge_after is None:
+        return fn()
+    first: Future = _hedge_pool.submit(fn)
+    done, _ = wait([first], timeout=hedge_after)
+    if done:
+        return first.result()
+    pending = {first, _hedge_pool.submit(fn)}
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    assert error is not None
+    raise error
+
+
+# Disjoncteur partagé par toutes les sessions du processus.
+breaker = CircuitBreaker()
@@ -0,0 +1,157 @@
+"""
+Routage des analyses entre modèles.
+
+Un petit modèle rapide (triage) estime d'abord le type de contenu et un
+score grossier. Seuls les textes ambigus, à risque ou longs passent par le
+modèle d'analyse complet ; les autres sont analysés par le modèle léger,
+avec le même schéma de sortie.
+
+Chaque décision est journalisée (en mémoire, bornée) avec les latences
+mesurées, pour suivre le taux d'escalade et le temps gagné.
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+# Bornes de décision (scores 0–100 du triage).
+ROUTING_AMBIGUOUS_RANGE = (35, 60)
+ROUTING_HIGH_RISK = 60
+ROUTING_MIN_CONFIDENCE = 0.6
+# Au-delà, l'analyse fine (passages, fact-check) justifie le modèle complet.
+ROUTING_LONG_TEXT_CHARS = 4000
+
+
+@dataclass
+class TriageResult:
+    content_type: str = "autre"
+    global_score: int = 50
+    confidence: float = 0.0
+    latency_s: float = 0.0
+    cached: bool = False
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any], latency_s: float = 0.0) -> "TriageResult":
+        try:
+            score = int(data.get("global_score", 50))
+        except (TypeError, ValueError):
+            score = 50
+        try:
+            confidence = float(data.get("confidence", 0.0))
+        except (TypeError, ValueError):
+            confidence = 0.0
+        return cls(
+            content_type=str(data.get("content_type") or "autre"),
+            global_score=max(0, min(100, score)),
+            confidence=max(0.0, min(1.0, confidence)),
+            latency_s=latency_s,
+        )
+
+
+@dataclass
+class RoutingDecision:
+    analysis_model: str
+    escalated: bool
+    reason: str
+    triage: Optional[TriageResult] = None
+    prescore: Optional[int] = None
+    analysis_latency_s: Optional[float] = None
+    estimated_saving_s: Optional[float] = None
+    created_at: float = field(default_factory=time.time)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def decide(
+    text: str,
+    main_model: str,
+    light_model: str,
+    triage: Optional[TriageResult] = None,
+    prescore: Optional[int] = None,
+) -> RoutingDecision:
+    """
+    Choisit le modèle d'analyse. Sans triage (pré-score déjà élevé ou
+    triage en échec), on escalade par prudence.
+    """
+    if prescore is not None and prescore >= ROUTING_HIGH_RISK:
+        return RoutingDecision(main_model, True, "pré-score élevé", prescore=prescore)
+    if len(text) > ROUTING_LONG_TEXT_CHARS:
+        return RoutingDecision(main_model, True, "texte long", triage=triage, prescore=prescore)
+    if triage is None:
+        return RoutingDecision(main_model, True, "triage indisponible", prescore=prescore)
+    if triage.global_score >= ROUTING_HIGH_RISK:
+        reason = "risque élevé"
+    elif ROUTING_AMBIGUOUS_RANGE[0] <= triage.global_score < ROUTING_AMBIGUOUS_RANGE[1]:
+        reason = "score ambigu"
+    elif triage.confidence < ROUTING_MIN_CONFIDENCE:
+        reason = "triage peu confiant"
+    else:
+        return RoutingDecision(light_model, False, "texte clair, modèle léger", triage=triage, prescore=prescore)
+    return RoutingDecision(main_model, True, reason, triage=triage, prescore=prescore)
+
+
+class RoutingLog:
+    """
+    Journal borné des décisions de routage, avec latence moyenne glissante
+    par modèle pour estimer le temps gagné quand on n'escalade pas.
+    """
+
+    def __init__(self, max_entries: int = 500, ewma_alpha: float = 0.2) -> None:
+        self._entries: Deque[RoutingDecision] = deque(maxlen=max_entries)
+        self._latency: Dict[str, float] = {}
+        self._alpha = ewma_alpha
+        self._lock = threading.Lock()
+
+    def observe_latency(self, model: str, seconds: float) -> None:
+        with self._lock:
+            previous = self._latency.get(model)
+            self._latency[model] = seconds if previous is None else (
+                self._alpha * seconds + (1 - self._alpha) * previous
+            )
+
+    def expected_latency(self, model: str) -> Optional[float]:
+        with self._lock:
+            return self._latency.get(model)
+
+    def record(self, decision: RoutingDecision, main_model: str) -> None:
+        if decision.escalated:
+            # Le tri n'a rien évité : sa latence est un surcoût.
+            if decision.triage is not None:
+                decision.estimated_saving_s = round(-decision.triage.latency_s, 3)
+        if decision.analysis_latency_s is not None:
+            self.observe_latency(decision.analysis_model, decision.analysis_latency_s)
+            if not decision.escalated:
+                baseline = self.expected_latency(main_model)
+                if baseline is not None:
+                    spent = decision.analysis_latency_s + (decision.triage.latency_s if decision.triage else 0.0)
+                    decision.estimated_saving_s = round(baseline - spent, 3)
+        with self._lock:
+            self._entries.append(decision)
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [d.as_dict() for d in list(self._entries)[-limit:]]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = list(self._entries)
+            latency = dict(self._latency)
+        escalated = sum(1 for d in entries if d.escalated)
+        savings = [d.estimated_saving_s for d in entries if d.estimated_saving_s is not None]
+        reasons: Dict[str, int] = {}
+        for d in entries:
+            reasons[d.reason] = reasons.get(d.reason, 0) + 1
+        return {
+            "decisions": len(entries),
+            "escalated": escalated,
+            "escalation_rate": (escalated / len(entries)) if entries else 0.0,
+            "reasons": reasons,
+            "total_saving_s": round(sum(savings), 3),
+            "mean_latency_s": {model: round(v, 3) for model, v in latency.items()},
+        }
+
+
+# Journal partagé par toutes les sessions du processus.
+routing_log = RoutingLog()
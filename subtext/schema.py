@@ -0,0 +1,505 @@
+"""
+Validation et réparation des réponses JSON du modèle.
+
+Un `json.loads` qui échoue faisait perdre tout le scan, et un champ absent
+ou mal typé (« 72% » au lieu de 72, label hors liste, liste réduite à une
+chaîne) était rattrapé au cas par cas à l'affichage. Ici, chaque schéma est
+compilé une fois en une fonction de validation qui :
+- convertit les types (nombres en texte, chaîne seule en liste…) et borne
+  les scores à 0–100 ;
+- ramène les énumérations à leurs valeurs connues, labels dérivés du score
+  à défaut ;
+- remplit les champs absents avec une valeur neutre et signale les champs
+  obligatoires manquants, que le moteur peut redemander seuls.
+
+`repair_json` récupère aussi une réponse tronquée (coupure réseau, limite
+de tokens) en refermant chaînes et objets après le dernier champ complet.
+Les compteurs de `schema_stats` mesurent ce qui a été corrigé.
+"""
+import json
+import logging
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from subtext.heuristics import score_to_global_label, score_to_level
+
+logger = logging.getLogger("subtext.schema")
+
+LEVELS = ("très faible", "faible", "moyenne", "élevée", "très élevée")
+GLOBAL_LABELS = ("Toxique", "Tendu", "Ambigu", "Neutre", "Positif")
+CONTENT_TYPES = ("interaction", "article", "discours", "forum", "réseau_social", "autre")
+VERDICTS = ("vrai", "faux", "partiellement vrai", "incertain")
+SCALES = ("micro", "méso", "macro", "micro→macro")
+
+_NUMBER_RE = re.compile(r"-?\d+(?:[.,]\d+)?")
+
+
+class SchemaError(ValueError):
+    """Aucun objet JSON exploitable dans la réponse."""
+
+
+@dataclass
+class ValidationReport:
+    schema: str
+    repaired_json: bool = False
+    coerced: List[str] = field(default_factory=list)
+    clamped: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+    refetched: List[str] = field(default_factory=list)
+
+    @property
+    def clean(self) -> bool:
+        return not (self.repaired_json or self.coerced or self.clamped or self.missing)
+
+
+Coercer = Callable[[Any, str, ValidationReport], Any]
+_ABSENT = object()
+
+
+# ───────── Briques de validation ─────────
+def score() -> Coercer:
+    def coerce(value: Any, path: str, report: ValidationReport) -> int:
+        number: Optional[float] = None
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            number = float(value)
+        elif isinstance(value, str):
+            m = _NUMBER_RE.search(value)
+            if m:
+                number = float(m.group().replace(",", "."))
+        if number is None:
+            if value is not _ABSENT:
+                report.coerced.append(path)
+            return 0
+        if isinstance(value, str) or number != int(number):
+            report.coerced.append(path)
+        if not 0 <= number <= 100:
+            report.clamped.append(path)
+        return max(0, min(100, int(round(number))))
+
+    return coerce
+
+
+def integer(low: int, high: int, default: int) -> Coercer:
+    def coerce(value: Any, path: str, report: ValidationReport) -> int:
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            if value is not _ABSENT:
+                report.coerced.append(path)
+            return default
+        if not low <= number <= high:
+            report.clamped.append(path)
+        return max(low, min(high, number))
+
+    return coerce
+
+
+def text(default: str = "") -> Coercer:
+    def coerce(value: Any, path: str, report: ValidationReport) -> str:
+        if isinstance(value, str):
+            return value.strip()
+        if value is _ABSENT or value is None:
+            return default
+        report.coerced.append(path)
+        if isinstance(value, list):
+            return " ".join(str(v).strip() for v in value if v is not None)
+        return str(value).strip()
+
+    return coerce
+
+
+def choice(options: Sequence[str], default: Optional[str]) -> Coercer:
+    """Valeur d'une énumération, comparée sans casse ni espaces superflus."""
+    by_key = {option.casefold(): option for option in options}
+
+    def coerce(value: Any, path: str, report: ValidationReport) -> Optional[str]:
+        if isinstance(value, str) and value in options:
+            return value
+        if isinstance(value, str) and value.strip().casefold() in by_key:
+            report.coerced.append(path)
+            return by_key[value.strip().casefold()]
+        if value is not _ABSENT:
+            report.coerced.append(path)
+        return default
+
+    return coerce
+
+
+def items(of: Coercer, max_items: Optional[int] = None, keep: Optional[Callable[[Any], bool]] = None) -> Coercer:
+    """Liste d'éléments validés ; une valeur seule devient une liste d'un élément."""
+
+    def coerce(value: Any, path: str, report: ValidationReport) -> List[Any]:
+        if value is _ABSENT or value is None:
+            return []
+        if not isinstance(value, list):
+            report.coerced.append(path)
+            value = [value]
+        result = []
+        for i, item in enumerate(value):
+            clean = of(item, f"{path}[{i}]", report)
+            if keep is None or keep(clean):
+                result.append(clean)
+        return result[:max_items] if max_items is not None else result
+
+    return coerce
+
+
+def obj(fields: Dict[str, Coercer], derived: Optional[Callable[[Dict[str, Any]], None]] = None) -> Coercer:
+    """Objet aux champs connus (les autres sont ignorés) ; `derived` complète les valeurs liées."""
+
+    def coerce(value: Any, path: str, report: ValidationReport) -> Dict[str, Any]:
+        if not isinstance(value, dict):
+            if value is not _ABSENT and value is not None:
+                report.coerced.append(path)
+            value = {}
+        result = {key: check(value.get(key, _ABSENT), f"{path}.{key}", report) for key, check in fields.items()}
+        if derived is not None:
+            derived(result)
+        return result
+
+    return coerce
+
+
+def _axis_label(axis: Dict[str, Any]) -> None:
+    if axis["label"] is None:
+        axis["label"] = score_to_level(axis["score"])
+
+
+def axis() -> Coercer:
+    """Axe { score, label } ; un score nu (« 40 », 40) est accepté."""
+    check = obj({"score": score(), "label": choice(LEVELS, None)}, derived=_axis_label)
+
+    def coerce(value: Any, path: str, report: ValidationReport) -> Dict[str, Any]:
+        if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+            report.coerced.append(path)
+            value = {"score": value}
+        return check(value, path, report)
+
+    return coerce
+
+
+def _has(key: str) -> Callable[[Dict[str, Any]], bool]:
+    """Filtre des éléments vides (passage sans citation, action sans label…)."""
+    return lambda item: bool(item.get(key))
+
+
+# ───────── Schémas ─────────
+class Schema:
+    """Schéma compilé : `validate(data)` renvoie l'objet nettoyé et le rapport."""
+
+    def __init__(
+        self,
+        name: str,
+        fields: Dict[str, Coercer],
+        required: Sequence[str] = (),
+        derived: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> None:
+        self.name = name
+        self.fields = fields
+        self.required = tuple(required)
+        self._check = obj(fields, derived)
+
+    def validate(self, data: Any, report: Optional[ValidationReport] = None) -> Tuple[Dict[str, Any], ValidationReport]:
+        report = report or ValidationReport(schema=self.name)
+        present = data if isinstance(data, dict) else {}
+        # Une liste vide est une réponse (aucun passage repéré) ; une clé absente non.
+        report.missing = [key for key in self.required if present.get(key) is None or present.get(key) == ""]
+        clean = self._check(data, self.name, report)
+        # Champs hors schéma produits ailleurs (source, état dégradé…) conservés.
+        for key, value in present.items():
+            if key not in clean:
+                clean[key] = value
+        return clean, report
+
+
+def _global_label(data: Dict[str, Any]) -> None:
+    if data.get("global_label", _ABSENT) is None:
+        benevolent = "bienveillant" in (data.get("tags") or [])
+        data["global_label"] = score_to_global_label(data.get("global_score", 0), benevolent)
+
+
+_HIGHLIGHT = obj({
+    "quote": text(),
+    "tag": text(),
+    "technique_name": text(),
+    "simple_definition": text(),
+    "everyday_example": text(),
+    "explanation": text(),
+})
+_FACT_CHECK = obj({
+    "claim": text(),
+    "verdict": choice(VERDICTS, "incertain"),
+    "explanation": text(),
+    "sources": items(text(), keep=bool),
+})
+_ACTION = obj({"label": text(), "detail": text(), "priority": integer(1, 5, 3)})
+_PROFILE = obj({
+    "relation_type": text(),
+    "channel": text(),
+    "power_asymmetry": text(),
+    "target_audience": text(),
+})
+_SYSTEMIC = obj({
+    "scale": choice(SCALES, "micro"),
+    "power_dynamics": text(),
+    "narrative_frame": text(),
+    "macro_implications": items(text(), keep=bool),
+})
+_TAGS = items(text(), max_items=8, keep=bool)
+
+ANALYSIS_SCHEMA = Schema(
+    "analysis",
+    {
+        "content_type": choice(CONTENT_TYPES, "autre"),
+        "global_score": score(),
+        "global_label": choice(GLOBAL_LABELS, None),
+        "main_effect": text(),
+        "secondary_effects": items(text(), keep=bool),
+        "tags": _TAGS,
+        "hostility": axis(),
+        "manipulation": axis(),
+        "pressure": axis(),
+        "profile": _PROFILE,
+        "plain_translation": text(),
+        "systemic_view": _SYSTEMIC,
+        "highlights": items(_HIGHLIGHT, keep=_has("quote")),
+        "fact_checks": items(_FACT_CHECK, keep=_has("claim")),
+        "recommended_actions": items(_ACTION, keep=_has("label")),
+        "reaction_validation": text(),
+        "viral_punchline": text(),
+    },
+    # Champs qui valent un second appel s'ils manquent (les autres ont un
+    # défaut neutre acceptable).
+    required=(
+        "global_score", "main_effect", "tags", "hostility", "manipulation", "pressure",
+        "plain_translation", "highlights", "recommended_actions", "reaction_validation",
+    ),
+    derived=_global_label,
+)
+
+# Profil compact (mode Roast, voir subtext/profiles.py) : mêmes champs,
+# mais ceux qui ne sont pas demandés au modèle ne sont pas redemandés.
+ANALYSIS_COMPACT_SCHEMA = Schema(
+    "analysis_compact",
+    ANALYSIS_SCHEMA.fields,
+    required=(
+        "global_score", "main_effect", "tags", "hostility", "manipulation", "pressure",
+        "plain_translation", "highlights", "recommended_actions", "viral_punchline",
+    ),
+    derived=_global_label,
+)
+
+# Profil cœur (mode Calme) : les sections longues arrivent à part.
+ANALYSIS_CORE_SCHEMA = Schema(
+    "analysis_core",
+    ANALYSIS_SCHEMA.fields,
+    required=(
+        "global_score", "main_effect", "tags", "hostility", "manipulation", "pressure",
+        "plain_translation", "highlights", "recommended_actions", "reaction_validation",
+    ),
+    derived=_global_label,
+)
+
+# Sections différées, rédigées après l'analyse cœur (voir subtext/deferred.py).
+SECTION_SCHEMAS = {
+    "systemic_view": Schema("section_systemic_view", {"systemic_view": _SYSTEMIC}, required=("systemic_view",)),
+    "highlight_details": Schema(
+        "section_highlight_details",
+        {"highlights": items(_HIGHLIGHT, keep=_has("quote"))},
+        required=("highlights",),
+    ),
+    "fact_checks": Schema(
+        "section_fact_checks",
+        {"fact_checks": items(_FACT_CHECK, keep=_has("claim"))},
+        required=("fact_checks",),
+    ),
+    "reaction_validation": Schema(
+        "section_reaction_validation",
+        {"reaction_validation": text()},
+        required=("reaction_validation",),
+    ),
+}
+
+CHUNK_SCHEMA = Schema(
+    "chunk",
+    {
+        "content_type": choice(CONTENT_TYPES, "autre"),
+        "global_score": score(),
+        "main_effect": text(),
+        "secondary_effects": items(text(), keep=bool),
+        "tags": _TAGS,
+        "hostility": axis(),
+        "manipulation": axis(),
+        "pressure": axis(),
+        "highlights": items(_HIGHLIGHT, keep=_has("quote")),
+        "fact_checks": items(_FACT_CHECK, keep=_has("claim")),
+        "recommended_actions": items(_ACTION, keep=_has("label")),
+    },
+    required=("global_score", "hostility", "manipulation", "pressure"),
+)
+
+SYNTHESIS_SCHEMA = Schema(
+    "synthesis",
+    {
+        "global_label": choice(GLOBAL_LABELS, None),
+        "main_effect": text(),
+        "profile": _PROFILE,
+        "plain_translation": text(),
+        "systemic_view": _SYSTEMIC,
+        "reaction_validation": text(),
+        "viral_punchline": text(),
+    },
+    required=("main_effect", "plain_translation"),
+)
+
+REPLY_SCHEMA = Schema("reply", {"calm": text(), "assertive": text()}, required=("calm", "assertive"))
+
+SCHEMAS = {
+    schema.name: schema
+    for schema in (
+        ANALYSIS_SCHEMA, ANALYSIS_COMPACT_SCHEMA, ANALYSIS_CORE_SCHEMA, CHUNK_SCHEMA, SYNTHESIS_SCHEMA, REPLY_SCHEMA,
+        *SECTION_SCHEMAS.values(),
+    )
+}
+
+
+# ───────── Réparation du JSON ─────────
+def _strip_wrapping(content: str) -> str:
+    """Retire un bloc markdown ou du texte autour de l'objet."""
+    start = content.find("{")
+    if start < 0:
+        return ""
+    content = content[start:]
+    end = content.rfind("}")
+    fenced = content.rstrip().endswith("```")
+    return content[:end + 1] if fenced and end > 0 else content
+
+
+def repair_json(content: str) -> Optional[Dict[str, Any]]:
+    """
+    Objet JSON de `content`, même tronqué : on coupe après la dernière valeur
+    complète et on referme les objets et listes encore ouverts.
+    """
+    content = _strip_wrapping(content or "")
+    if not content:
+        return None
+    try:
+        data = json.loads(content)
+        return data if isinstance(data, dict) else None
+    except ValueError:
+        pass
+
+    stack: List[str] = []
+    in_string = escape = False
+    # (position de coupe, fermetures à ajouter) après chaque valeur complète.
+    cut: Optional[Tuple[int, str]] = None
+    for i, ch in enumerate(content):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if not stack:
+                break
+            stack.pop()
+            if not stack:
+                cut = (i + 1, "")
+                break
+            cut = (i + 1, "".join(reversed(stack)))
+        elif ch == "," and stack:
+            cut = (i, "".join(reversed(stack)))
+
+    candidates = []
+    if cut is not None:
+        candidates.append(content[:cut[0]] + cut[1])
+    if in_string and stack:
+        # Rien de complet avant la coupure : on referme la chaîne telle quelle.
+        candidates.append(content.rstrip("\\") + '"' + "".join(reversed(stack)))
+    for candidate in candidates:
+        try:
+            data = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            return data
+    return None
+
+
+def parse_response(content: str, schema: Schema) -> Tuple[Dict[str, Any], ValidationReport]:
+    """JSON du modèle, réparé si besoin puis validé. Lève `SchemaError` si rien n'est récupérable."""
+    report = ValidationReport(schema=schema.name)
+    try:
+        data = json.loads(content)
+    except ValueError:
+        data = repair_json(content)
+        if data is None:
+            raise SchemaError(f"réponse {schema.name} illisible ({len(content or '')} caractères)")
+        report.repaired_json = True
+    if not isinstance(data, dict):
+        raise SchemaError(f"réponse {schema.name} : objet JSON attendu")
+    return schema.validate(data, report)
+
+
+def complete(
+    data: Dict[str, Any],
+    extra: Dict[str, Any],
+    schema: Schema,
+    report: ValidationReport,
+) -> Dict[str, Any]:
+    """Fusionne les champs redemandés dans `data` puis revalide l'ensemble."""
+    filled = [key for key in report.missing if extra.get(key) is not None and extra.get(key) != ""]
+    merged = dict(data)
+    for key in filled:
+        merged[key] = extra[key]
+    clean, _ = schema.validate(merged, ValidationReport(schema=schema.name))
+    report.refetched = filled
+    report.missing = [key for key in report.missing if key not in filled]
+    return clean
+
+
+# ───────── Statistiques ─────────
+class SchemaStats:
+    """Compteurs de validation par schéma, partagés par le processus."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, report: ValidationReport) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(report.schema, {
+                "responses": 0, "clean": 0, "repaired_json": 0, "coerced": 0,
+                "clamped": 0, "refetched": 0, "still_missing": 0,
+            })
+            counts["responses"] += 1
+            counts["clean"] += report.clean and not report.refetched
+            counts["repaired_json"] += report.repaired_json
+            counts["coerced"] += bool(report.coerced)
+            counts["clamped"] += bool(report.clamped)
+            counts["refetched"] += bool(report.refetched)
+            counts["still_missing"] += bool(report.missing)
+        if report.repaired_json or report.refetched or report.missing:
+            logger.warning(
+                "réponse %s corrigée : json réparé=%s, redemandés=%s, manquants=%s, convertis=%d, bornés=%d",
+                report.schema, report.repaired_json, report.refetched, report.missing,
+                len(report.coerced), len(report.clamped),
+            )
+        elif not report.clean:
+            logger.info("réponse %s : %d champs convertis, %d bornés", report.schema, len(report.coerced), len(report.clamped))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {name: dict(counts) for name, counts in self._counts.items()}
+
+
+schema_stats = SchemaStats()
@@ -0,0 +1,125 @@
+"""
+Mutualisation des appels identiques en cours (« single-flight »).
+
+Quand un texte devient viral, des dizaines de sessions le collent en même
+temps : sans coordination, chacune lance son propre appel LLM. Ici, le
+premier appelant d'une clé (texte normalisé + modèle + version de prompt)
+exécute l'appel ; les suivants attendent son résultat. Les événements
+intermédiaires (champs streamés) sont rejoués à chaque attente, sur son
+propre thread, pour que toutes les sessions voient l'analyse se construire.
+"""
+import copy
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+Emit = Callable[[Any], None]
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.cond = threading.Condition()
+        self.events: List[Any] = []
+        self.done = False
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Un seul appel en vol par clé ; les autres appelants en partagent le résultat."""
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(
+        self,
+        key: str,
+        fn: Callable[[Emit], T],
+        on_event: Optional[Emit] = None,
+    ) -> Tuple[T, bool]:
+        """
+        Exécute `fn(emit)` ou rejoint l'exécution en cours pour `key`.
+        Renvoie (résultat, partagé) ; `on_event` reçoit chaque événement émis.
+        Les résultats partagés sont copiés : chaque appelant peut modifier le sien.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+        if leader:
+            return self._lead(key, call, fn, on_event), False
+        return self._wait(call, on_event), True
+
+    def _lead(self, key: str, call: _Call, fn: Callable[[Emit], T], on_event: Optional[Emit]) -> T:
+        def emit(event: Any) -> None:
+            with call.cond:
+                call.events.append(event)
+                call.cond.notify_all()
+            if on_event is not None:
+                on_event(event)
+
+        result: Any = None
+        try:
+            result = fn(emit)
+            return result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                # Clé retirée : plus aucun appelant ne peut rejoindre l'appel.
+                shared = call.waiters > 0
+            with call.cond:
+                # Copie intacte prise avant de libérer quiconque : le meneur
+                # garde l'original, les appelants en attente en copient chacun
+                # une version que personne n'a pu modifier.
+                if shared and call.error is None:
+                    call.result = copy.deepcopy(result)
+                call.done = True
+                call.cond.notify_all()
+
+    def _wait(self, call: _Call, on_event: Optional[Emit]) -> Any:
+        seen = 0
+        while True:
+            with call.cond:
+                while seen == len(call.events) and not call.done:
+                    call.cond.wait()
+                pending = call.events[seen:]
+                seen = len(call.events)
+                done = call.done
+            if on_event is not None:
+                for event in pending:
+                    on_event(event)
+            if done:
+                break
+        if call.error is not None:
+            raise call.error
+        return copy.deepcopy(call.result)
+
+    def waiters(self) -> Dict[str, int]:
+        """Nombre d'appelants en attente par clé en vol (hors meneur)."""
+        with self._lock:
+            return {key: call.waiters for key, call in self._calls.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "waiting": sum(call.waiters for call in self._calls.values()),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+            }
+
+
+# Partagé par toutes les sessions du processus (clés = clés de cache).
+inflight = SingleFlight()
@@ -0,0 +1,91 @@
+"""
+Lecture incrémentale d'un objet JSON reçu en streaming.
+
+Le modèle renvoie un seul objet JSON ; `JsonFieldStreamer` repère chaque
+champ de premier niveau dès que sa valeur est refermée, ce qui permet
+d'afficher `global_score`, `main_effect`… sans attendre la fin de la
+génération.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class JsonFieldStreamer:
+    """
+    Parseur incrémental des champs de premier niveau d'un objet JSON.
+
+    `feed()` reçoit les morceaux de texte tels qu'ils arrivent et renvoie les
+    couples (clé, valeur) nouvellement complets. Les valeurs imbriquées
+    (objets, listes) ne sont émises qu'une fois entièrement refermées.
+    """
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start: Optional[int] = None
+        self._current_key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        if not chunk or self.done:
+            return []
+        self._text += chunk
+        completed: List[Tuple[str, Any]] = []
+        text = self._text
+        i = self._pos
+        while i < len(text):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._value_start is None and self._key_start is not None:
+                        self._current_key = json.loads(text[self._key_start:i + 1])
+                        self._key_start = None
+            elif ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._value_start is None and self._current_key is None:
+                    self._key_start = i
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._close_value(text, i, completed)
+                    self.done = True
+                    i += 1
+                    break
+            elif self._depth == 1:
+                if ch == ":" and self._current_key is not None and self._value_start is None:
+                    self._value_start = i + 1
+                elif ch == ",":
+                    self._close_value(text, i, completed)
+            i += 1
+        self._pos = i
+        return completed
+
+    def _close_value(self, text: str, end: int, completed: List[Tuple[str, Any]]) -> None:
+        if self._current_key is None or self._value_start is None:
+            return
+        raw = text[self._value_start:end].strip()
+        key = self._current_key
+        self._current_key = None
+        self._value_start = None
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        self.fields[key] = value
+        completed.append((key, value))
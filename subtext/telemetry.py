@@ -0,0 +1,265 @@
+"""
+Télémétrie des appels LLM : latence, tokens, coût, échecs.
+
+Chaque appel passé par le moteur produit un `CallRecord` : temps total,
+temps jusqu'au premier token (streaming), tokens d'entrée / en cache / de
+sortie, coût estimé, modèle, nombre de tentatives et statut. Les
+enregistrements sont gardés en mémoire (fenêtre glissante par type
+d'appel) et ajoutés à un fichier JSONL local pour l'analyse hors ligne.
+
+    python -m subtext.telemetry summary          # p50/p95/p99 par type d'appel
+    python -m subtext.telemetry prometheus       # format texte Prometheus
+    python -m subtext.telemetry serve --port 9108  # expose /metrics
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from subtext.usage import TokenUsage
+
+# Chemin du journal JSONL ; chaîne vide pour désactiver l'écriture disque.
+TELEMETRY_PATH = os.getenv("SUBTEXT_TELEMETRY_PATH", os.path.join(".subtext", "llm_calls.jsonl"))
+WINDOW_SIZE = 2000
+
+# Prix publics en USD par million de tokens : (entrée, entrée en cache, sortie).
+PRICING_PER_MTOK: Dict[str, tuple] = {
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+}
+
+
+def estimate_cost(usage: TokenUsage) -> Optional[float]:
+    """Coût estimé d'un appel, None si le modèle n'a pas de tarif connu."""
+    prices = PRICING_PER_MTOK.get(usage.model)
+    if prices is None:
+        return None
+    price_in, price_cached, price_out = prices
+    cost = (
+        usage.uncached_tokens * price_in
+        + usage.cached_tokens * price_cached
+        + usage.completion_tokens * price_out
+    ) / 1_000_000
+    return round(cost, 6)
+
+
+@dataclass
+class CallRecord:
+    call_type: str
+    model: str
+    wall_s: float
+    ok: bool = True
+    ttft_s: Optional[float] = None
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: Optional[float] = None
+    retries: int = 0
+    error: Optional[str] = None
+    ts: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_usage(cls, usage: TokenUsage, wall_s: float, **kwargs: Any) -> "CallRecord":
+        return cls(
+            call_type=usage.call_type,
+            model=usage.model,
+            wall_s=round(wall_s, 4),
+            prompt_tokens=usage.prompt_tokens,
+            cached_tokens=usage.cached_tokens,
+            completion_tokens=usage.completion_tokens,
+            cost_usd=estimate_cost(usage),
+            **kwargs,
+        )
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Percentile au rang le plus proche (q entre 0 et 100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return round(ordered[rank], 4)
+
+
+def summarize(records: Iterable[CallRecord]) -> Dict[str, Dict[str, Any]]:
+    """Agrégats par type d'appel : volumes, échecs, percentiles, tokens, coût."""
+    groups: Dict[str, List[CallRecord]] = defaultdict(list)
+    for record in records:
+        groups[record.call_type].append(record)
+    out: Dict[str, Dict[str, Any]] = {}
+    for call_type, items in sorted(groups.items()):
+        walls = [r.wall_s for r in items if r.ok]
+        ttfts = [r.ttft_s for r in items if r.ok and r.ttft_s is not None]
+        out[call_type] = {
+            "calls": len(items),
+            "errors": sum(1 for r in items if not r.ok),
+            "retries": sum(r.retries for r in items),
+            "wall_s": {f"p{q}": percentile(walls, q) for q in (50, 95, 99)},
+            "ttft_s": {f"p{q}": percentile(ttfts, q) for q in (50, 95, 99)},
+            "prompt_tokens": sum(r.prompt_tokens for r in items),
+            "cached_tokens": sum(r.cached_tokens for r in items),
+            "completion_tokens": sum(r.completion_tokens for r in items),
+            "cost_usd": round(sum(r.cost_usd or 0.0 for r in items), 4),
+        }
+    return out
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def prometheus_text(records: Iterable[CallRecord]) -> str:
+    """Exposition au format texte Prometheus (compteurs + résumé de latence)."""
+    records = list(records)
+    lines: List[str] = []
+    counts: Dict[tuple, int] = defaultdict(int)
+    for r in records:
+        counts[(r.call_type, r.model, "ok" if r.ok else "error")] += 1
+    lines.append("# HELP subtext_llm_calls_total Appels LLM par type, modèle et statut.")
+    lines.append("# TYPE subtext_llm_calls_total counter")
+    for (call_type, model, status), n in sorted(counts.items()):
+        lines.append(
+            f'subtext_llm_calls_total{{call_type="{_label(call_type)}",model="{_label(model)}",status="{status}"}} {n}'
+        )
+    summary = summarize(records)
+    for metric, key, help_text in (
+        ("subtext_llm_latency_seconds", "wall_s", "Durée totale des appels LLM réussis."),
+        ("subtext_llm_ttft_seconds", "ttft_s", "Temps jusqu'au premier token (appels streamés)."),
+    ):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} summary")
+        for call_type, stats in summary.items():
+            for q, value in stats[key].items():
+                if value is not None:
+                    quantile = int(q[1:]) / 100
+                    lines.append(f'{metric}{{call_type="{_label(call_type)}",quantile="{quantile}"}} {value}')
+    for metric, key, help_text in (
+        ("subtext_llm_prompt_tokens_total", "prompt_tokens", "Tokens d'entrée."),
+        ("subtext_llm_cached_tokens_total", "cached_tokens", "Tokens d'entrée servis par le cache de prompts."),
+        ("subtext_llm_completion_tokens_total", "completion_tokens", "Tokens de sortie."),
+        ("subtext_llm_cost_usd_total", "cost_usd", "Coût estimé en dollars."),
+        ("subtext_llm_retries_total", "retries", "Nouvelles tentatives après échec."),
+    ):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for call_type, stats in summary.items():
+            lines.append(f'{metric}{{call_type="{_label(call_type)}"}} {stats[key]}')
+    return "\n".join(lines) + "\n"
+
+
+class Telemetry:
+    """Collecteur thread-safe : fenêtre mémoire par type d'appel + journal JSONL."""
+
+    def __init__(self, path: Optional[str] = TELEMETRY_PATH, window: int = WINDOW_SIZE) -> None:
+        self.path = path or None
+        self._window: Dict[str, Deque[CallRecord]] = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+        # Verrou distinct pour le fichier : une écriture lente ne bloque pas
+        # `latency_percentile`, consulté avant chaque appel LLM.
+        self._write_lock = threading.Lock()
+        self._dir_ready = False
+
+    def record(self, record: CallRecord) -> None:
+        with self._lock:
+            self._window[record.call_type].append(record)
+        if not self.path:
+            return
+        line = json.dumps(asdict(record), ensure_ascii=False) + "\n"
+        with self._write_lock:
+            try:
+                if not self._dir_ready:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    self._dir_ready = True
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError:
+                # La télémétrie ne doit jamais faire échouer un scan.
+                pass
+
+    def records(self) -> List[CallRecord]:
+        with self._lock:
+            return [r for window in self._window.values() for r in window]
+
+    def latency_percentile(self, call_type: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """Percentile de durée des appels réussis d'un type, None si trop peu d'appels."""
+        with self._lock:
+            walls = [r.wall_s for r in self._window.get(call_type, ()) if r.ok]
+        return percentile(walls, q) if len(walls) >= min_samples else None
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return summarize(self.records())
+
+    def prometheus(self) -> str:
+        return prometheus_text(self.records())
+
+
+def load_records(path: str) -> List[CallRecord]:
+    """Relit un journal JSONL (lignes tronquées ignorées)."""
+    records: List[CallRecord] = []
+    if not os.path.exists(path):
+        return records
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(CallRecord(**json.loads(line)))
+            except (ValueError, TypeError):
+                continue
+    return records
+
+
+# Collecteur partagé par toutes les sessions du processus.
+telemetry = Telemetry()
+
+
+def _serve(path: str, host: str, port: int) -> None:
+    # Import local : http.server pèse ~50 ms et ne sert qu'à la commande `serve`.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 (API http.server)
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text(load_records(path)).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    print(f"Métriques sur http://{host}:{port}/metrics (source : {path})")
+    server.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Télémétrie des appels LLM de SUBTEXT.")
+    parser.add_argument("command", choices=["summary", "prometheus", "serve"])
+    parser.add_argument("--path", default=TELEMETRY_PATH or os.path.join(".subtext", "llm_calls.jsonl"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9108)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        _serve(args.path, args.host, args.port)
+        return 0
+    records = load_records(args.path)
+    if args.command == "summary":
+        print(json.dumps(summarize(records), indent=2, ensure_ascii=False))
+    else:
+        sys.stdout.write(prometheus_text(records))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""
+Mode fil de discussion : découpage en messages, analyse concurrente, synthèse.
+
+Un fil JVC ou Reddit collé d'un bloc est analysé comme un seul texte : les
+messages se diluent et on ne sait plus qui dit quoi. Ici, le fil est
+découpé en messages (auteur, date, corps), chaque message est analysé par
+`analyze_text` sur un pool borné de threads, et chaque résultat est remis à
+l'appelant dès qu'il arrive : un fil de 300 messages se lit pendant que la
+fin est encore en cours. La synthèse du fil (distribution des scores,
+messages les plus hostiles, techniques récurrentes par auteur) se recalcule
+à partir des résultats déjà reçus.
+"""
+import re
+import statistics
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+from subtext.engine import analyze_text
+from subtext.heuristics import prescore, score_to_level
+
+THREAD_MAX_WORKERS = 8
+# Message trop court pour mériter un appel LLM (« +1 », « up », « mdr ») :
+# pré-score local uniquement.
+THREAD_MIN_CHARS = 20
+THREAD_MAX_POSTS = 500
+ANONYMOUS = "anonyme"
+LEVELS = ("très faible", "faible", "moyenne", "élevée", "très élevée")
+
+_MONTHS = (
+    r"janv(?:ier)?|f[ée]vr?(?:ier)?|mars|avr(?:il)?|mai|juin|juil(?:let)?|ao[uû]t|sept(?:embre)?|oct(?:obre)?|nov(?:embre)?|d[ée]c(?:embre)?"
+    r"|jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:tember)?|october|november|december"
+)
+_TIME = r"\d{1,2}[:h]\d{2}(?::\d{2})?"
+_DATE = (
+    rf"(?:\d{{1,2}}[/.-]\d{{1,2}}[/.-]\d{{2,4}}|\d{{4}}-\d{{2}}-\d{{2}}|\d{{1,2}}(?:er)?\s+(?:{_MONTHS})\.?\s+\d{{4}})"
+    rf"(?:[\sT,]*(?:à|at)?\s*{_TIME})?"
+    rf"|il y a \d+\s*(?:s|sec|min|minutes?|h|heures?|j|jours?|mois|ans?)"
+    rf"|\d+\s*(?:s|min|h|d|j|mo|y)\s+ago"
+    rf"|(?:aujourd'hui|hier|today|yesterday)(?:\s*(?:à|at))?\s*{_TIME}"
+)
+_AUTHOR = r"(?:u/)?[\w.\-]{2,30}"
+# « pseudo — 12/06/2024 14:32 », « pseudo · il y a 3 h », « [12/06 14:32] pseudo : texte »…
+_HEADER_RES = [
+    re.compile(rf"^\s*(?P<author>{_AUTHOR})\s*(?:[-—–·|,]\s*)?(?:le\s+)?\(?(?P<ts>{_DATE})\)?\s*:?\s*$", re.I),
+    re.compile(rf"^\s*\[?(?P<ts>{_DATE})\]?\s*[-—–·|]?\s*(?P<author>{_AUTHOR})\s*:\s*(?P<body>.*)$", re.I),
+]
+_DATE_LINE_RE = re.compile(rf"^\s*(?:(?:posté|publié|posted)\s+)?(?:le\s+)?(?P<ts>{_DATE})\s*$", re.I)
+_AUTHOR_LINE_RE = re.compile(rf"^\s*(?P<author>{_AUTHOR})\s*$")
+# « pseudo : texte » : trop ambigu seul (« Objet : … »), retenu s'il se répète.
+_CHAT_LINE_RE = re.compile(rf"^\s*(?P<author>{_AUTHOR})\s*:\s+(?P<body>\S.*)$")
+_CHAT_MIN_LINES = 3
+_SEPARATOR_RE = re.compile(r"^\s*(?:-{3,}|={3,}|_{3,}|\*{3,}|#{3,})\s*$")
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+
+@dataclass
+class Post:
+    index: int
+    author: str
+    timestamp: Optional[str]
+    body: str
+
+
+@dataclass
+class PostResult:
+    post: Post
+    analysis: Optional[Dict[str, Any]]
+    error: Optional[str]
+    elapsed_s: float
+
+    @property
+    def score(self) -> int:
+        return _int((self.analysis or {}).get("global_score"))
+
+    @property
+    def hostility(self) -> int:
+        return _int(((self.analysis or {}).get("hostility") or {}).get("score"))
+
+
+def _int(value: Any) -> int:
+    try:
+        return max(0, min(100, int(value)))
+    except (TypeError, ValueError):
+        return 0
+
+
+# ───────── Découpage en messages ─────────
+def _header_at(lines: List[str], i: int) -> Optional[Dict[str, Any]]:
+    """En-tête de message commençant à la ligne `i` : auteur, date, lignes consommées."""
+    line = lines[i]
+    for pattern in _HEADER_RES:
+        m = pattern.match(line)
+        if m:
+            body = (m.groupdict().get("body") or "").strip()
+            return {"author": m.group("author"), "ts": m.group("ts").strip(), "body": body, "size": 1}
+    # Format JVC : pseudo seul sur sa ligne, date sur la suivante.
+    if i + 1 < len(lines) and _AUTHOR_LINE_RE.match(line) and _DATE_LINE_RE.match(lines[i + 1]):
+        return {
+            "author": line.strip(),
+            "ts": _DATE_LINE_RE.match(lines[i + 1]).group("ts").strip(),
+            "body": "",
+            "size": 2,
+        }
+    return None
+
+
+def _make_posts(parts: Sequence[Dict[str, Any]]) -> List[Post]:
+    posts = []
+    for part in parts:
+        body = "\n".join(part["lines"]).strip()
+        if body:
+            posts.append(Post(index=len(posts), author=part["author"] or ANONYMOUS, timestamp=part["ts"], body=body))
+    return posts
+
+
+def split_posts(text: str) -> List[Post]:
+    """
+    Découpe un fil collé en messages. Reconnaît, par ordre de préférence :
+    les en-têtes « auteur + date » (sur une ou deux lignes), les lignes de
+    chat « auteur : texte » répétées, les séparateurs (`---`, `***`…) et,
+    à défaut, les paragraphes.
+    """
+    lines = (text or "").replace("\r\n", "\n").split("\n")
+
+    parts: List[Dict[str, Any]] = []
+    current: Dict[str, Any] = {"author": None, "ts": None, "lines": []}
+    headers = 0
+    i = 0
+    while i < len(lines):
+        header = _header_at(lines, i)
+        if header is None:
+            current["lines"].append(lines[i])
+            i += 1
+            continue
+        headers += 1
+        parts.append(current)
+        current = {"author": header["author"], "ts": header["ts"], "lines": [header["body"]] if header["body"] else []}
+        i += header["size"]
+    parts.append(current)
+    if headers:
+        return _make_posts(parts)
+
+    chat = [_CHAT_LINE_RE.match(line) for line in lines]
+    if sum(1 for m in chat if m) >= _CHAT_MIN_LINES:
+        parts = [{"author": None, "ts": None, "lines": []}]
+        for line, m in zip(lines, chat):
+            if m:
+                parts.append({"author": m.group("author"), "ts": None, "lines": [m.group("body")]})
+            else:
+                parts[-1]["lines"].append(line)
+        return _make_posts(parts)
+
+    if any(_SEPARATOR_RE.match(line) for line in lines):
+        blocks: List[List[str]] = [[]]
+        for line in lines:
+            if _SEPARATOR_RE.match(line):
+                blocks.append([])
+            else:
+                blocks[-1].append(line)
+        return _make_posts([{"author": None, "ts": None, "lines": block} for block in blocks])
+
+    return _make_posts([{"author": None, "ts": None, "lines": [p]} for p in _PARAGRAPH_RE.split(text or "")])
+
+
+# ───────── Analyse concurrente ─────────
+def analyze_post(post: Post) -> PostResult:
+    started = time.monotonic()
+    try:
+        if len(post.body) < THREAD_MIN_CHARS:
+            analysis = prescore(post.body).to_analysis()
+        else:
+            analysis = analyze_text(post.body)
+        error = None
+    except Exception as e:
+        analysis, error = None, f"{type(e).__name__}: {e}"
+    return PostResult(post=post, analysis=analysis, error=error, elapsed_s=round(time.monotonic() - started, 3))
+
+
+def analyze_thread(
+    posts: Sequence[Post],
+    on_result: Optional[Callable[[PostResult], None]] = None,
+    max_workers: int = THREAD_MAX_WORKERS,
+) -> List[PostResult]:
+    """
+    Analyse les messages avec au plus `max_workers` appels simultanés.
+    `on_result` est appelé dans le thread appelant (sûr pour Streamlit), dans
+    l'ordre d'arrivée. Renvoie les résultats dans l'ordre du fil.
+    """
+    results: List[PostResult] = []
+    pending: Set[Future] = set()
+    queue = iter(posts[:THREAD_MAX_POSTS])
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="subtext-thread") as pool:
+
+        def _fill() -> None:
+            # Fenêtre glissante, comme subtext.batch : pas 300 tâches d'un coup.
+            while len(pending) < max_workers * 2:
+                post = next(queue, None)
+                if post is None:
+                    return
+                pending.add(pool.submit(analyze_post, post))
+
+        _fill()
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                pending.discard(future)
+                result = future.result()
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+            _fill()
+    return sorted(results, key=lambda r: r.post.index)
+
+
+# ───────── Synthèse du fil ─────────
+def _techniques(analysis: Dict[str, Any]) -> List[str]:
+    names = [h.get("technique_name") for h in analysis.get("highlights") or [] if isinstance(h, dict)]
+    names += list(analysis.get("tags") or [])
+    seen: List[str] = []
+    for name in names:
+        name = str(name or "").strip().lower()
+        if name and name not in ("neutre", "bienveillant") and name not in seen:
+            seen.append(name)
+    return seen
+
+
+def rollup(results: Sequence[PostResult], top_n: int = 5) -> Dict[str, Any]:
+    """Synthèse des résultats reçus (partiels ou complets)."""
+    ok = [r for r in results if r.analysis]
+    scores = [r.score for r in ok]
+    distribution = Counter(score_to_level(s) for s in scores)
+
+    by_author: Dict[str, Counter] = defaultdict(Counter)
+    posts_by_author: Counter = Counter()
+    for r in ok:
+        posts_by_author[r.post.author] += 1
+        by_author[r.post.author].update(_techniques(r.analysis))
+    recurring = []
+    for author, counts in by_author.items():
+        # Récurrent = revient dans au moins deux messages du même auteur.
+        repeated = [(name, n) for name, n in counts.most_common() if n >= 2]
+        if repeated and author != ANONYMOUS:
+            recurring.append({"author": author, "posts": posts_by_author[author], "techniques": repeated[:3]})
+    recurring.sort(key=lambda a: -sum(n for _, n in a["techniques"]))
+
+    hostile = sorted(ok, key=lambda r: (-r.hostility, -r.score, r.post.index))[:top_n]
+    return {
+        "posts": len(results),
+        "analyzed": len(ok),
+        "failed": len(results) - len(ok),
+        "authors": len(posts_by_author),
+        "mean_score": round(statistics.mean(scores)) if scores else 0,
+        "median_score": round(statistics.median(scores)) if scores else 0,
+        "max_score": max(scores) if scores else 0,
+        "distribution": {level: distribution.get(level, 0) for level in LEVELS},
+        "most_hostile": [
+            {
+                "index": r.post.index,
+                "author": r.post.author,
+                "hostility": r.hostility,
+                "score": r.score,
+                "excerpt": r.post.body[:200],
+            }
+            for r in hostile
+            if r.hostility > 0
+        ],
+        "recurring_by_author": recurring[:top_n],
+    }
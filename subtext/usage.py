@@ -0,0 +1,91 @@
+"""
+Comptabilité des tokens par appel LLM.
+
+Distingue les tokens d'entrée servis par le cache de prompts du fournisseur
+(`prompt_tokens_details.cached_tokens`) des tokens d'entrée facturés plein
+tarif, pour vérifier que les préfixes statiques de `subtext.prompts` sont
+bien réutilisés.
+"""
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, List
+
+
+@dataclass
+class TokenUsage:
+    call_type: str
+    model: str
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def uncached_tokens(self) -> int:
+        return max(0, self.prompt_tokens - self.cached_tokens)
+
+    @property
+    def cached_ratio(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["uncached_tokens"] = self.uncached_tokens
+        data["cached_ratio"] = round(self.cached_ratio, 3)
+        return data
+
+
+def extract_usage(call_type: str, model: str, usage: Any) -> TokenUsage:
+    """Lit l'objet `usage` du SDK (absent, partiel ou complet)."""
+    if usage is None:
+        return TokenUsage(call_type, model)
+    details = getattr(usage, "prompt_tokens_details", None)
+    return TokenUsage(
+        call_type=call_type,
+        model=model,
+        prompt_tokens=int(getattr(usage, "prompt_tokens", 0) or 0),
+        cached_tokens=int(getattr(details, "cached_tokens", 0) or 0) if details is not None else 0,
+        completion_tokens=int(getattr(usage, "completion_tokens", 0) or 0),
+    )
+
+
+class UsageLedger:
+    """Cumul thread-safe des tokens par type d'appel, plus les derniers appels."""
+
+    def __init__(self, max_recent: int = 200) -> None:
+        self._totals: Dict[str, Dict[str, int]] = {}
+        self._recent: Deque[TokenUsage] = deque(maxlen=max_recent)
+        self._lock = threading.Lock()
+
+    def record(self, usage: TokenUsage) -> TokenUsage:
+        with self._lock:
+            totals = self._totals.setdefault(
+                usage.call_type,
+                {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0},
+            )
+            totals["calls"] += 1
+            totals["prompt_tokens"] += usage.prompt_tokens
+            totals["cached_tokens"] += usage.cached_tokens
+            totals["completion_tokens"] += usage.completion_tokens
+            self._recent.append(usage)
+        return usage
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [u.as_dict() for u in list(self._recent)[-limit:]]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            out: Dict[str, Dict[str, Any]] = {}
+            for call_type, totals in self._totals.items():
+                prompt = totals["prompt_tokens"]
+                out[call_type] = dict(
+                    totals,
+                    uncached_tokens=prompt - totals["cached_tokens"],
+                    cached_ratio=round(totals["cached_tokens"] / prompt, 3) if prompt else 0.0,
+                )
+            return out
+
+
+# Registre partagé par toutes les sessions du processus.
+usage_ledger = UsageLedger()
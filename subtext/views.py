@@ -0,0 +1,417 @@
+"""
+Modèle de vue des résultats d'analyse, prêt à afficher.
+
+Le script Streamlit est réexécuté à chaque interaction : plutôt que de
+redériver à chaque rerun les niveaux des tags, le tri des actions, les
+échappements et le HTML de la carte de partage, on construit une fois par
+analyse un `AnalysisView` immuable, mis en cache par identifiant d'analyse
+et partagé entre sessions. Un rerun ne fait plus qu'émettre ces chaînes.
+"""
+import html
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from subtext.cache import TTLCache, make_cache_key
+from subtext.locate import QuoteSpan, locate_quotes, non_overlapping
+from subtext.profiles import FACT_CHECK_CONTENT_TYPES
+
+# ───────────────── BRIQUES HTML ─────────────────
+def render_tag(text: str, level: str = "info") -> str:
+    level_class = level if level in {"danger", "warn", "info", "safe"} else "info"
+    return f"<span class='tag-pill {level_class}'>{text}</span>"
+
+def get_score_color(score: int) -> str:
+    try:
+        s = int(score)
+    except Exception:
+        return "#f1f5f9"
+    if s >= 75:
+        return "#f87171"
+    if s >= 50:
+        return "#fbbf24"
+    if s >= 25:
+        return "#34d399"
+    return "#6ee7b7"
+
+def render_metric_card(label: str, score: int, sublabel: str) -> str:
+    color = get_score_color(score)
+    width = max(0, min(100, score))
+    return (
+        f"<div class='metric-card'>"
+        f"<div class='metric-label'>{label}</div>"
+        f"<div class='metric-value' style='color:{color};'>{score}%</div>"
+        f"<div class='metric-sub'>{sublabel}</div>"
+        f"<div class='metric-bar-bg'>"
+        f"<div class='metric-bar-fill' style='width:{width}%;background:{color};'></div>"
+        f"</div>"
+        f"</div>"
+    )
+
+def render_annotated_text(text: str, spans: Dict[int, QuoteSpan], labels: Sequence[str]) -> str:
+    """Texte d'origine échappé, passages repérés surlignés et numérotés comme leurs cartes."""
+    parts = []
+    position = 0
+    for index, span in sorted(spans.items(), key=lambda item: item[1].start):
+        title = html.escape(labels[index] or "Passage repéré", quote=True)
+        approx = "" if span.exact else " approx"
+        parts.append(html.escape(text[position:span.start]))
+        parts.append(
+            f"<mark class='hl-mark{approx}' title='{title}'>{html.escape(text[span.start:span.end])}"
+            f"<sup>{index + 1}</sup></mark>"
+        )
+        position = span.end
+    parts.append(html.escape(text[position:]))
+    # Sans saut de ligne brut : le bloc HTML reste d'un seul tenant pour le Markdown.
+    body = "".join(parts).replace("\r\n", "\n").replace("\r", "\n").replace("\n", "<br>")
+    return f"<div class='annotated-text'>{body}</div>"
+
+def tag_level(tag: str) -> str:
+    low = tag.lower()
+    if any(k in low for k in ["insulte", "mépris", "agressif", "hostile", "bouc émissaire"]):
+        return "danger"
+    if any(k in low for k in ["culpabilisation", "pression", "chantage"]):
+        return "warn"
+    if any(k in low for k in ["neutre", "apaisant", "bienveillant"]):
+        return "safe"
+    return "info"
+
+def verdict_level(verdict: str) -> str:
+    v_low = verdict.lower()
+    if "faux" in v_low:
+        return "danger"
+    if "partiellement" in v_low:
+        return "warn"
+    if "vrai" in v_low:
+        return "safe"
+    return "info"
+
+def _int_score(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+def _priority(action: Dict[str, Any]) -> int:
+    priority = action.get("priority", 3)
+    return priority if isinstance(priority, int) else 3
+
+def _strip(value: Any) -> str:
+    return str(value or "").strip()
+
+
+# ───────────────── MODÈLE DE VUE ─────────────────
+@dataclass(frozen=True)
+class HighlightView:
+    tag_html: str
+    technique_name: str
+    quote: str
+    simple_definition: str
+    everyday_example: str
+    explanation: str
+    # Position dans le texte analysé (voir subtext/locate.py), None si introuvable.
+    span: Optional[QuoteSpan] = None
+
+
+@dataclass(frozen=True)
+class ActionView:
+    icon: str
+    label: str
+    detail: str
+
+
+@dataclass(frozen=True)
+class FactCheckView:
+    claim: str
+    verdict_html: str
+    explanation: str
+    sources: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class AnalysisView:
+    view_id: str
+    content_type: str
+    global_score: int
+    plain_translation: str
+    reaction_validation: str
+    fact_available: bool
+    response_available: bool
+    overview_html: str
+    hero_html: str
+    effects_html: str
+    tags_html: str
+    profile: Tuple[str, str, str, str]  # relation, canal, rapport de force, public
+    metric_cards: Tuple[str, ...]  # hostilité, manipulation, pression
+    highlights: Tuple[HighlightView, ...]
+    actions: Tuple[ActionView, ...]
+    systemic: Tuple[str, str, str, Tuple[str, ...]]  # échelle, pouvoir, récit, implications
+    fact_checks: Tuple[FactCheckView, ...]
+    share_card_html: str
+    bbcode_summary: str
+    # Sections encore en cours de rédaction (voir subtext/deferred.py).
+    deferred: Tuple[str, ...] = ()
+    # Texte analysé, passages repérés surlignés ("" si aucun n'a été retrouvé).
+    annotated_html: str = ""
+
+
+def _hero_html(analysis: Dict[str, Any], persona_mode: str) -> Tuple[str, str]:
+    """Titre de la carte d'ensemble, puis score, jauge et effet principal."""
+    overview_label = "Vue d'ensemble" if persona_mode == "Calme" else "Scan du malaise"
+    score_label_title = "Indice de pression" if persona_mode == "Calme" else "Indice de malaise"
+    content_type = (analysis.get("content_type") or "autre").lower()
+    global_score = _int_score(analysis.get("global_score", 0))
+    global_label = analysis.get("global_label", "Ambigu")
+    main_effect = _strip(analysis.get("main_effect"))
+    score_color = get_score_color(global_score)
+    return (
+        f"<div class='small-label'>{overview_label}</div>",
+        f"""
+        <div style="display:flex;align-items:center;justify-content:space-between;margin-top:0.3rem;margin-bottom:0.6rem;gap:0.9rem;flex-wrap:wrap;">
+            <div style="min-width:140px;flex:0 0 auto;">
+                <div style="font-size:0.9rem;color:#94a3b8;">{score_label_title}</div>
+                <div style="font-size:2.3rem;font-weight:800;color:{score_color};margin-top:0.05rem;">
+                    {global_score}%
+                </div>
+                <div style="font-size:0.95rem;color:#e2e8f0;font-weight:500;margin-top:0.05rem;">
+                    {global_label}
+                </div>
+                <div style="font-size:0.8rem;color:#94a3b8;margin-top:0.25rem;">
+                    Type de contenu : {content_type or '—'}
+                </div>
+            </div>
+            <div style="flex:1;min-width:160px;">
+                <div style="height:10px;border-radius:999px;background:#1e293b;overflow:hidden;">
+                    <div style="width:{global_score}%;height:100%;background:{score_color};"></div>
+                </div>
+                <div style="margin-top:0.45rem;font-size:0.9rem;color:#cbd5e1;">
+                    {main_effect or 'Effet émotionnel difficile à formuler, mais le message semble chargé.'}
+                </div>
+            </div>
+        </div>
+        """,
+    )
+
+
+def _share_card(analysis: Dict[str, Any], persona_mode: str, input_text: str) -> Tuple[str, str]:
+    """HTML de la carte à partager et résumé BBCode."""
+    score = _int_score(analysis.get("global_score", 0))
+    global_label = analysis.get("global_label", "Ambigu")
+    tags = analysis.get("tags", []) or []
+    plain_translation = _strip(analysis.get("plain_translation"))
+    viral_punchline = _strip(analysis.get("viral_punchline"))
+    reaction_validation = _strip(analysis.get("reaction_validation"))
+
+    clean_score_color = get_score_color(score)
+    clean_context = input_text[:90].replace('"', '&quot;').replace("\n", " ") + "..."
+    clean_punchline = plain_translation.replace('"', '&quot;') if plain_translation else ""
+    clean_viral = viral_punchline.replace('"', '&quot;') if viral_punchline else ""
+    clean_tags = (
+        "".join(
+            [
+                f"<span style='background:#334155;padding:2px 6px;border-radius:4px;color:#e2e8f0;margin-right:5px;font-size:0.7rem;'>{t}</span>"
+                for t in tags[:3]
+            ]
+        )
+        or "<span style='font-size:0.7rem;color:#6b7280;'>aucun signal critique</span>"
+    )
+
+    tags_text = ", ".join(tags[:3]) if tags else "aucun signal critique"
+    plain_translation_text = plain_translation or "—"
+
+    bbcode_summary = f"""[quote]
+📊 Rapport SUBTEXT — Détecteur de bullshit
+
+Indice de pression : {score}% ({global_label})
+Signaux principaux : {tags_text}
+
+Traduction relationnelle :
+{plain_translation_text}
+[/quote]
+
+Généré par SUBTEXT — Détecteur de bullshit (MVP)."""
+
+    if persona_mode == "Calme":
+        supportive_text = (
+            reaction_validation or "Tu n'exagères pas : ce message est vraiment lourd pour toi."
+        )
+        clean_supportive = supportive_text.replace('"', '&quot;')
+        punchline_block = f"""
+  <div style="background:#172a45;border:1px solid #38bdf8;border-radius:8px;padding:0.8rem;text-align:center;margin-bottom:1rem;">
+    <div style="font-size:0.75rem;color:#38bdf8;text-transform:uppercase;margin-bottom:0.2rem;font-weight:700;">💬 Message pour toi :</div>
+    <div style="font-size:1.05rem;font-weight:700;color:#e2e8f0;">"{clean_supportive}"</div>
+  </div>
+"""
+    else:
+        punchline_block = f"""
+  <div style="background:#172a45;border:1px solid #f97373;border-radius:8px;padding:0.8rem;text-align:center;margin-bottom:1rem;">
+    <div style="font-size:0.75rem;color:#f97373;text-transform:uppercase;margin-bottom:0.2rem;font-weight:700;">🔥 Punchline SUBTEXT :</div>
+    <div style="font-size:1.15rem;font-weight:800;color:#f1f5f9;">"{clean_viral}"</div>
+  </div>
+"""
+
+    html_code = f"""
+<div style="border-radius:20px;padding:1.5rem;background:radial-gradient(circle at top left, #172a45, #0f172a);border:1px solid #334155;box-shadow:0 4px 20px rgba(0,0,0,0.5);color:#f1f5f9;font-family:sans-serif;margin-top:1rem;">
+  <div style="display:flex;justify-content:space-between;align-items:center;border-bottom:1px solid #334155;padding-bottom:0.8rem;margin-bottom:1rem;">
+    <div style="font-size:0.8rem;text-transform:uppercase;letter-spacing:0.15em;color:#94a3b8;font-weight:700;">RAPPORT SUBTEXT</div>
+    <div style="font-size:0.7rem;background:#334155;padding:2px 6px;border-radius:4px;color:#e2e8f0;">SCAN IA</div>
+  </div>
+  <div style="display:flex;align-items:center;justify-content:space-between;margin-bottom:1.2rem;gap:0.8rem;flex-wrap:wrap;">
+    <div style="display:flex;align-items:baseline;">
+      <div style="font-size:2.2rem;font-weight:800;line-height:1;color:{clean_score_color};">{score}%</div>
+      <div style="font-size:0.9rem;margin-left:0.5rem;font-weight:500;color:{clean_score_color};">{global_label}</div>
+    </div>
+    <div>{clean_tags}</div>
+  </div>
+  <div style="font-style:italic;font-size:0.9rem;color:#94a3b8;margin-bottom:1rem;border-left:3px solid #475569;padding-left:0.8rem;background:rgba(255,255,255,0.03);padding:0.5rem 0.8rem;border-radius:0 8px 8px 0;">
+    "{clean_context}"
+  </div>
+  <div style="margin-bottom:1rem;">
+    <div style="font-size:0.7rem;text-transform:uppercase;color:#475569;margin-bottom:0.3rem;font-weight:700;">TRADUCTION RELATIONNELLE :</div>
+    <div style="font-size:1.05rem;font-weight:600;color:#e2e8f0;line-height:1.4;">{clean_punchline}</div>
+  </div>
+  {punchline_block}
+  <div style="font-size:0.75rem;color:#475569;text-align:right;border-top:1px solid #334155;padding-top:0.5rem;">
+    Généré par SUBTEXT • Détecteur de bullshit
+  </div>
+</div>
+"""
+    return html_code, bbcode_summary
+
+
+def build_view(analysis: Dict[str, Any], persona_mode: str, input_text: str, view_id: str = "") -> AnalysisView:
+    """Dérive une fois pour toutes tout ce que la page de résultats affiche."""
+    content_type = (analysis.get("content_type") or "autre").lower()
+    tags = analysis.get("tags", []) or []
+    profile = analysis.get("profile", {}) or {}
+    systemic = analysis.get("systemic_view", {}) or {}
+    fact_checks = analysis.get("fact_checks", []) or []
+    deferred = tuple(analysis.get("deferred") or ())
+    calm = persona_mode == "Calme"
+
+    metric_cards = tuple(
+        render_metric_card(label, _int_score(axis.get("score", 0)), axis.get("label", "—"))
+        for label, axis in (
+            ("Hostilité" if calm else "Sel / Hostilité", analysis.get("hostility", {}) or {}),
+            ("Manipulation / pression" if calm else "Manip / pression", analysis.get("manipulation", {}) or {}),
+            ("Pression sociale", analysis.get("pressure", {}) or {}),
+        )
+    )
+
+    raw_highlights = analysis.get("highlights", []) or []
+    spans = locate_quotes(input_text, [_strip(h.get("quote")) for h in raw_highlights])
+    highlights = tuple(
+        HighlightView(
+            tag_html=render_tag(_strip(h.get("tag")), "info") if _strip(h.get("tag")) else "",
+            technique_name=_strip(h.get("technique_name")),
+            quote=_strip(h.get("quote")),
+            simple_definition=_strip(h.get("simple_definition")),
+            everyday_example=_strip(h.get("everyday_example")),
+            explanation=_strip(h.get("explanation")),
+            span=span,
+        )
+        for h, span in zip(raw_highlights, spans)
+    )
+    marked = non_overlapping(spans)
+    annotated_html = (
+        render_annotated_text(
+            input_text, marked, [_strip(h.get("technique_name") or h.get("tag")) for h in raw_highlights]
+        )
+        if marked
+        else ""
+    )
+
+    actions = tuple(
+        ActionView(
+            icon={1: "🔴", 2: "🟠"}.get(act.get("priority", 3), "🟡"),
+            label=_strip(act.get("label")),
+            detail=_strip(act.get("detail")),
+        )
+        for act in sorted(analysis.get("recommended_actions", []) or [], key=_priority)
+    )
+
+    fact_views = tuple(
+        FactCheckView(
+            claim=_strip(fc.get("claim")),
+            verdict_html=(
+                f"<span class='tag-pill {verdict_level(_strip(fc.get('verdict')))}'>{_strip(fc.get('verdict'))}</span>"
+                if _strip(fc.get("verdict"))
+                else ""
+            ),
+            explanation=_strip(fc.get("explanation")),
+            sources=tuple(str(src) for src in fc.get("sources", []) or []),
+        )
+        for fc in fact_checks
+    )
+
+    share_card_html, bbcode_summary = _share_card(analysis, persona_mode, input_text)
+    overview_html, hero_body_html = _hero_html(analysis, persona_mode)
+
+    return AnalysisView(
+        view_id=view_id,
+        content_type=content_type,
+        global_score=_int_score(analysis.get("global_score", 0)),
+        plain_translation=_strip(analysis.get("plain_translation")),
+        reaction_validation=_strip(analysis.get("reaction_validation")),
+        fact_available=content_type in FACT_CHECK_CONTENT_TYPES and (bool(fact_checks) or "fact_checks" in deferred),
+        response_available=content_type not in ("article", "discours"),
+        overview_html=overview_html,
+        hero_html=hero_body_html,
+        effects_html="".join(render_tag(eff, "info") for eff in analysis.get("secondary_effects", []) or []),
+        tags_html="".join(render_tag(t, tag_level(t)) for t in tags),
+        profile=(
+            profile.get("relation_type", "—"),
+            profile.get("channel", "—"),
+            profile.get("power_asymmetry", "—"),
+            profile.get("target_audience", "—"),
+        ),
+        metric_cards=metric_cards,
+        highlights=highlights,
+        actions=actions,
+        systemic=(
+            systemic.get("scale", "—"),
+            systemic.get("power_dynamics", "—"),
+            systemic.get("narrative_frame", "—"),
+            tuple(systemic.get("macro_implications", []) or []),
+        ),
+        fact_checks=fact_views,
+        share_card_html=share_card_html,
+        bbcode_summary=bbcode_summary,
+        deferred=deferred,
+        annotated_html=annotated_html,
+    )
+
+
+# Identifiant rangé dans l'analyse elle-même : calculé une fois par analyse,
+# pas à chaque rerun. Toute fonction qui dérive une nouvelle analyse d'une
+# autre (sections différées, réanalyse incrémentale) le retire.
+ANALYSIS_ID_KEY = "analysis_id"
+
+
+def analysis_id(analysis: Dict[str, Any], input_text: str) -> str:
+    """Identifiant de l'analyse (contenu + texte analysé), attribué au premier appel."""
+    existing = analysis.get(ANALYSIS_ID_KEY)
+    if existing:
+        return existing
+    payload = json.dumps(analysis, sort_keys=True, ensure_ascii=False, default=str)
+    analysis[ANALYSIS_ID_KEY] = make_cache_key(payload, input_text)
+    return analysis[ANALYSIS_ID_KEY]
+
+
+def analysis_view_id(analysis: Dict[str, Any], persona_mode: str, input_text: str) -> str:
+    """Identifiant de vue : identifiant de l'analyse et mode d'affichage."""
+    return make_cache_key(analysis_id(analysis, input_text), persona_mode)
+
+
+# Vues immuables : pas de copie à la lecture, partagées entre sessions.
+_view_cache = TTLCache(max_entries=128, ttl_seconds=6 * 3600, copy_values=False)
+
+
+def get_view(analysis: Dict[str, Any], persona_mode: str, input_text: str) -> AnalysisView:
+    """Vue mise en cache par identifiant d'analyse ; construite au premier affichage."""
+    view_id = analysis_view_id(analysis, persona_mode, input_text)
+    view = _view_cache.get(view_id)
+    if view is None:
+        view = build_view(analysis, persona_mode, input_text, view_id)
+        _view_cache.set(view_id, view)
+    return view
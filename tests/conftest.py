@@ -0,0 +1,188 @@
+"""
+Fixtures partagées : serveur HTTP local pour l'ingestion d'URL.
+
+Le serveur tourne dans un thread (port libre choisi par l'OS) et sert des
+routes déclarées dans `ROUTES`. Chaque requête reçue est journalisée
+(chemin + en-têtes) pour vérifier la revalidation du cache.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Tuple
+
+import pytest
+
+ARTICLE_HTML = """<!doctype html>
+<html><head><title>Titre de la page</title>
+<meta property="og:title" content="Réforme : le grand flou"></head>
+<body>
+<header><nav><a href="/">Accueil</a> <a href="/politique">Politique</a></nav></header>
+<div class="cookie-banner">Nous utilisons des cookies pour améliorer votre expérience.</div>
+<main><article>
+<h1>Réforme : le grand flou</h1>
+<p>Le ministre a présenté mardi un texte que personne, dans sa propre majorité, ne semble avoir lu en entier.</p>
+<p>Ceux qui ne sont pas d'accord n'ont qu'à partir, a-t-il lancé, sous les applaudissements d'une partie de l'hémicycle.</p>
+<p>Les syndicats, eux, dénoncent une méthode brutale, et réclament depuis des mois une vraie négociation sur les salaires.</p>
+</article></main>
+<aside class="sidebar"><p>Les articles les plus lus de la semaine, à ne pas manquer surtout.</p></aside>
+<footer>Mentions légales — Tous droits réservés</footer>
+</body></html>"""
+
+THREAD_HTML = """<!doctype html>
+<html><head><title>Forum — Réunion de lundi</title></head>
+<body>
+<div class="navbar"><a href="/">Forum</a> › <a href="/boulot">Boulot</a></div>
+<div id="thread">
+  <div class="post"><div class="author">Marc</div>
+    <p>Franchement, si tu avais fait ton travail correctement, on n'en serait pas là, tout le monde le sait.</p></div>
+  <div class="post"><div class="author">Julie</div>
+    <p>Je ne vois pas pourquoi tu t'en prends à moi, le planning a été validé par toute l'équipe la semaine dernière.</p></div>
+  <div class="post"><div class="author">Marc</div>
+    <p>Validé, validé… comme d'habitude, personne n'ose te contredire, et c'est toujours nous qui rattrapons le retard.</p></div>
+</div>
+<div class="related"><p>Sujets similaires : organisation des congés, télétravail et badges.</p></div>
+</body></html>"""
+
+Handler = Callable[[BaseHTTPRequestHandler], None]
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request: object, client_address: object) -> None:
+        # Client qui coupe la connexion (téléchargement interrompu exprès) :
+        # pas de trace dans la sortie des tests.
+        pass
+
+
+def _send(handler: BaseHTTPRequestHandler, status: int, body: bytes = b"", headers: Dict[str, str] = None) -> None:
+    handler.send_response(status)
+    for key, value in (headers or {}).items():
+        handler.send_header(key, value)
+    if "Content-Length" not in (headers or {}) and status != 304:
+        handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    if body:
+        handler.wfile.write(body)
+
+
+def _html(body: str, **headers: str) -> Handler:
+    def handle(handler: BaseHTTPRequestHandler) -> None:
+        _send(handler, 200, body.encode("utf-8"), {"Content-Type": "text/html; charset=utf-8", **headers})
+    return handle
+
+
+def _etag(handler: BaseHTTPRequestHandler) -> None:
+    if handler.headers.get("If-None-Match") == '"v1"':
+        _send(handler, 304, headers={"ETag": '"v1"'})
+    else:
+        _send(handler, 200, ARTICLE_HTML.encode("utf-8"), {"Content-Type": "text/html; charset=utf-8", "ETag": '"v1"'})
+
+
+LAST_MODIFIED = "Tue, 01 Jul 2025 10:00:00 GMT"
+
+
+def _last_modified(handler: BaseHTTPRequestHandler) -> None:
+    if handler.headers.get("If-Modified-Since") == LAST_MODIFIED:
+        _send(handler, 304)
+    else:
+        _send(handler, 200, ARTICLE_HTML.encode("utf-8"), {"Content-Type": "text/html", "Last-Modified": LAST_MODIFIED})
+
+
+def _redirect(location: str) -> Handler:
+    def handle(handler: BaseHTTPRequestHandler) -> None:
+        _send(handler, 302, headers={"Location": location})
+    return handle
+
+
+def _big_declared(handler: BaseHTTPRequestHandler) -> None:
+    _send(handler, 200, b"x" * 64 * 1024, {"Content-Type": "text/plain"})
+
+
+def _big_streamed(handler: BaseHTTPRequestHandler) -> None:
+    # Sans Content-Length : seule la lecture du corps peut imposer la limite.
+    handler.send_response(200)
+    handler.send_header("Content-Type", "text/plain")
+    handler.send_header("Connection", "close")
+    handler.end_headers()
+    for _ in range(16):
+        handler.wfile.write(b"y" * 8 * 1024)
+    handler.close_connection = True
+
+
+def _slow_body(handler: BaseHTTPRequestHandler) -> None:
+    handler.send_response(200)
+    handler.send_header("Content-Type", "text/plain")
+    handler.send_header("Connection", "close")
+    handler.end_headers()
+    try:
+        for _ in range(40):
+            handler.wfile.write(b"z" * 20 * 1024)
+            handler.wfile.flush()
+            time.sleep(0.1)
+    except OSError:
+        pass
+    handler.close_connection = True
+
+
+def _no_answer(handler: BaseHTTPRequestHandler) -> None:
+    time.sleep(1.5)
+    _send(handler, 200, b"trop tard", {"Content-Type": "text/plain"})
+
+
+ROUTES: Dict[str, Handler] = {
+    "/article": _html(ARTICLE_HTML),
+    "/thread": _html(THREAD_HTML),
+    "/etag": _etag,
+    "/last-modified": _last_modified,
+    "/redirect": _redirect("/hop"),
+    "/hop": _redirect("/article"),
+    "/redirect-loop": _redirect("/redirect-loop"),
+    "/redirect-file": _redirect("file:///etc/passwd"),
+    "/redirect-private": _redirect("http://10.0.0.1/article"),
+    "/big": _big_declared,
+    "/big-streamed": _big_streamed,
+    "/slow-body": _slow_body,
+    "/no-answer": _no_answer,
+}
+
+
+class FixtureServer:
+    def __init__(self) -> None:
+        self.requests: List[Tuple[str, Dict[str, str]]] = []
+        fixture = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                fixture.requests.append((self.path, dict(self.headers)))
+                route = ROUTES.get(self.path)
+                if route is None:
+                    _send(self, 404, b"introuvable", {"Content-Type": "text/plain"})
+                else:
+                    route(self)
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        self.server = _QuietServer(("127.0.0.1", 0), _Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}{path}"
+
+    def hits(self, path: str) -> List[Dict[str, str]]:
+        return [headers for p, headers in self.requests if p == path]
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture(scope="session")
+def http_fixture():
+    server = FixtureServer()
+    yield server
+    server.close()
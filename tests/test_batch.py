@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from subtext import batch, engine, resilience
+from subtext.resilience import CircuitBreaker
+
+MESSAGES = [
+    "Ceux qui ne sont pas contents n'ont qu'à partir, c'est la dernière fois que je le dis.",
+    "Tu es vraiment nul, personne ne te supporte ici, dégage.",
+]
+
+
+@pytest.fixture
+def open_breaker(monkeypatch):
+    tripped = CircuitBreaker(failure_threshold=1, reset_seconds=3600)
+    tripped.record_failure()
+    monkeypatch.setattr(resilience, "breaker", tripped)
+    monkeypatch.setattr(engine, "breaker", tripped)
+    return tripped
+
+
+def _write_input(path, messages):
+    path.write_text("".join(json.dumps({"id": f"m{i}", "text": t}, ensure_ascii=False) + "\n" for i, t in enumerate(messages)), encoding="utf-8")
+
+
+def test_degraded_results_are_failures_and_retried(tmp_path, open_breaker, monkeypatch):
+    source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(source, MESSAGES)
+    stats = batch.run_batch(str(source), str(output), concurrency=2)
+    assert (stats.done, stats.failed) == (0, 2)
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert all(r["error"] == "degraded: backend indisponible" for r in records)
+    assert all(r["analysis"]["degraded"] for r in records)
+
+    assert batch.load_checkpoint(str(output)) == {"m0", "m1"}
+    assert batch.load_checkpoint(str(output), retry_errors=True) == set()
+
+    # Backend rétabli : la reprise retraite les deux messages.
+    monkeypatch.setattr(batch, "analyze_text", lambda text: {"global_score": 40})
+    stats = batch.run_batch(str(source), str(output), retry_errors=True)
+    assert (stats.skipped, stats.done, stats.failed) == (0, 2, 0)
@@ -0,0 +1,95 @@
+import types
+
+import pytest
+
+from subtext import cache
+from subtext.cache import TTLCache, make_cache_key, normalize_text
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = types.SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_entry_expires_after_ttl(clock):
+    store = TTLCache(ttl_seconds=10)
+    store.set("k", 1)
+    clock.value += 10
+    assert store.get("k") == 1
+    clock.value += 0.5
+    assert store.get("k", "absent") == "absent"
+    assert len(store) == 0
+    assert store.stats()["expirations"] == 1
+
+
+def test_no_ttl_never_expires(clock):
+    store = TTLCache(ttl_seconds=None)
+    store.set("k", 1)
+    clock.value += 10 ** 9
+    assert store.get("k") == 1
+
+
+def test_set_refreshes_ttl(clock):
+    store = TTLCache(ttl_seconds=10)
+    store.set("k", 1)
+    clock.value += 8
+    store.set("k", 2)
+    clock.value += 8
+    assert store.get("k") == 2
+
+
+def test_lru_eviction_keeps_recently_read_entries():
+    store = TTLCache(max_entries=2)
+    store.set("a", 1)
+    store.set("b", 2)
+    assert store.get("a") == 1
+    store.set("c", 3)
+    assert store.get("b") is None
+    assert store.get("a") == 1 and store.get("c") == 3
+    assert store.stats()["evictions"] == 1
+
+
+def test_values_are_copied_unless_immutable():
+    store = TTLCache()
+    value = {"tags": ["pression"]}
+    store.set("k", value)
+    value["tags"].append("écrit après")
+    served = store.get("k")
+    served["tags"].append("modifié par une session")
+    assert store.get("k") == {"tags": ["pression"]}
+
+    shared = TTLCache(copy_values=False)
+    shared.set("k", value)
+    assert shared.get("k") is value
+
+
+def test_stats_and_hit_rate():
+    store = TTLCache()
+    store.set("k", 1)
+    store.get("k")
+    store.get("absent")
+    stats = store.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+    assert store.pop("k") == 1
+    assert store.pop("k", "absent") == "absent"
+
+
+def test_normalize_text():
+    decomposed = "e\u0301te\u0301"
+    assert normalize_text(f"  {decomposed}\n\n\tchaud  ") == "été chaud"
+    assert normalize_text(None) == ""
+
+
+def test_cache_key_ignores_whitespace_and_unicode_form():
+    assert make_cache_key("Été  chaud\n", "m", "v1") == make_cache_key(" E\u0301te\u0301 chaud", "m", "v1")
+    # La casse n'est pas normalisée.
+    assert make_cache_key("ÉTÉ CHAUD", "m", "v1") != make_cache_key("Été chaud", "m", "v1")
+
+
+def test_cache_key_depends_on_parts():
+    assert make_cache_key("texte", "m1", "v1") != make_cache_key("texte", "m2", "v1")
+    assert make_cache_key("texte", "m1", "v1") != make_cache_key("texte", "m1", "v2")
+    # Séparateur entre composants : pas de collision par concaténation.
+    assert make_cache_key("texte", "ab", "c") != make_cache_key("texte", "a", "bc")
@@ -0,0 +1,20 @@
+import re
+
+from subtext.heuristics import LEXICON, prescore
+from subtext.prompts import ANALYSIS_SYSTEM_PROMPT, TAG_VOCABULARY
+
+
+def test_tag_vocabulary_matches_the_prompt():
+    block = re.search(r'"tags": \[(.*?)\]', ANALYSIS_SYSTEM_PROMPT, re.S).group(1)
+    assert tuple(re.findall(r'"([^"]+)"', block)) == TAG_VOCABULARY
+
+
+def test_lexicon_tags_are_in_the_prompt_vocabulary():
+    assert {rule.tag for rule in LEXICON} <= set(TAG_VOCABULARY)
+
+
+def test_prescore_tags_stay_in_vocabulary():
+    text = "Espèce de clown, t'es nul. C'est urgent, dernière chance, sinon tu vas le regretter. Si tu m'aimais…"
+    result = prescore(text)
+    assert result.tags and set(result.tags) <= set(TAG_VOCABULARY)
+    assert prescore("").tags == ["neutre"]
@@ -0,0 +1,128 @@
+from subtext.incremental import (
+    INCREMENTAL_MAX_GENERATIONS,
+    can_reuse,
+    merge_incremental,
+    plan_edit,
+    split_sentences,
+)
+
+OLD = (
+    "Bonjour à tous. Le rapport doit être rendu vendredi. "
+    "Ceux qui seront en retard devront s'expliquer. Merci de votre attention.\n\n"
+    "La réunion de lundi est maintenue. Apportez vos chiffres."
+)
+PREVIOUS = {
+    "global_score": 55,
+    "global_label": "tendu",
+    "main_effect": "Pression hiérarchique.",
+    "tags": ["pression"],
+    "hostility": {"score": 40, "label": "modérée"},
+    "manipulation": {"score": 30, "label": "faible"},
+    "pressure": {"score": 70, "label": "forte"},
+    "highlights": [
+        {"quote": "Ceux qui seront en retard devront s'expliquer.", "tag": "pression"},
+        {"quote": "Apportez vos chiffres.", "tag": "pression"},
+    ],
+    "fact_checks": [],
+    "recommended_actions": [{"label": "Demander un délai", "detail": "", "priority": 2}],
+}
+
+
+def _partial(score: int, quote: str) -> dict:
+    axis = {"score": score, "label": "forte"}
+    return {
+        "global_score": score,
+        "tags": ["pression"],
+        "hostility": axis,
+        "manipulation": axis,
+        "pressure": axis,
+        "highlights": [{"quote": quote, "tag": "menace"}],
+        "fact_checks": [],
+        "recommended_actions": [],
+    }
+
+
+def test_split_sentences_keeps_paragraphs_apart():
+    assert split_sentences(OLD)[-2:] == ["La réunion de lundi est maintenue.", "Apportez vos chiffres."]
+    assert len(split_sentences(OLD)) == 6
+
+
+def test_identical_text_is_noop():
+    plan = plan_edit(OLD, OLD.replace(". ", ".   "))
+    assert plan.is_noop
+    assert plan.change_ratio == 0
+    assert plan.region_texts() == []
+
+
+def test_edit_plans_one_region_with_context():
+    new = OLD.replace("vendredi", "jeudi soir")
+    plan = plan_edit(OLD, new)
+    assert not plan.is_noop
+    # La phrase modifiée et une phrase de contexte de chaque côté.
+    assert plan.region_texts() == [
+        "Bonjour à tous. Le rapport doit être rendu jeudi soir. Ceux qui seront en retard devront s'expliquer."
+    ]
+    assert plan.removed == ["Le rapport doit être rendu vendredi."]
+    assert "Apportez vos chiffres." in plan.unchanged_text()
+    # Caractères ajoutés + retirés, rapportés à la plus longue version.
+    assert plan.change_ratio == (len("Le rapport doit être rendu jeudi soir.") + len("Le rapport doit être rendu vendredi.")) / len(new)
+
+
+def test_adjacent_edits_share_a_region():
+    new = OLD.replace("Bonjour à tous.", "Salut.").replace("vendredi", "jeudi")
+    assert len(plan_edit(OLD, new).regions) == 1
+
+
+def test_deletion_has_no_region_but_is_not_noop():
+    new = OLD.replace(" Ceux qui seront en retard devront s'expliquer.", "")
+    plan = plan_edit(OLD, new)
+    assert not plan.is_noop
+    assert plan.removed == ["Ceux qui seront en retard devront s'expliquer."]
+
+
+def test_merge_keeps_present_highlights_and_adds_new_ones():
+    new = OLD.replace("vendredi", "jeudi soir")
+    plan = plan_edit(OLD, new)
+    merged = merge_incremental(PREVIOUS, plan, OLD, new, [_partial(60, "rendu jeudi soir")])
+    quotes = [h["quote"] for h in merged["highlights"]]
+    assert "Apportez vos chiffres." in quotes
+    assert "rendu jeudi soir" in quotes
+    assert merged["analysis_source"] == "incremental"
+    assert merged["incremental"]["generation"] == 1
+    assert merged["incremental"]["regions"] == 1
+    # Champs rédigés repris tels quels.
+    assert merged["main_effect"] == PREVIOUS["main_effect"]
+    assert PREVIOUS.get("analysis_source") is None
+
+
+def test_merge_drops_highlights_of_deleted_sentences():
+    new = OLD.replace(" Ceux qui seront en retard devront s'expliquer.", "")
+    plan = plan_edit(OLD, new)
+    merged = merge_incremental(PREVIOUS, plan, OLD, new, [])
+    assert [h["quote"] for h in merged["highlights"]] == ["Apportez vos chiffres."]
+    assert merged["global_score"] <= PREVIOUS["global_score"]
+
+
+def test_generations_are_bounded():
+    assert can_reuse(PREVIOUS)
+    assert not can_reuse(dict(PREVIOUS, incremental={"generation": INCREMENTAL_MAX_GENERATIONS}))
+    assert not can_reuse(dict(PREVIOUS, degraded=True))
+    assert not can_reuse(dict(PREVIOUS, analysis_source="heuristic"))
+
+
+def test_unchanged_text_returns_previous_analysis(monkeypatch):
+    from subtext import engine
+
+    def no_call(*args, **kwargs):
+        raise AssertionError("aucun appel attendu pour un texte inchangé")
+
+    monkeypatch.setattr(engine, "analyze_text", no_call)
+    monkeypatch.setattr(engine, "_analyze_chunk", no_call)
+    fields = []
+    analysis = engine.analyze_text_incremental(
+        OLD + "\n", OLD, PREVIOUS, on_field=lambda key, value, _: fields.append(key)
+    )
+    assert analysis == PREVIOUS
+    assert analysis is not PREVIOUS
+    assert "incremental" not in analysis
+    assert fields == list(PREVIOUS)
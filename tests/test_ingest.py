@@ -0,0 +1,139 @@
+import os
+import time
+
+import pytest
+
+from subtext import ingest
+from subtext.ingest import FetchError, extract_main_text, fetch, ingest_url
+
+from conftest import ARTICLE_HTML
+
+
+def test_redirects_are_followed(http_fixture, tmp_path):
+    page = fetch(http_fixture.url("/redirect"), allow_private=True, cache_dir=str(tmp_path))
+    assert page.url == http_fixture.url("/article")
+    assert b"Le ministre" in page.body
+
+
+def test_redirect_loop_is_bounded(http_fixture):
+    with pytest.raises(FetchError, match="redirections"):
+        fetch(http_fixture.url("/redirect-loop"), allow_private=True, cache_dir="")
+
+
+def test_each_redirect_hop_is_checked(http_fixture, monkeypatch):
+    with pytest.raises(FetchError, match="http:// et https://"):
+        fetch(http_fixture.url("/redirect-file"), allow_private=True, cache_dir="")
+    # Le serveur local passe pour public ; la redirection vers 10.0.0.1 est revérifiée.
+    monkeypatch.setattr(ingest, "_is_public", lambda address: address.startswith("127."))
+    with pytest.raises(FetchError, match="privée"):
+        fetch(http_fixture.url("/redirect-private"), allow_private=False, cache_dir="")
+
+
+def test_private_address_refused():
+    with pytest.raises(FetchError, match="privée"):
+        fetch("http://127.0.0.1:9/", allow_private=False, cache_dir="")
+
+
+def test_dns_rebinding_is_caught_at_connect(http_fixture, monkeypatch):
+    # La vérification préalable croit à une adresse publique ; la connexion
+    # réelle aboutit sur 127.0.0.1 et doit être refusée avant toute requête.
+    monkeypatch.setattr(ingest, "_resolve", lambda host, port: ["93.184.216.34"])
+    # Sessions neuves : une connexion gardée ouverte a déjà été contrôlée.
+    monkeypatch.setattr(ingest, "_sessions", {})
+    before = len(http_fixture.hits("/article"))
+    with pytest.raises(FetchError, match="privée"):
+        fetch(http_fixture.url("/article"), allow_private=False, cache_dir="")
+    assert len(http_fixture.hits("/article")) == before
+
+
+def test_etag_revalidation_serves_cache(http_fixture, tmp_path):
+    first = fetch(http_fixture.url("/etag"), allow_private=True, cache_dir=str(tmp_path))
+    second = fetch(http_fixture.url("/etag"), allow_private=True, cache_dir=str(tmp_path))
+    assert not first.from_cache
+    assert second.from_cache
+    assert second.body == first.body
+    assert http_fixture.hits("/etag")[-1].get("If-None-Match") == '"v1"'
+
+
+def test_last_modified_revalidation_serves_cache(http_fixture, tmp_path):
+    fetch(http_fixture.url("/last-modified"), allow_private=True, cache_dir=str(tmp_path))
+    second = fetch(http_fixture.url("/last-modified"), allow_private=True, cache_dir=str(tmp_path))
+    assert second.from_cache
+    assert http_fixture.hits("/last-modified")[-1].get("If-Modified-Since")
+
+
+def _store(cache_dir, url, body, age=0.0):
+    ingest._cache_store(url, str(cache_dir), {"etag": '"v1"', "stored_at": time.time() - age}, body)
+    meta_path, _ = ingest._cache_paths(url, str(cache_dir))
+    os.utime(meta_path, (time.time() - age, time.time() - age))
+
+
+def test_cache_evicts_oldest_entries_over_caps(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "HTTP_CACHE_MAX_ENTRIES", 2)
+    _store(tmp_path, "https://a.example/", b"a", age=30)
+    _store(tmp_path, "https://b.example/", b"b", age=20)
+    _store(tmp_path, "https://c.example/", b"c", age=10)
+    assert ingest._cache_load("https://a.example/", str(tmp_path)) is None
+    assert ingest._cache_load("https://c.example/", str(tmp_path))[1] == b"c"
+    assert len(os.listdir(tmp_path)) == 4
+
+    # Sous le plafond d'entrées, celui en octets fait encore partir la plus ancienne.
+    monkeypatch.setattr(ingest, "HTTP_CACHE_MAX_ENTRIES", 10)
+    monkeypatch.setattr(ingest, "HTTP_CACHE_MAX_BYTES", 1125)
+    _store(tmp_path, "https://d.example/", b"d" * 1000)
+    kept = [u for u in ("https://b.example/", "https://c.example/", "https://d.example/") if ingest._cache_load(u, str(tmp_path))]
+    assert kept == ["https://c.example/", "https://d.example/"]
+
+
+def test_cache_entries_expire(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "HTTP_CACHE_MAX_AGE", 60)
+    _store(tmp_path, "https://a.example/", b"a", age=120)
+    assert ingest._cache_load("https://a.example/", str(tmp_path)) is None
+    assert os.listdir(tmp_path) == []
+    _store(tmp_path, "https://b.example/", b"b", age=120)
+    _store(tmp_path, "https://c.example/", b"c")
+    # L'entrée expirée est aussi retirée au passage d'une écriture.
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(p) for p in ingest._cache_paths("https://c.example/", str(tmp_path)))
+
+
+def test_declared_size_over_cap(http_fixture):
+    with pytest.raises(FetchError, match="trop lourde"):
+        fetch(http_fixture.url("/big"), allow_private=True, cache_dir="", max_bytes=16 * 1024)
+
+
+def test_streamed_size_over_cap(http_fixture):
+    with pytest.raises(FetchError, match="trop lourde"):
+        fetch(http_fixture.url("/big-streamed"), allow_private=True, cache_dir="", max_bytes=32 * 1024)
+
+
+def test_slow_body_hits_time_cap(http_fixture):
+    with pytest.raises(FetchError, match="délai"):
+        fetch(http_fixture.url("/slow-body"), allow_private=True, cache_dir="", timeout=0.5, max_bytes=10 * 1024 * 1024)
+
+
+def test_silent_server_hits_time_cap(http_fixture):
+    with pytest.raises(FetchError, match="délai"):
+        fetch(http_fixture.url("/no-answer"), allow_private=True, cache_dir="", timeout=0.5)
+
+
+def test_article_extraction(http_fixture, tmp_path):
+    article = ingest_url(http_fixture.url("/article"), allow_private=True, cache_dir=str(tmp_path))
+    assert article.title == "Réforme : le grand flou"
+    assert "n'ont qu'à partir" in article.text
+    assert "syndicats" in article.text
+    for junk in ("cookies", "Accueil", "Mentions légales", "plus lus"):
+        assert junk not in article.text
+
+
+def test_thread_extraction_keeps_every_post(http_fixture):
+    text = ingest_url(http_fixture.url("/thread"), allow_private=True, cache_dir="").text
+    assert "ton travail correctement" in text
+    assert "validé par toute l'équipe" in text
+    assert "rattrapons le retard" in text
+    assert "Sujets similaires" not in text
+
+
+def test_extraction_from_bytes_reads_charset():
+    title, text = extract_main_text(ARTICLE_HTML.encode("utf-8"), "utf-8")
+    assert title.startswith("Réforme")
+    assert "négociation" in text
@@ -0,0 +1,75 @@
+from subtext.locate import LOCATE_MIN_SCORE, QuoteSpan, fold, locate_quotes, non_overlapping
+
+TEXT = (
+    "Bonjour l'équipe,\n\n"
+    "Pour la troisième fois, je dois vous rappeler que les “délais” ne sont pas négociables.   "
+    "Ceux qui ne sont pas contents n’ont qu’à chercher ailleurs. "
+    "Je compte sur vous pour que ce soit la dernière fois que j'ai à le dire.\n"
+    "Cordialement, la direction."
+)
+
+
+def _quoted(span: QuoteSpan) -> str:
+    return TEXT[span.start:span.end]
+
+
+def test_exact_quote():
+    (span,) = locate_quotes(TEXT, ["les “délais” ne sont pas négociables"])
+    assert span.exact and span.score == 1.0
+    assert _quoted(span) == "les “délais” ne sont pas négociables"
+
+
+def test_folding_ignores_case_accents_quotes_and_spaces():
+    quote = "« Ceux qui ne sont pas CONTENTS n'ont qu'a chercher ailleurs. »"
+    (span,) = locate_quotes(TEXT, [quote])
+    assert span.exact
+    assert _quoted(span) == "Ceux qui ne sont pas contents n’ont qu’à chercher ailleurs."
+
+
+def test_positions_survive_whitespace_runs():
+    (span,) = locate_quotes(TEXT, ["négociables. Ceux qui"])
+    assert _quoted(span) == "négociables.   Ceux qui"
+
+
+def test_quote_split_by_ellipsis():
+    (span,) = locate_quotes(TEXT, ["Pour la troisième fois […] ne sont pas négociables"])
+    assert span.exact
+    assert _quoted(span).startswith("Pour la troisième fois")
+    assert _quoted(span).endswith("négociables")
+
+
+def test_ellipsis_parts_must_appear_in_order():
+    assert locate_quotes(TEXT, ["Cordialement… Bonjour l'équipe"]) == (None,)
+
+
+def test_fuzzy_match_of_a_reworded_quote():
+    quote = "Je compte sur vous pour que ce soit bien la dernière fois que j'ai à le redire."
+    (span,) = locate_quotes(TEXT, [quote])
+    assert span is not None and not span.exact
+    assert LOCATE_MIN_SCORE <= span.score < 1.0
+    assert "la dernière fois" in _quoted(span)
+
+
+def test_fuzzy_match_below_min_score_is_rejected():
+    quote = "Je compte sur vous pour préparer le budget trimestriel avant la fin du mois prochain."
+    assert locate_quotes(TEXT, [quote]) == (None,)
+
+
+def test_missing_and_empty_quotes():
+    assert locate_quotes(TEXT, ["rien à voir ici", "", "« »"]) == (None, None, None)
+    assert locate_quotes("", ["x"]) == (None,)
+
+
+def test_results_follow_quote_order():
+    spans = locate_quotes(TEXT, ["Cordialement", "Bonjour"])
+    assert spans[0].start > spans[1].start
+
+
+def test_non_overlapping_keeps_the_earliest_longest_span():
+    spans = [QuoteSpan(10, 20, True, 1.0), QuoteSpan(5, 30, True, 1.0), QuoteSpan(30, 40, True, 1.0), None]
+    assert non_overlapping(spans) == {1: spans[1], 2: spans[2]}
+
+
+def test_fold():
+    # Un caractère replié par caractère d'origine (ß et Œ gardent leur place).
+    assert fold("  Œuvre ß “x” – é  ") == 'œuvre ß "x" - e'
@@ -0,0 +1,94 @@
+import pytest
+
+from subtext.neardup import NEARDUP_MIN_TOKENS, NearDuplicateIndex, signature, similarity, tokenize
+from subtext.profiles import COMPACT, CORE, FULL, covering_profiles
+
+BASE = (
+    "Bonjour à tous, je vous rappelle que le rapport trimestriel doit être rendu avant vendredi midi "
+    "sans faute, et que ceux qui ne respectent pas les délais devront s'en expliquer directement avec moi "
+    "lors de la réunion de lundi matin devant toute l'équipe."
+)
+# Un mot changé en fin de texte : la plupart des trigrammes restent communs.
+EDITED = BASE.replace("lundi matin", "mardi matin")
+UNRELATED = (
+    "La recette de la tarte aux pommes demande de la pâte brisée, quatre pommes bien mûres, du sucre "
+    "roux, une noisette de beurre et une pincée de cannelle pour parfumer le tout avant la cuisson."
+)
+ANALYSIS = {"global_score": 62, "tags": ["pression"], "deferred": []}
+META = dict(model="main", prompt_version="v1", profile="full")
+QUERY = dict(models=("main", "light"), prompt_version="v1", profiles=("full",))
+
+
+@pytest.fixture
+def index():
+    return NearDuplicateIndex(threshold=0.7)
+
+
+def test_identical_words_reuse_analysis(index):
+    index.add(BASE, ANALYSIS, **META)
+    # Casse, ponctuation et emojis ne comptent pas.
+    match = index.find(BASE.upper().replace(",", "") + " 🙄", **QUERY)
+    assert match is not None
+    assert match.identical
+    assert match.similarity == 1.0
+    assert match.text == BASE
+    assert match.analysis == ANALYSIS
+    assert match.analysis is not ANALYSIS
+
+
+def test_edited_text_is_incremental_base(index):
+    index.add(BASE, ANALYSIS, **META)
+    match = index.find(EDITED, **QUERY)
+    assert match is not None
+    assert not match.identical
+    assert 0.7 <= match.similarity < 1.0
+    assert index.stats()["similar"] == 1
+
+
+def test_threshold(index):
+    index.add(BASE, ANALYSIS, **META)
+    estimated = similarity(signature(tokenize(BASE)), signature(tokenize(EDITED)))
+    strict = NearDuplicateIndex(threshold=min(1.0, estimated + 0.05))
+    strict.add(BASE, ANALYSIS, **META)
+    assert strict.find(EDITED, **QUERY) is None
+    assert index.find(UNRELATED, **QUERY) is None
+
+
+def test_short_texts_are_ignored(index):
+    short = " ".join(["mot"] * (NEARDUP_MIN_TOKENS - 1))
+    index.add(short, ANALYSIS, **META)
+    assert len(index) == 0
+    index.add(BASE, ANALYSIS, **META)
+    assert index.find(" ".join(tokenize(BASE)[:NEARDUP_MIN_TOKENS - 1]), **QUERY) is None
+
+
+def test_same_text_is_not_its_own_duplicate(index):
+    index.add(BASE, ANALYSIS, **META)
+    assert index.find(BASE, **QUERY) is None
+
+
+def test_model_version_and_profile_must_match(index):
+    index.add(BASE, ANALYSIS, **META)
+    assert index.find(EDITED, models=("autre",), prompt_version="v1", profiles=("full",)) is None
+    assert index.find(EDITED, models=("main",), prompt_version="v2", profiles=("full",)) is None
+    assert index.find(EDITED, models=("main",), prompt_version="v1", profiles=("core",)) is None
+
+
+def test_covering_profiles():
+    assert covering_profiles(FULL) == ("full",)
+    # Une analyse complète sert les profils partiels, pas l'inverse.
+    assert set(covering_profiles(COMPACT)) == {"full", "compact"}
+    assert set(covering_profiles(CORE)) == {"full", "core"}
+
+
+def test_partial_profile_reuses_full_analysis(index):
+    index.add(BASE, ANALYSIS, model="main", prompt_version="v1", profile="core")
+    assert index.find(EDITED, models=("main",), prompt_version="v1", profiles=covering_profiles(FULL)) is None
+    assert index.find(EDITED, models=("main",), prompt_version="v1", profiles=covering_profiles(CORE)) is not None
+
+
+def test_expired_entries_are_dropped():
+    index = NearDuplicateIndex(threshold=0.7, ttl_seconds=-1)
+    index.add(BASE, ANALYSIS, **META)
+    assert index.find(EDITED, **QUERY) is None
+    assert len(index) == 0
@@ -0,0 +1,116 @@
+import types
+
+import pytest
+
+from subtext import resilience
+from subtext.resilience import CircuitBreaker, CircuitOpenError, is_retryable, record_outcome
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = types.SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(resilience, "time", types.SimpleNamespace(monotonic=lambda: now.value, sleep=lambda s: None))
+    return now
+
+
+@pytest.fixture
+def breaker(monkeypatch, clock):
+    fresh = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    monkeypatch.setattr(resilience, "breaker", fresh)
+    return fresh
+
+
+def test_is_retryable():
+    assert is_retryable(_StatusError(429))
+    assert is_retryable(_StatusError(503))
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(_StatusError(400))
+    assert not is_retryable(ValueError("JSON invalide"))
+
+
+def test_closed_open_half_open_closed(breaker, clock):
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    clock.value += 30
+    assert breaker.state == "half-open"
+    # Un seul appel d'essai à la fois.
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.stats() == {"state": "closed", "consecutive_failures": 0, "trips": 1, "rejected": 2}
+
+
+def test_failed_probe_reopens(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.value += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.stats()["trips"] == 2
+    clock.value += 29
+    assert breaker.state == "open"
+    clock.value += 1
+    assert breaker.state == "half-open"
+
+
+def test_non_retryable_errors_are_neutral(breaker):
+    record_outcome(_StatusError(503))
+    record_outcome(_StatusError(503))
+    # Une requête invalide au milieu de la série ne la remet pas à zéro.
+    record_outcome(_StatusError(400))
+    assert breaker.stats()["consecutive_failures"] == 2
+    record_outcome(_StatusError(503))
+    assert breaker.state == "open"
+
+
+def test_neutral_probe_releases_the_trial_slot(breaker, clock):
+    for _ in range(3):
+        record_outcome(_StatusError(500))
+    clock.value += 30
+    assert breaker.allow()
+    record_outcome(_StatusError(400))
+    assert breaker.state == "half-open"
+    # L'essai est rendu : un nouvel appel peut tester le backend.
+    assert breaker.allow()
+    record_outcome(None)
+    assert breaker.state == "closed"
+
+
+def test_call_with_retries_counts_transient_failures(breaker):
+    attempts = []
+
+    def flaky(timeout):
+        attempts.append(timeout)
+        if len(attempts) < 3:
+            raise _StatusError(502)
+        return "ok"
+
+    assert resilience.call_with_retries(flaky, "analysis") == ("ok", 2)
+    assert breaker.stats()["consecutive_failures"] == 0
+
+
+def test_call_with_retries_does_not_retry_invalid_requests(breaker):
+    calls = []
+
+    def invalid(timeout):
+        calls.append(timeout)
+        raise _StatusError(400)
+
+    with pytest.raises(_StatusError):
+        resilience.call_with_retries(invalid, "analysis")
+    assert len(calls) == 1
+    assert breaker.state == "closed"
@@ -0,0 +1,44 @@
+from subtext.routing import RoutingLog, TriageResult, decide
+
+MAIN, LIGHT = "main", "light"
+
+
+def _triage(score, confidence=0.9, latency_s=0.4):
+    return TriageResult(global_score=score, confidence=confidence, latency_s=latency_s)
+
+
+def test_decide():
+    assert decide("x", MAIN, LIGHT, prescore=80).reason == "pré-score élevé"
+    assert decide("x" * 5000, MAIN, LIGHT, triage=_triage(5)).escalated
+    assert decide("x", MAIN, LIGHT).reason == "triage indisponible"
+    assert decide("x", MAIN, LIGHT, triage=_triage(70)).reason == "risque élevé"
+    assert decide("x", MAIN, LIGHT, triage=_triage(40)).reason == "score ambigu"
+    assert decide("x", MAIN, LIGHT, triage=_triage(10, confidence=0.3)).reason == "triage peu confiant"
+    clear = decide("x", MAIN, LIGHT, triage=_triage(10))
+    assert (clear.analysis_model, clear.escalated) == (LIGHT, False)
+
+
+def test_saving_counts_triage_as_a_cost_when_escalated():
+    log = RoutingLog()
+    log.observe_latency(MAIN, 3.0)
+
+    clear = decide("x", MAIN, LIGHT, triage=_triage(10))
+    clear.analysis_latency_s = 1.0
+    log.record(clear, MAIN)
+    assert clear.estimated_saving_s == 1.6
+
+    risky = decide("x", MAIN, LIGHT, triage=_triage(70))
+    risky.analysis_latency_s = 3.0
+    log.record(risky, MAIN)
+    assert risky.estimated_saving_s == -0.4
+
+    # Sans triage, rien n'a été dépensé ni gagné.
+    skipped = decide("x", MAIN, LIGHT, prescore=80)
+    skipped.analysis_latency_s = 3.0
+    log.record(skipped, MAIN)
+    assert skipped.estimated_saving_s is None
+
+    stats = log.stats()
+    assert (stats["decisions"], stats["escalated"]) == (3, 2)
+    assert stats["total_saving_s"] == 1.2
+    assert [d["reason"] for d in log.recent(2)] == ["risque élevé", "pré-score élevé"]
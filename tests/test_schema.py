@@ -0,0 +1,146 @@
+import json
+
+import pytest
+
+from subtext.schema import (
+    ANALYSIS_SCHEMA,
+    REPLY_SCHEMA,
+    SchemaError,
+    ValidationReport,
+    axis,
+    choice,
+    complete,
+    items,
+    parse_response,
+    repair_json,
+    score,
+    text,
+)
+
+FULL = {"global_score": 72, "main_effect": "Pression.", "tags": ["pression", "culpabilisation"], "pressure": {"score": 80}}
+
+
+def _report() -> ValidationReport:
+    return ValidationReport(schema="test")
+
+
+# ───────── repair_json ─────────
+def test_valid_object_is_returned_as_is():
+    assert repair_json(json.dumps(FULL)) == FULL
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "```json\n" + json.dumps(FULL) + "\n```",
+        "Voici l'analyse :\n" + json.dumps(FULL),
+        "```\n" + json.dumps(FULL, indent=2) + "\n```\n",
+    ],
+)
+def test_fences_and_surrounding_text_are_stripped(content):
+    assert repair_json(content) == FULL
+
+
+def test_truncated_after_complete_field_keeps_it():
+    raw = json.dumps(FULL)
+    cut = raw[: raw.index('"tags"') + len('"tags": ["pres')]
+    assert repair_json(cut) == {"global_score": 72, "main_effect": "Pression."}
+
+
+def test_truncated_inside_nested_value_closes_containers():
+    raw = json.dumps(FULL)
+    cut = raw[: raw.index('"culpabilisation"') + 5]
+    assert repair_json(cut) == {"global_score": 72, "main_effect": "Pression.", "tags": ["pression"]}
+
+
+def test_truncated_inside_first_string_closes_it():
+    assert repair_json('{"main_effect": "Le message install') == {"main_effect": "Le message install"}
+
+
+def test_truncated_fenced_response():
+    raw = "```json\n" + json.dumps(FULL)[:-20]
+    assert repair_json(raw)["global_score"] == 72
+
+
+@pytest.mark.parametrize("content", ["", "pas de json", "[1, 2]", "{", '{"a'])
+def test_unrecoverable_content(content):
+    assert repair_json(content) is None
+
+
+def test_parse_response_flags_repair_and_missing_fields():
+    raw = json.dumps(FULL)[:-10]
+    data, report = parse_response(raw, ANALYSIS_SCHEMA)
+    assert report.repaired_json
+    assert data["global_score"] == 72
+    assert "highlights" in report.missing
+    # Champs absents : valeur neutre, label dérivé du score.
+    assert data["highlights"] == []
+    assert data["global_label"] is not None
+
+
+def test_parse_response_raises_on_garbage():
+    with pytest.raises(SchemaError):
+        parse_response("désolé, je ne peux pas", ANALYSIS_SCHEMA)
+
+
+def test_complete_merges_refetched_fields():
+    data, report = parse_response('{"calm": "D\'accord."}', REPLY_SCHEMA)
+    assert report.missing == ["assertive"]
+    merged = complete(data, {"assertive": "Non.", "calm": "ignoré"}, REPLY_SCHEMA, report)
+    assert merged == {"calm": "D'accord.", "assertive": "Non."}
+    assert report.refetched == ["assertive"]
+    assert report.missing == []
+
+
+# ───────── Coercers ─────────
+@pytest.mark.parametrize(
+    "value, expected, coerced, clamped",
+    [
+        (72, 72, False, False),
+        ("72%", 72, True, False),
+        ("7,6", 8, True, False),
+        (72.4, 72, True, False),
+        (140, 100, False, True),
+        (-5, 0, False, True),
+        ("n/a", 0, True, False),
+        (True, 0, True, False),
+    ],
+)
+def test_score(value, expected, coerced, clamped):
+    report = _report()
+    assert score()(value, "s", report) == expected
+    assert bool(report.coerced) == coerced
+    assert bool(report.clamped) == clamped
+
+
+def test_text_joins_lists_and_stringifies():
+    report = _report()
+    assert text()(["a ", None, "b"], "t", report) == "a b"
+    assert text()(42, "u", report) == "42"
+    assert text("défaut")(None, "v", report) == "défaut"
+    assert report.coerced == ["t", "u"]
+
+
+def test_choice_is_case_and_space_insensitive():
+    check = choice(("Toxique", "Neutre"), "Neutre")
+    report = _report()
+    assert check("Toxique", "c", report) == "Toxique"
+    assert check("  toxique ", "c", report) == "Toxique"
+    assert check("inconnu", "c", report) == "Neutre"
+    assert report.coerced == ["c", "c"]
+
+
+def test_items_wraps_single_value_and_filters():
+    check = items(text(), max_items=2, keep=bool)
+    report = _report()
+    assert check("seul", "l", report) == ["seul"]
+    assert check(["a", "", "b", "c"], "l", report) == ["a", "b"]
+    assert check(None, "l", report) == []
+
+
+def test_axis_accepts_bare_score_and_derives_label():
+    report = _report()
+    value = axis()("40", "hostility", report)
+    assert value["score"] == 40
+    assert value["label"]
+    assert "hostility" in report.coerced
@@ -0,0 +1,125 @@
+import threading
+
+import pytest
+
+from subtext.singleflight import SingleFlight
+
+
+def _join(flight: SingleFlight, key: str, callers: int) -> None:
+    """Attend que `callers` appelants aient rejoint l'appel en vol."""
+    for _ in range(500):
+        waiting = flight.waiters()
+        if key in waiting and waiting[key] >= callers:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("les appelants n'ont pas rejoint l'appel")
+
+
+def _run_followers(flight, key, count, results, errors, events=None):
+    def follower(i):
+        try:
+            results[i] = flight.do(key, lambda emit: pytest.fail("appel dupliqué"), on_event=(events[i].append if events else None))
+        except Exception as exc:
+            errors[i] = exc
+
+    threads = [threading.Thread(target=follower, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn(emit):
+        calls.append(1)
+        emit("champ")
+        release.wait(5)
+        return {"score": 42}
+
+    results, errors, events = {}, {}, {i: [] for i in range(3)}
+    leader = threading.Thread(target=lambda: results.setdefault("leader", flight.do("k", fn)))
+    leader.start()
+    _join(flight, "k", 0)
+    threads = _run_followers(flight, "k", 3, results, errors, events)
+    _join(flight, "k", 3)
+    release.set()
+    for thread in [leader, *threads]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert not errors
+    assert results["leader"] == ({"score": 42}, False)
+    assert all(results[i] == ({"score": 42}, True) for i in range(3))
+    assert all(events[i] == ["champ"] for i in range(3))
+    assert flight.stats() == {"in_flight": 0, "waiting": 0, "leaders": 1, "coalesced": 3}
+
+
+def test_error_reaches_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fn(emit):
+        release.wait(5)
+        raise ValueError("quota")
+
+    results, errors = {}, {}
+    leader_error = []
+
+    def lead():
+        try:
+            flight.do("k", fn)
+        except ValueError as exc:
+            leader_error.append(exc)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    _join(flight, "k", 0)
+    threads = _run_followers(flight, "k", 2, results, errors)
+    _join(flight, "k", 2)
+    release.set()
+    for thread in [leader, *threads]:
+        thread.join(5)
+
+    assert len(leader_error) == 1
+    assert not results
+    assert [type(errors[i]) for i in range(2)] == [ValueError, ValueError]
+    # Une fois l'appel terminé, la clé est libre : un nouvel appel repart.
+    assert flight.do("k", lambda emit: "ok") == ("ok", False)
+
+
+def test_results_are_isolated_between_callers():
+    flight = SingleFlight()
+    release = threading.Event()
+    mutated = threading.Event()
+    leader_result = {}
+
+    def fn(emit):
+        release.wait(5)
+        return {"tags": ["pression"]}
+
+    def lead():
+        result, _ = flight.do("k", fn)
+        # Le meneur modifie son résultat dès qu'il le reçoit.
+        result["tags"].append("meneur")
+        leader_result["value"] = result
+        mutated.set()
+
+    results, errors = {}, {}
+    leader = threading.Thread(target=lead)
+    leader.start()
+    _join(flight, "k", 0)
+    threads = _run_followers(flight, "k", 2, results, errors)
+    _join(flight, "k", 2)
+    release.set()
+    for thread in [leader, *threads]:
+        thread.join(5)
+
+    assert mutated.is_set()
+    assert leader_result["value"]["tags"] == ["pression", "meneur"]
+    first, second = results[0][0], results[1][0]
+    assert first["tags"] == ["pression"] and second["tags"] == ["pression"]
+    first["tags"].append("premier")
+    assert second["tags"] == ["pression"]
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from subtext.streaming import JsonFieldStreamer
+
+PAYLOAD = {
+    "global_score": 72,
+    "main_effect": 'Il cite « "tout le monde" » et ajoute : \\ ou pas, avec un accent é et un },',
+    "tags": ["pression", "culpabilisation"],
+    "hostility": {"score": 40, "label": "modérée", "detail": {"quote": "[\"x\"]"}},
+    "highlights": [],
+    "viral_punchline": None,
+}
+RAW = json.dumps(PAYLOAD, ensure_ascii=False, indent=1)
+
+
+def _stream(raw: str, size: int):
+    streamer = JsonFieldStreamer()
+    events = []
+    for i in range(0, len(raw), size):
+        events.extend(streamer.feed(raw[i:i + size]))
+    return streamer, events
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16, len(RAW)])
+def test_every_field_once_in_order_whatever_the_chunking(size):
+    streamer, events = _stream(RAW, size)
+    assert events == list(PAYLOAD.items())
+    assert streamer.fields == PAYLOAD
+    assert streamer.done
+    assert streamer.text == RAW
+
+
+def test_field_is_emitted_as_soon_as_it_closes():
+    streamer = JsonFieldStreamer()
+    assert streamer.feed('{"global_score": 7') == []
+    # La virgule referme la valeur, même coupée en plein nombre.
+    assert streamer.feed("2, \"main_") == [("global_score", 72)]
+    assert streamer.feed('effect": "a') == []
+    assert streamer.feed('b"}') == [("main_effect", "ab")]
+
+
+def test_escaped_quote_split_across_chunks():
+    streamer = JsonFieldStreamer()
+    events = []
+    for chunk in ['{"quote": "il a dit \\', '"non\\', '" puis', ' est parti", "n": 1}']:
+        events.extend(streamer.feed(chunk))
+    assert events == [("quote", 'il a dit "non" puis est parti'), ("n", 1)]
+
+
+def test_escaped_backslash_before_closing_quote():
+    _, events = _stream('{"path": "C:\\\\", "n": 2}', 1)
+    assert events == [("path", "C:\\"), ("n", 2)]
+
+
+def test_nested_value_waits_for_its_closing_bracket():
+    streamer = JsonFieldStreamer()
+    assert streamer.feed('{"tags": ["a", "b"') == []
+    assert streamer.feed('], "x": 1') == [("tags", ["a", "b"])]
+
+
+def test_text_after_the_object_is_ignored():
+    streamer = JsonFieldStreamer()
+    assert streamer.feed('{"a": 1}') == [("a", 1)]
+    assert streamer.feed(' {"b": 2}') == []
+    assert streamer.fields == {"a": 1}
+
+
+def test_truncated_stream_keeps_completed_fields():
+    streamer, events = _stream(RAW[: RAW.index('"highlights"') + 5], 5)
+    assert [key for key, _ in events] == ["global_score", "main_effect", "tags", "hostility"]
+    assert not streamer.done
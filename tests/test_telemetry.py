@@ -0,0 +1,55 @@
+import builtins
+import json
+import threading
+
+from subtext import telemetry
+from subtext.telemetry import CallRecord, Telemetry
+
+
+def test_records_are_appended_to_the_journal(tmp_path):
+    path = tmp_path / "logs" / "telemetry.jsonl"
+    collector = Telemetry(path=str(path))
+    collector.record(CallRecord(call_type="analysis", model="m", wall_s=1.5))
+    collector.record(CallRecord(call_type="replies", model="m", wall_s=0.5, ok=False, error="Timeout"))
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [(r["call_type"], r["ok"]) for r in lines] == [("analysis", True), ("replies", False)]
+    assert len(collector.records()) == 2
+
+
+def test_slow_write_does_not_block_percentile_reads(tmp_path, monkeypatch):
+    collector = Telemetry(path=str(tmp_path / "telemetry.jsonl"))
+    collector.record(CallRecord(call_type="analysis", model="m", wall_s=2.0))
+    writing, release = threading.Event(), threading.Event()
+    real_open = builtins.open
+
+    def slow_open(*args, **kwargs):
+        writing.set()
+        release.wait(5)
+        return real_open(*args, **kwargs)
+
+    monkeypatch.setattr(telemetry, "open", slow_open, raising=False)
+    writer = threading.Thread(
+        target=collector.record, args=(CallRecord(call_type="analysis", model="m", wall_s=4.0),)
+    )
+    writer.start()
+    try:
+        assert writing.wait(5)
+        # La fenêtre mémoire est déjà à jour pendant que le disque traîne.
+        done = threading.Event()
+        result = []
+        reader = threading.Thread(target=lambda: (result.append(collector.latency_percentile("analysis", 100)), done.set()))
+        reader.start()
+        assert done.wait(1)
+        assert result == [4.0]
+    finally:
+        release.set()
+        writer.join(5)
+    assert len((tmp_path / "telemetry.jsonl").read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_unwritable_path_is_ignored(tmp_path):
+    blocker = tmp_path / "fichier"
+    blocker.write_text("")
+    collector = Telemetry(path=str(blocker / "telemetry.jsonl"))
+    collector.record(CallRecord(call_type="analysis", model="m", wall_s=1.0))
+    assert collector.latency_percentile("analysis", 50) == 1.0
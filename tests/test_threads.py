@@ -0,0 +1,118 @@
+from subtext.heuristics import score_to_level
+from subtext.threads import ANONYMOUS, Post, PostResult, rollup, split_posts
+
+
+def _bodies(posts):
+    return [(p.author, p.timestamp, p.body) for p in posts]
+
+
+def test_one_line_headers():
+    text = (
+        "marc_92 — 12/06/2024 14:32\n"
+        "Tu racontes n'importe quoi, comme d'habitude.\n"
+        "Vraiment.\n"
+        "julie · il y a 3 h\n"
+        "Calme-toi, on peut en discuter."
+    )
+    assert _bodies(split_posts(text)) == [
+        ("marc_92", "12/06/2024 14:32", "Tu racontes n'importe quoi, comme d'habitude.\nVraiment."),
+        ("julie", "il y a 3 h", "Calme-toi, on peut en discuter."),
+    ]
+
+
+def test_bracketed_timestamp_with_inline_body():
+    text = "[12/06/2024 14:32] marc : t'es nul\n[12/06/2024 14:33] julie : merci, toi aussi"
+    assert _bodies(split_posts(text)) == [
+        ("marc", "12/06/2024 14:32", "t'es nul"),
+        ("julie", "12/06/2024 14:33", "merci, toi aussi"),
+    ]
+
+
+def test_jvc_author_and_date_on_two_lines():
+    text = (
+        "Pseudo_Forum\n"
+        "12 juin 2024 à 14:32:10\n"
+        "Premier message du topic.\n\n"
+        "AutrePseudo\n"
+        "Posté le 12/06/2024 14:35\n"
+        "Réponse au premier message."
+    )
+    posts = split_posts(text)
+    assert [(p.author, p.body) for p in posts] == [
+        ("Pseudo_Forum", "Premier message du topic."),
+        ("AutrePseudo", "Réponse au premier message."),
+    ]
+    assert posts[0].timestamp == "12 juin 2024 à 14:32:10"
+
+
+def test_text_before_first_header_is_anonymous():
+    posts = split_posts("Contexte collé au-dessus.\nmarc — 12/06/2024 14:32\nSalut.")
+    assert [(p.author, p.body) for p in posts] == [(ANONYMOUS, "Contexte collé au-dessus."), ("marc", "Salut.")]
+    assert [p.index for p in posts] == [0, 1]
+
+
+def test_chat_lines_need_repetition():
+    # Une seule ligne « clé : valeur » n'est pas un fil.
+    single = split_posts("Objet : réunion\n\nBonjour à tous.")
+    assert [p.author for p in single] == [ANONYMOUS, ANONYMOUS]
+    chat = split_posts("marc: salut\njulie: salut\nsuite de julie\nmarc: ça va ?")
+    assert _bodies(chat) == [
+        ("marc", None, "salut"),
+        ("julie", None, "salut\nsuite de julie"),
+        ("marc", None, "ça va ?"),
+    ]
+
+
+def test_separators_then_paragraphs():
+    assert [p.body for p in split_posts("un\n---\ndeux\n***\ntrois")] == ["un", "deux", "trois"]
+    assert [p.body for p in split_posts("un\n\n\ndeux\n  \ntrois")] == ["un", "deux", "trois"]
+    assert split_posts("") == []
+
+
+# ───────── Synthèse ─────────
+def _result(index, author, score, hostility, techniques=(), error=None):
+    analysis = None
+    if error is None:
+        analysis = {
+            "global_score": score,
+            "hostility": {"score": hostility},
+            "tags": ["neutre"],
+            "highlights": [{"technique_name": name} for name in techniques],
+        }
+    return PostResult(
+        post=Post(index=index, author=author, timestamp=None, body=f"message {index}"),
+        analysis=analysis,
+        error=error,
+        elapsed_s=0.0,
+    )
+
+
+def test_rollup_statistics():
+    results = [
+        _result(0, "marc", 80, 90, ["Culpabilisation"]),
+        _result(1, "julie", 10, 0),
+        _result(2, "marc", 60, 40, ["culpabilisation", "menace"]),
+        _result(3, "paul", 0, 0, error="RateLimitError"),
+    ]
+    summary = rollup(results)
+    assert summary["posts"] == 4
+    assert summary["analyzed"] == 3
+    assert summary["failed"] == 1
+    assert summary["authors"] == 2
+    assert summary["mean_score"] == 50
+    assert summary["median_score"] == 60
+    assert summary["max_score"] == 80
+    assert sum(summary["distribution"].values()) == 3
+    assert summary["distribution"][score_to_level(80)] >= 1
+    # Messages sans hostilité exclus du classement.
+    assert [(h["index"], h["hostility"]) for h in summary["most_hostile"]] == [(0, 90), (2, 40)]
+    assert summary["recurring_by_author"] == [{"author": "marc", "posts": 2, "techniques": [("culpabilisation", 2)]}]
+
+
+def test_rollup_of_partial_and_empty_results():
+    assert rollup([])["mean_score"] == 0
+    assert rollup([_result(0, "marc", 0, 0, error="x")])["analyzed"] == 0
+    summary = rollup([_result(i, ANONYMOUS, 50, 50, ["menace"]) for i in range(3)], top_n=2)
+    assert len(summary["most_hostile"]) == 2
+    # Les messages anonymes n'ont pas de techniques récurrentes par auteur.
+    assert summary["recurring_by_author"] == []
@@ -0,0 +1,47 @@
+from subtext import views
+from subtext.deferred import merge_section
+from subtext.views import ANALYSIS_ID_KEY, analysis_view_id, get_view
+
+TEXT = "Ceux qui ne sont pas contents n'ont qu'à partir. Merci de votre compréhension."
+ANALYSIS = {
+    "content_type": "interaction",
+    "global_score": 64,
+    "global_label": "Tendu",
+    "main_effect": "Menace voilée.",
+    "tags": ["pression"],
+    "hostility": {"score": 50, "label": "moyenne"},
+    "manipulation": {"score": 30, "label": "faible"},
+    "pressure": {"score": 70, "label": "élevée"},
+    "highlights": [{"quote": "n'ont qu'à partir", "tag": "menace"}],
+    "recommended_actions": [],
+    "deferred": ["systemic_view"],
+}
+
+
+def test_view_id_is_computed_once_per_analysis(monkeypatch):
+    analysis = dict(ANALYSIS)
+    dumps = []
+    real_dumps = views.json.dumps
+    monkeypatch.setattr(views.json, "dumps", lambda *a, **k: dumps.append(1) or real_dumps(*a, **k))
+    first = get_view(analysis, "Calme", TEXT)
+    assert ANALYSIS_ID_KEY in analysis
+    assert get_view(analysis, "Calme", TEXT) is first
+    assert len(dumps) == 1
+    # Le mode fait partie de la clé, pas du contenu hashé.
+    assert get_view(analysis, "Roast", TEXT).view_id != first.view_id
+    assert len(dumps) == 1
+
+
+def test_same_content_shares_the_view_id():
+    assert analysis_view_id(dict(ANALYSIS), "Calme", TEXT) == analysis_view_id(dict(ANALYSIS), "Calme", TEXT)
+    assert analysis_view_id(dict(ANALYSIS), "Calme", TEXT) != analysis_view_id(dict(ANALYSIS), "Calme", TEXT + " !")
+
+
+def test_merged_section_gets_a_new_view():
+    analysis = dict(ANALYSIS)
+    before = get_view(analysis, "Calme", TEXT)
+    merged = merge_section(analysis, "systemic_view", {"systemic_view": {"scale": "macro", "power_dynamics": "x"}})
+    assert ANALYSIS_ID_KEY not in merged
+    after = get_view(merged, "Calme", TEXT)
+    assert after.view_id != before.view_id
+    assert after.deferred == ()